@@ -0,0 +1,128 @@
+"""
+Agent Protocol - Framed messages between bench agents and dashboards
+Every message is a JSON object in a frame with a 5-byte header: the payload
+length (uint32, big endian) and a flags byte. Payloads of COMPRESS_MIN bytes
+or more are zlib-compressed, which shrinks batches of log lines severalfold.
+
+Run events travel in batches ('events' messages) as compact lists, numbered
+by the agent with a sequence number per agent session:
+
+    ['B', config]                                      RunStarted
+    ['L', message]                                     LogLine
+    ['R', name, status, duration, message, attempts]   TestResult
+    ['S', text]                                        StatusChanged
+    ['F']                                              RunFinished
+
+Dashboard -> agent: hello (client id, agent session and last event seen),
+run (config named by a run_id, and RunHints), stop (run_id), ack (last event
+handled). Agent -> dashboard: welcome (session, next sequence number),
+started, busy or failed (reply to run), not_running (reply to stop), events,
+and gap (count events from first on were discarded before they were sent).
+"""
+
+import json
+import struct
+import zlib
+from event_bus import RunStarted, LogLine, TestResult, StatusChanged, RunFinished
+
+
+DEFAULT_AGENT_PORT = 8765
+
+HEADER = struct.Struct('!IB')
+FLAG_ZLIB = 0x01
+# Smaller payloads are sent as they are; compressing them gains nothing
+COMPRESS_MIN = 512
+# Fast compression: the link is rarely the bottleneck, the bench PC's CPU may be
+COMPRESS_LEVEL = 1
+# Larger frames mean a corrupt stream or a peer speaking another protocol
+MAX_FRAME = 16 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def parse_agent(address):
+    """'host[:port]' -> (host, port)"""
+    host, _, port = str(address).strip().rpartition(':')
+    if not host:
+        return port, DEFAULT_AGENT_PORT
+    try:
+        return host, int(port)
+    except ValueError:
+        raise ProtocolError(f"Invalid agent address: {address}")
+
+
+def encode_frame(message):
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    flags = 0
+    if len(payload) >= COMPRESS_MIN:
+        payload = zlib.compress(payload, COMPRESS_LEVEL)
+        flags |= FLAG_ZLIB
+    return HEADER.pack(len(payload), flags) + payload
+
+
+async def read_frame(reader):
+    """Read one message; raises asyncio.IncompleteReadError when the peer closes"""
+    length, flags = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame of {length} bytes exceeds the limit")
+    payload = await reader.readexactly(length)
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    try:
+        return json.loads(payload)
+    except ValueError as e:
+        raise ProtocolError(f"Malformed message: {e}")
+
+
+def encode_event(event):
+    """Compact, JSON-ready form of a run event"""
+    if isinstance(event, LogLine):
+        return ['L', event.message]
+    if isinstance(event, TestResult):
+        return ['R', event.name, event.status, event.duration, event.message, event.attempts]
+    if isinstance(event, StatusChanged):
+        return ['S', event.text]
+    if isinstance(event, RunStarted):
+        return ['B', event.config]
+    if isinstance(event, RunFinished):
+        # The results travel as TestResult events already
+        return ['F']
+    raise ProtocolError(f"Cannot encode {type(event).__name__}")
+
+
+def decode_event(item):
+    kind = item[0]
+    if kind == 'L':
+        return LogLine(item[1])
+    if kind == 'R':
+        return TestResult(*item[1:])
+    if kind == 'S':
+        return StatusChanged(item[1])
+    if kind == 'B':
+        return RunStarted(item[1])
+    if kind == 'F':
+        return RunFinished(None, None)
+    raise ProtocolError(f"Unknown event kind: {kind!r}")
+
+
+def encode_hints(hints):
+    """RunHints as a message field; the dashboard owns the run history"""
+    cached = None
+    if hints.cached is not None:
+        cached = {'mode': hints.cached.mode, 'entries': hints.cached.entries}
+    return {'durations': hints.durations, 'failure_rates': hints.failure_rates,
+            'flaky': hints.flaky, 'cached': cached}
+
+
+def decode_hints(data):
+    from scheduler import RunHints
+    if not data:
+        return RunHints()
+    cached = None
+    if data.get('cached') is not None:
+        from result_cache import CacheSnapshot
+        entries = {name: tuple(entry) for name, entry in data['cached']['entries'].items()}
+        cached = CacheSnapshot(data['cached']['mode'], entries)
+    return RunHints(data.get('durations'), data.get('failure_rates'), data.get('flaky'), cached)
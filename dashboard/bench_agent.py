@@ -0,0 +1,311 @@
+"""
+Bench Agent - Runs test suites next to the hardware for remote dashboards
+A small asyncio server for the PC wired to the benches, no desktop session
+needed. Dashboards connect, send a run (config plus the RunHints from their
+history) and receive the run's events as compressed batches (see
+agent_protocol.py); the device traffic stays on the bench PC.
+
+Every event is numbered and kept in a journal until every dashboard that is
+connected, or disconnected less than CLIENT_RETENTION seconds ago, has
+acknowledged it. A dashboard reconnecting after a network blip resumes right
+after the last event it acknowledged; runs keep going while nobody watches.
+Any number of dashboards may follow the same run. The journal never holds
+more than MAX_JOURNAL_EVENTS; a dashboard that falls further behind is sent
+an explicit gap message for the events it missed.
+
+Usage:
+    python bench_agent.py [--host 127.0.0.1] [--port 8765] [--no-history] [--quiet]
+
+The protocol is unauthenticated: only listen on trusted lab networks.
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import uuid
+from agent_protocol import (DEFAULT_AGENT_PORT, ProtocolError, encode_frame, read_frame,
+                            encode_event, decode_hints)
+from event_bus import EventBus, LogLine, DROP_NEWEST
+
+
+# Events sent per frame, and unacknowledged events in flight per dashboard
+BATCH_EVENTS = 1000
+WINDOW_EVENTS = 20000
+# Seconds a disconnected dashboard's position is kept for it to resume from
+CLIENT_RETENTION = 600
+# Hard cap on journaled events, whatever dashboards have not acknowledged
+MAX_JOURNAL_EVENTS = 500000
+
+
+class EventJournal:
+    """Numbered, encoded run events awaiting acknowledgement (thread-safe)"""
+
+    def __init__(self, max_events=MAX_JOURNAL_EVENTS):
+        self.max_events = max_events
+        # Sequence number of _items[_offset]
+        self.first = 0
+        self.on_append = None
+        # The journal's bus subscription, whose dropped log lines are reported
+        self.subscription = None
+        self._reported_drops = 0
+        self._items = []
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    @property
+    def next_seq(self):
+        return self.first + len(self._items) - self._offset
+
+    def handle(self, event):
+        """EventBus sink: journal the event in its wire form"""
+        items = []
+        if self.subscription is not None and self.subscription.dropped != self._reported_drops:
+            dropped = self.subscription.dropped
+            items.append(encode_event(LogLine(f'[WARNING] Bench agent fell behind: '
+                                              f'{dropped - self._reported_drops} log lines dropped')))
+            self._reported_drops = dropped
+        items.append(encode_event(event))
+        with self._lock:
+            self._items.extend(items)
+            excess = len(self._items) - self._offset - self.max_events
+            if excess > 0:
+                self._discard(excess)
+        if self.on_append is not None:
+            self.on_append()
+
+    def since(self, seq, limit):
+        """(first sequence number, events) from seq on, or from the oldest kept if seq
+        was discarded (the first sequence number is then greater than seq)"""
+        with self._lock:
+            seq = max(seq, self.first)
+            start = self._offset + seq - self.first
+            return seq, self._items[start:start + limit]
+
+    def trim(self, upto):
+        """Forget events up to and including sequence number upto"""
+        with self._lock:
+            count = min(upto + 1 - self.first, len(self._items) - self._offset)
+            if count > 0:
+                self._discard(count)
+
+    def _discard(self, count):
+        self._offset += count
+        self.first += count
+        # Compact once the dead prefix outweighs the live events
+        if self._offset > len(self._items) // 2:
+            del self._items[:self._offset]
+            self._offset = 0
+
+
+class ClientState:
+    """Position of one dashboard in the journal, kept across reconnects"""
+
+    def __init__(self, cursor):
+        # Next event to send, and last event acknowledged
+        self.cursor = cursor
+        self.acked = cursor - 1
+        self.connected = True
+        self.disconnected_at = None
+        self.wakeup = asyncio.Event()
+        # Connection the dashboard is on; a half-open older one may linger
+        self.writer = None
+
+
+class BenchAgent:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_AGENT_PORT, index=None, quiet=False):
+        from device_pool import DevicePools
+        self.host = host
+        self.port = port
+        # Identifies this agent process; sequence numbers restart with it
+        self.session = uuid.uuid4().hex[:12]
+        self.bus = EventBus()
+        self.journal = EventJournal()
+        # Never pauses the run: results always reach the journal dashboards resume
+        # from, and log lines dropped under a flood are reported in their place
+        self.journal.subscription = self.bus.subscribe(self.journal, maxsize=MAX_JOURNAL_EVENTS,
+                                                       policy=DROP_NEWEST, name='journal')
+        if not quiet:
+            from sinks import StreamSink
+            self.bus.subscribe(StreamSink(sys.stdout), name='stdout')
+        self.pools = DevicePools()
+        self.index = index
+        self.runner = None
+        self.run_id = None
+        # Every run started by this process, named by the requesting dashboard
+        self.run_ids = set()
+        self.clients = {}
+        self._loop = None
+        self._wakeup_pending = False
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self.journal.on_append = self._notify
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        print(f'[INFO] Bench agent {self.session} listening on {self.host}:{self.port}', flush=True)
+        async with server:
+            await server.serve_forever()
+
+    def _notify(self):
+        """Wake the senders after an append (journal thread); one wakeup per loop pass"""
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self._loop.call_soon_threadsafe(self._wake_clients)
+
+    def _wake_clients(self):
+        self._wakeup_pending = False
+        for client in self.clients.values():
+            client.wakeup.set()
+        # Also trims while no dashboard is attached, so unwatched runs do not fill the journal
+        self.trim_journal()
+
+    async def handle_client(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        client = None
+        try:
+            hello = await read_frame(reader)
+            if hello.get('type') != 'hello':
+                raise ProtocolError("Expected hello")
+            client = self.attach(hello)
+            client.writer = writer
+            writer.write(encode_frame({'type': 'welcome', 'session': self.session,
+                                       'next': client.cursor, 'first': self.journal.first}))
+            sender = asyncio.create_task(self.send_events(client, writer))
+            try:
+                while True:
+                    self.handle_message(client, await read_frame(reader), writer)
+            finally:
+                sender.cancel()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ProtocolError as e:
+            print(f'[WARNING] Dropping dashboard {peer}: {e}', flush=True)
+        finally:
+            if client is not None and client.writer is writer:
+                client.connected = False
+                client.disconnected_at = time.monotonic()
+            writer.close()
+
+    def attach(self, hello):
+        """Client state for a hello: resumed after its last event, or new at the live end"""
+        self.expire_clients()
+        client_id = str(hello.get('client'))
+        client = self.clients.get(client_id)
+        resume = hello.get('resume')
+        if hello.get('session') != self.session or resume is None:
+            # New dashboard, or one that knew an earlier agent process
+            client = self.clients[client_id] = ClientState(self.journal.next_seq)
+        else:
+            if client is None:
+                client = self.clients[client_id] = ClientState(resume + 1)
+            # Events after the acknowledged one may be lost in flight; resend them
+            # (send_events reports a gap if the journal has discarded some)
+            client.cursor = resume + 1
+            client.acked = resume
+            client.connected = True
+            client.wakeup = asyncio.Event()
+        client.wakeup.set()
+        return client
+
+    def handle_message(self, client, message, writer):
+        kind = message.get('type')
+        if kind == 'ack':
+            client.acked = int(message['seq'])
+            client.wakeup.set()
+            self.trim_journal()
+        elif kind == 'run':
+            try:
+                reply = self.start_run(message)
+            except Exception as e:
+                reply = {'type': 'failed', 'error': f"{type(e).__name__}: {e}"}
+            writer.write(encode_frame(reply))
+        elif kind == 'stop':
+            if self.runner is not None and self.runner.is_running and message.get('run_id') == self.run_id:
+                self.runner.stop(message.get('reason') or "from a dashboard")
+            else:
+                # E.g. the dashboard gave up waiting for another dashboard's run
+                writer.write(encode_frame({'type': 'not_running', 'run_id': message.get('run_id')}))
+        else:
+            raise ProtocolError(f"Unknown message type: {kind!r}")
+
+    def start_run(self, message):
+        """Start a requested run unless another one is in progress
+
+        The dashboard names its run, so a request repeated after a blip is
+        recognized instead of running the suite twice.
+        """
+        from scheduler import create_runner
+        run_id = str(message['config'].get('run_id'))
+        if run_id in self.run_ids:
+            return {'type': 'started', 'run_id': run_id}
+        if self.runner is not None and self.runner.is_running:
+            return {'type': 'busy'}
+
+        config = dict(message['config'], agent='', run_id=run_id)
+        self.runner = create_runner(config, self.bus, pools=self.pools, index=self.index)
+        self.run_id = run_id
+        self.run_ids.add(run_id)
+        self.runner.run_tests(config, decode_hints(message.get('hints')))
+        return {'type': 'started', 'run_id': run_id}
+
+    async def send_events(self, client, writer):
+        """Stream journaled events to one dashboard, at most WINDOW_EVENTS unacknowledged"""
+        while True:
+            if client.cursor < self.journal.next_seq and client.cursor - client.acked <= WINDOW_EVENTS:
+                first, events = self.journal.since(client.cursor, BATCH_EVENTS)
+                if first > client.cursor:
+                    # Discarded by the journal bound before this dashboard got them
+                    writer.write(encode_frame({'type': 'gap', 'first': client.cursor,
+                                               'count': first - client.cursor}))
+                    client.cursor = first
+                if events:
+                    writer.write(encode_frame({'type': 'events', 'first': first, 'events': events}))
+                    client.cursor = first + len(events)
+                    await writer.drain()
+                    continue
+            client.wakeup.clear()
+            await client.wakeup.wait()
+
+    def expire_clients(self):
+        now = time.monotonic()
+        self.clients = {client_id: client for client_id, client in self.clients.items()
+                        if client.connected or now - client.disconnected_at < CLIENT_RETENTION}
+
+    def trim_journal(self):
+        """Drop events every known dashboard has acknowledged
+
+        Without known dashboards nothing is kept: a new one starts at the live end.
+        """
+        self.expire_clients()
+        if self.clients:
+            self.journal.trim(min(client.acked for client in self.clients.values()))
+        else:
+            self.journal.trim(self.journal.next_seq - 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run HiL test suites for remote dashboards")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address to listen on (default 127.0.0.1; 0.0.0.0 for the lab network)")
+    parser.add_argument('--port', type=int, default=DEFAULT_AGENT_PORT)
+    parser.add_argument('--no-history', action='store_true',
+                        help="do not cache pytest collection in history.db")
+    parser.add_argument('--quiet', action='store_true', help="do not echo the run log to stdout")
+    args = parser.parse_args(argv)
+
+    index = None
+    if not args.no_history:
+        from discovery import DiscoveryIndex
+        index = DiscoveryIndex()
+    agent = BenchAgent(args.host, args.port, index=index, quiet=args.quiet)
+    try:
+        asyncio.run(agent.serve())
+    except KeyboardInterrupt:
+        if agent.runner is not None:
+            agent.runner.stop("agent shut down")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
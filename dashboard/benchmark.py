@@ -0,0 +1,403 @@
+"""
+Benchmark - Reproducible load test of the dashboard's ingestion path
+Drives a seeded SyntheticRunner through the EventBus into the results panel
+and measures end-to-end throughput, publish-to-UI latency, event-loop lag,
+frame cost and memory. With a display (or under xvfb-run) the real Tk
+ResultsPanel is measured; otherwise a headless stand-in runs the same queue,
+log spill sink, log store/index and result store without the widgets.
+
+Scenarios:
+    flood  all tests as fast as possible (peak throughput)
+    paced  log_rate lines per second for --duration seconds (latency, lag, drops)
+
+Usage:
+    python benchmark.py [--tests N] [--log-rate N] [--duration S] [--seed N]
+                        [--ui auto|tk|headless] [--tracemalloc]
+                        [--output FILE] [--baseline FILE] [--tolerance 0.2]
+
+Exit code: 0 ok, 1 a metric regressed against --baseline beyond tolerance.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from event_bus import (EventBus, RunStarted, LogLine, TestResult, StatusChanged, RunFinished, BLOCK,
+                       FRAME_MS, EVENT_BUDGET_MS, EVENT_QUEUE_SIZE)
+from log_index import LogIndex, ALL_SEVERITIES
+from log_store import LogStore
+from log_viewer import DEFAULT_MAX_FLUSH_LINES
+from profiler import PROFILER
+from results_store import ResultStore
+from run_stats import RunStats
+from sinks import LogStoreSink
+from synthetic_runner import SyntheticRunner, DEFAULT_TESTS, DEFAULT_LOG_RATE
+
+
+# Every Nth published event is timestamped for the latency figures
+LATENCY_SAMPLE_EVERY = 50
+DEFAULT_DURATION = 10.0
+DEFAULT_TOLERANCE = 0.2
+# Latency/lag regressions below this many ms are noise, whatever the ratio
+ABSOLUTE_SLACK_MS = 5.0
+
+# Headline metrics compared against a baseline: name -> True if higher is better
+COMPARED_METRICS = {
+    'results_per_s': True,
+    'log_lines_per_s': True,
+    'latency_p95_ms': False,
+    'event_loop_lag_p95_ms': False,
+    'peak_memory_mb': False,
+}
+
+
+class TimedBus(EventBus):
+    """EventBus that timestamps a sample of published events"""
+
+    def __init__(self):
+        super().__init__()
+        self.stamps = {}
+        self._count = 0
+
+    def publish(self, event):
+        self._count += 1
+        if self._count % LATENCY_SAMPLE_EVERY == 0:
+            # The event is kept alive with its stamp, so its id stays unique
+            self.stamps[id(event)] = (event, time.perf_counter())
+        super().publish(event)
+
+
+class LatencyProbe:
+    """Records publish-to-handle latency of stamped events on the panel's subscriptions"""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.latencies = []
+        self.log_lines = 0
+        self.results = 0
+        self.finished = False
+
+    def watch(self, subscription):
+        """Route a subscription's events through the probe to its sink"""
+        subscription.sink = ProbedSink(subscription.sink, self)
+
+    def record(self, event, stamp):
+        if stamp is not None:
+            self.latencies.append(time.perf_counter() - stamp[1])
+        if isinstance(event, LogLine):
+            self.log_lines += 1
+        elif isinstance(event, TestResult):
+            self.results += 1
+        elif isinstance(event, RunFinished):
+            self.finished = True
+
+
+class ProbedSink:
+    """Sink wrapper that reports each handled event to a LatencyProbe"""
+
+    def __init__(self, sink, probe):
+        self.sink = sink
+        self.probe = probe
+
+    def handle(self, event):
+        stamp = self.probe.bus.stamps.pop(id(event), None)
+        self.sink.handle(event)
+        self.probe.record(event, stamp)
+
+    def handle_batch(self, events):
+        stamps = [self.probe.bus.stamps.pop(id(event), None) for event in events]
+        self.sink.handle_batch(events)
+        for event, stamp in zip(events, stamps):
+            self.probe.record(event, stamp)
+
+
+class HeadlessPanel:
+    """ResultsPanel's ingestion path without widgets
+
+    Same pulled subscription, event budget, log spill sink, log store and
+    index, result store and stats accumulator; only the Tk drawing is left out.
+    """
+
+    def __init__(self, bus, log_dir):
+        self.subscription = bus.subscribe(self, maxsize=EVENT_QUEUE_SIZE, threaded=False, name='dashboard',
+                                          events=(RunStarted, TestResult, StatusChanged, RunFinished))
+        self.store = LogStore(log_dir)
+        self.index = LogIndex(self.store)
+        self.log_subscription = bus.subscribe(LogStoreSink(self.store, self.index), maxsize=EVENT_QUEUE_SIZE,
+                                              policy=BLOCK, name='log_store', events=LogStoreSink.EVENTS)
+        self.results = ResultStore()
+        self.stats = RunStats()
+        self.seen_lines = 0
+
+    def handle(self, event):
+        if isinstance(event, TestResult):
+            self.results.append(event.name, event.status, event.duration, event.attempts)
+            self.stats.add(event.status, event.duration)
+        elif isinstance(event, RunStarted):
+            self.results.clear()
+            self.stats = RunStats()
+
+    def on_frame(self):
+        """One UI frame: drain events for the frame budget, then read the new log lines"""
+        self.subscription.drain(deadline=time.perf_counter() + EVENT_BUDGET_MS / 1000)
+        count = self.index.line_count
+        if count > self.seen_lines:
+            # What LogViewer.flush reads to show (at most a frame's worth)
+            first = max(self.seen_lines, count - DEFAULT_MAX_FLUSH_LINES)
+            self.store.read_numbered(self.index.lines_from(first, ALL_SEVERITIES, count - first, stop=count))
+            self.seen_lines = count
+
+    def close(self):
+        self.log_subscription.close()
+        self.index.close()
+        self.store.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def to_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def peak_rss_mb():
+    """Peak resident memory of the process, or None where unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def outcome_digest(results):
+    """Digest of every reported name and status: equal seeds give equal digests"""
+    digest = hashlib.sha256()
+    for name, code in zip(results.names, results.status_codes):
+        digest.update(f'{name}:{code}\n'.encode())
+    return digest.hexdigest()[:16]
+
+
+def run_headless(bus, runner, config, log_dir):
+    """Run the scenario against the stand-in; frames are timed like on_frame"""
+    panel = HeadlessPanel(bus, log_dir)
+    probe = LatencyProbe(bus)
+    probe.watch(panel.subscription)
+    probe.watch(panel.log_subscription)
+
+    runner.run_tests(config)
+    due = time.perf_counter()
+    while (not probe.finished or len(panel.subscription) or len(panel.log_subscription)
+           or panel.seen_lines < panel.store.line_count):
+        now = time.perf_counter()
+        if now < due:
+            time.sleep(due - now)
+            now = time.perf_counter()
+        PROFILER.record('event_loop_lag', max(0.0, now - due))
+        panel.on_frame()
+        PROFILER.record('frame', time.perf_counter() - now)
+        due = time.perf_counter() + FRAME_MS / 1000
+    dropped = panel.log_subscription.dropped
+    panel.close()
+    return probe, dropped
+
+
+def run_tk(bus, runner, config, log_dir):
+    """Run the scenario against the real ResultsPanel in a Tk window"""
+    import tkinter as tk
+    from results_panel import ResultsPanel
+
+    root = tk.Tk()
+    root.geometry("900x700")
+    panel = ResultsPanel(root, bus)
+    panel.log_viewer.store.log_dir = log_dir
+    probe = LatencyProbe(bus)
+    probe.watch(panel.subscription)
+    probe.watch(panel.log_subscription)
+    viewer = panel.log_viewer
+
+    def check_done():
+        if (probe.finished and not len(panel.subscription) and not len(panel.log_subscription)
+                and viewer.seen_lines == viewer.store.line_count):
+            root.quit()
+        else:
+            root.after(FRAME_MS, check_done)
+
+    runner.run_tests(config)
+    root.after(FRAME_MS, check_done)
+    root.mainloop()
+    dropped = panel.log_subscription.dropped
+    panel.log_subscription.close()
+    panel.log_viewer.index.close()
+    panel.log_viewer.store.close()
+    root.destroy()
+    return probe, dropped
+
+
+def display_available():
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def run_scenario(name, config, ui, use_tracemalloc):
+    """Run one scenario and return its metrics"""
+    gc.collect()
+    PROFILER.enable(False)
+    PROFILER.enable()
+    if use_tracemalloc:
+        tracemalloc.start()
+    log_dir = tempfile.mkdtemp(prefix='hil_bench_')
+    bus = TimedBus()
+    runner = SyntheticRunner(bus)
+
+    start = time.perf_counter()
+    try:
+        if ui == 'tk':
+            probe, dropped = run_tk(bus, runner, config, log_dir)
+        else:
+            probe, dropped = run_headless(bus, runner, config, log_dir)
+        elapsed = time.perf_counter() - start
+        runner.worker.join()
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+    traced_peak = None
+    if use_tracemalloc:
+        traced_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+    PROFILER.enable(False)
+
+    hot_paths = PROFILER.snapshot()['hot_paths']
+    lag = hot_paths.get('event_loop_lag', {})
+    return {
+        'scenario': name,
+        'ui': ui,
+        'seed': config['seed'],
+        'tests': probe.results,
+        'log_lines': probe.log_lines,
+        'dropped_log_lines': dropped,
+        'seconds': round(elapsed, 3),
+        'results_per_s': round(probe.results / elapsed, 1),
+        'log_lines_per_s': round(probe.log_lines / elapsed, 1),
+        'latency_p50_ms': to_ms(percentile(probe.latencies, 0.5)),
+        'latency_p95_ms': to_ms(percentile(probe.latencies, 0.95)),
+        'latency_max_ms': to_ms(max(probe.latencies) if probe.latencies else None),
+        'event_loop_lag_p95_ms': lag.get('p95_ms'),
+        'event_loop_lag_max_ms': lag.get('max_ms'),
+        'peak_memory_mb': traced_peak if traced_peak is not None else peak_rss_mb(),
+        'memory_source': 'tracemalloc' if traced_peak is not None else 'peak RSS',
+        'outcome_digest': outcome_digest(runner.results),
+        'hot_paths': hot_paths,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of the headline metrics against a baseline, as text lines"""
+    previous = {entry['scenario']: entry for entry in baseline.get('scenarios', [])}
+    regressions = []
+    for entry in results:
+        old = previous.get(entry['scenario'])
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            new_value, old_value = entry.get(metric), old.get(metric)
+            if new_value is None or not old_value:
+                continue
+            if metric == 'peak_memory_mb' and entry['memory_source'] != old.get('memory_source'):
+                # RSS and traced heap are not comparable
+                continue
+            if higher_is_better:
+                regressed = new_value < old_value * (1 - tolerance)
+            else:
+                regressed = new_value > old_value * (1 + tolerance)
+                if metric.endswith('_ms'):
+                    regressed = regressed and new_value - old_value > ABSOLUTE_SLACK_MS
+            if regressed:
+                regressions.append(f"{entry['scenario']}: {metric} {old_value} -> {new_value}")
+    return regressions
+
+
+def print_table(results):
+    rows = [('scenario', 'tests', 'lines', 'results/s', 'lines/s', 'lat p95 ms',
+             'lag p95 ms', 'dropped', 'memory MB', 'digest')]
+    for entry in results:
+        rows.append((entry['scenario'], entry['tests'], entry['log_lines'], entry['results_per_s'],
+                     entry['log_lines_per_s'], entry['latency_p95_ms'], entry['event_loop_lag_p95_ms'],
+                     entry['dropped_log_lines'], entry['peak_memory_mb'], entry['outcome_digest']))
+    widths = [max(len(str(row[column])) for row in rows) for column in range(len(rows[0]))]
+    for row in rows:
+        print('  '.join(str(value).rjust(width) for value, width in zip(row, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's event ingestion path")
+    parser.add_argument('--tests', type=int, default=DEFAULT_TESTS, help="tests in the flood scenario")
+    parser.add_argument('--log-rate', type=int, default=DEFAULT_LOG_RATE,
+                        help="log lines per second in the paced scenario")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help="seconds the paced scenario runs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenario', choices=('all', 'flood', 'paced'), default='all')
+    parser.add_argument('--ui', choices=('auto', 'tk', 'headless'), default='auto',
+                        help="real Tk panel, widget-less stand-in, or tk when a display is available")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="measure Python heap peak per scenario (slower) instead of process RSS")
+    parser.add_argument('--output', metavar='FILE', help="write the results as JSON")
+    parser.add_argument('--baseline', metavar='FILE', help="JSON from an earlier --output to compare with")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative regression before failing (default 0.2)")
+    args = parser.parse_args(argv)
+
+    ui = args.ui
+    if ui == 'auto':
+        ui = 'tk' if display_available() else 'headless'
+
+    base = {'seed': args.seed, 'suite': 'Synthetic', 'device_ip': 'synthetic', 'port': '0',
+            'timeout': '30', 'lines_per_test': 2}
+    scenarios = []
+    if args.scenario in ('all', 'flood'):
+        scenarios.append(('flood', dict(base, synthetic_tests=args.tests, log_rate=0)))
+    if args.scenario in ('all', 'paced'):
+        tests = max(int(args.log_rate * args.duration / base['lines_per_test']), 1)
+        scenarios.append(('paced', dict(base, synthetic_tests=tests, log_rate=args.log_rate)))
+
+    results = []
+    for name, config in scenarios:
+        print(f"[INFO] {name}: {config['synthetic_tests']} tests, "
+              f"log rate {config['log_rate'] or 'unlimited'}, ui {ui}", flush=True)
+        results.append(run_scenario(name, config, ui, args.tracemalloc))
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'platform': sys.platform,
+                       'cpu_count': os.cpu_count(), 'scenarios': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f'[REGRESSION] {line}')
+        if regressions:
+            return 1
+        print('[INFO] No regressions against the baseline')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
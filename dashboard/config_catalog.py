@@ -0,0 +1,100 @@
+"""
+Config Catalog - Cached metadata index over a directory of saved configs
+Suite, device and save date of every config JSON are kept in a SQLite
+sidecar keyed by filename, mtime and size. A refresh only reparses files that
+changed since the last scan, so listing, searching and sorting thousands of
+configs does not open every file.
+"""
+
+import json
+import os
+import sqlite3
+
+
+CATALOG_FILENAME = ".catalog.db"
+
+
+class ConfigCatalog:
+    def __init__(self, config_dir, db_path=None):
+        """The sidecar lives in config_dir unless db_path is given (":memory:"
+        keeps the catalog for this process only)"""
+        self.config_dir = config_dir
+        self.conn = sqlite3.connect(db_path or os.path.join(config_dir, CATALOG_FILENAME))
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS configs ("
+                " filename TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,"
+                " suite TEXT, device_ip TEXT, saved_at TEXT, version TEXT)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS configs_by_date ON configs (saved_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS configs_by_suite ON configs (suite)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS configs_by_device ON configs (device_ip)")
+
+    def refresh(self):
+        """Bring the index up to date, reparsing only new or modified files"""
+        known = {name: (mtime, size) for name, mtime, size in
+                 self.conn.execute("SELECT filename, mtime_ns, size FROM configs")}
+
+        seen = set()
+        changed = []
+        with os.scandir(self.config_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                stat = entry.stat()
+                if known.get(entry.name) != (stat.st_mtime_ns, stat.st_size):
+                    changed.append(self._read_entry(entry.name, stat))
+
+        removed = [(name,) for name in known if name not in seen]
+        if changed or removed:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO configs VALUES (?, ?, ?, ?, ?, ?, ?)", changed)
+                self.conn.executemany("DELETE FROM configs WHERE filename = ?", removed)
+
+    def _read_entry(self, filename, stat):
+        """Parse one config file into a catalog row (unreadable files get empty metadata)"""
+        try:
+            with open(os.path.join(self.config_dir, filename), 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        config = data.get('config', data)
+        if not isinstance(config, dict):
+            config = {}
+        return (filename, stat.st_mtime_ns, stat.st_size,
+                config.get('suite'), config.get('device_ip'),
+                data.get('saved_at'), data.get('version'))
+
+    def update_file(self, filename):
+        """Re-index a single file right after it was written"""
+        path = os.path.join(self.config_dir, filename)
+        row = self._read_entry(filename, os.stat(path))
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO configs VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+
+    def remove_file(self, filename):
+        with self.conn:
+            self.conn.execute("DELETE FROM configs WHERE filename = ?", (filename,))
+
+    def search(self, suite=None, device_ip=None):
+        """Catalog entries matching the filters, most recently saved first"""
+        clauses, params = [], []
+        if suite is not None:
+            clauses.append("suite = ?")
+            params.append(suite)
+        if device_ip is not None:
+            clauses.append("device_ip = ?")
+            params.append(device_ip)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT filename, suite, device_ip, saved_at, version FROM configs {where}"
+            " ORDER BY saved_at DESC, filename DESC", params)
+        return [{'filename': filename, 'suite': suite, 'device_ip': device_ip,
+                 'saved_at': saved_at, 'version': version}
+                for filename, suite, device_ip, saved_at, version in rows]
+
+    def close(self):
+        self.conn.close()
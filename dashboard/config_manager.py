@@ -4,14 +4,23 @@ Configuration Manager - Handles the saving/loading of test configurations
 
 import json
 import os
+import sqlite3
+import sys
 from datetime import datetime
 from tkinter import messagebox, filedialog
+from config_catalog import ConfigCatalog
 
 
 class ConfigManager:
     def __init__(self):
         self.config_dir = "configs"
         self._ensure_config_directory()
+        try:
+            self.catalog = ConfigCatalog(self.config_dir)
+        except (OSError, sqlite3.Error):
+            # Read-only or network-share configs directory: the sidecar cannot
+            # be written, so index in memory, rescanning the directory once per session
+            self.catalog = ConfigCatalog(self.config_dir, db_path=':memory:')
     
     def _ensure_config_directory(self):
         """Create configs directory if it doesn't exist"""
@@ -44,6 +53,10 @@ class ConfigManager:
             with open(filename, 'w') as f:
                 json.dump(config_with_meta, f, indent=4)
             
+            # Keep the catalog current for files saved into the library
+            if os.path.dirname(os.path.abspath(filename)) == os.path.abspath(self.config_dir):
+                self._update_catalog(self.catalog.update_file, os.path.basename(filename))
+            
             messagebox.showinfo("Success", f"Configuration saved to:\n{os.path.basename(filename)}")
             return True
             
@@ -87,10 +100,15 @@ class ConfigManager:
     
     def get_saved_configs(self):
         """Get list of saved configuration files"""
+        return [entry['filename'] for entry in self.search_configs()]  # Most recent first
+    
+    def search_configs(self, suite=None, device_ip=None):
+        """Catalog entries (filename, suite, device_ip, saved_at, version) matching
+        the filters, most recently saved first"""
         try:
-            configs = [f for f in os.listdir(self.config_dir) if f.endswith('.json')]
-            return sorted(configs, reverse=True)  # Most recent first
-        except:
+            self.catalog.refresh()
+            return self.catalog.search(suite=suite, device_ip=device_ip)
+        except (OSError, sqlite3.Error):
             return []
     
     def delete_config(self, filename):
@@ -98,7 +116,19 @@ class ConfigManager:
         try:
             filepath = os.path.join(self.config_dir, filename)
             os.remove(filepath)
-            return True
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete configuration:\n{str(e)}")
-            return False
\ No newline at end of file
+            return False
+        self._update_catalog(self.catalog.remove_file, filename)
+        return True
+    
+    def _update_catalog(self, update, filename):
+        """Apply a catalog update after the file itself was written or deleted
+
+        The file operation already succeeded, so a catalog failure is only
+        logged; the next search rescans the directory and catches up.
+        """
+        try:
+            update(filename)
+        except (OSError, sqlite3.Error) as e:
+            print(f'[WARNING] Config catalog not updated for {filename}: {e}', file=sys.stderr)
\ No newline at end of file
@@ -5,18 +5,45 @@ Contains test suite selection, parameters, and run controls
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from run_queue import PRIORITIES, DEFAULT_PRIORITY
+from services import Services
 
 
+# Run modes (stored in configs by key) and their labels
+RUN_MODES = (
+    ('full', 'Full suite'),
+    ('failed', 'Rerun last failures'),
+    ('changed', 'Skip unchanged passes'),
+    ('failures_first', 'Failures first, then the rest'),
+)
+
 class ConfigPanel:
-    def __init__(self, parent, on_run_callback):
+    def __init__(self, parent, on_run_callback, on_suite_changed=None, on_stop_callback=None,
+                 on_selection_changed=None, on_rescan=None, services=None):
         self.parent = parent
+        # Shared Services; the config manager is created on the first save or load
+        self.services = services or Services()
         self.on_run_callback = on_run_callback
+        self.on_suite_changed = on_suite_changed
+        self.on_stop_callback = on_stop_callback
+        self.on_selection_changed = on_selection_changed
+        self.on_rescan = on_rescan
+        # Test path the suite and test lists were last filled for, and whether
+        # the listed tests are everything a run of that path would cover
+        self.listed_path = None
+        self.listed_complete = True
         
         # Store config values
         self.config = {
             'device_ip': tk.StringVar(value='192.168.1.100'),
             'port': tk.StringVar(value='8080'),
+            'bench_pool': tk.StringVar(value=''),
+            'agent': tk.StringVar(value=''),
             'timeout': tk.StringVar(value='30'),
+            'test_path': tk.StringVar(value=''),
+            'firmware': tk.StringVar(value=''),
+            'retries': tk.StringVar(value='0'),
+            'retry_budget': tk.StringVar(value='10'),
             'verbose': tk.BooleanVar(value=False),
             'stop_on_fail': tk.BooleanVar(value=False)
         }
@@ -31,19 +58,15 @@ class ConfigPanel:
                                    font=('Arial', 10, 'bold'), bg='white', padx=10, pady=10)
         suite_frame.pack(fill='x', padx=10, pady=10)
         
+        # Filled from the mock suites or the discovery index, see set_suites
         self.suite_combo = ttk.Combobox(suite_frame, state='readonly', width=40)
-        self.suite_combo['values'] = (
-            'CAN Bus Communication Tests',
-            'GPIO Functionality Tests', 
-            'Sensor Integration Tests',
-            'Power Management Tests'
-        )
-        self.suite_combo.current(0)
         self.suite_combo.pack(pady=5)
+        self.suite_combo.bind('<<ComboboxSelected>>', lambda e: self.notify_suite_changed())
         
-        # Info label
-        tk.Label(suite_frame, text="12 test cases | Est. duration: 5m 30s", 
-                font=('Arial', 8), bg='white', fg='gray').pack()
+        # Info label (filled in from run history, see set_suite_info)
+        self.suite_info_label = tk.Label(suite_frame, text="", 
+                                         font=('Arial', 8), bg='white', fg='gray')
+        self.suite_info_label.pack()
         
         # Test Parameters
         param_frame = tk.LabelFrame(self.parent, text="2. Test Parameters", 
@@ -58,39 +81,99 @@ class ConfigPanel:
         tk.Label(param_frame, text="Communication Port:", bg='white').grid(row=1, column=0, sticky='w', pady=5)
         tk.Entry(param_frame, textvariable=self.config['port'], width=30).grid(row=1, column=1, pady=5)
         
+        # Bench pool (blank uses the single device above)
+        tk.Label(param_frame, text="Bench Pool (ip:port, ...):", bg='white').grid(row=2, column=0, sticky='w', pady=5)
+        tk.Entry(param_frame, textvariable=self.config['bench_pool'], width=30).grid(row=2, column=1, pady=5)
+        
+        # Bench agent (blank runs the tests from this PC)
+        tk.Label(param_frame, text="Bench Agent (host:port):", bg='white').grid(row=3, column=0, sticky='w', pady=5)
+        tk.Entry(param_frame, textvariable=self.config['agent'], width=30).grid(row=3, column=1, pady=5)
+        
         # Timeout
-        tk.Label(param_frame, text="Timeout (seconds):", bg='white').grid(row=2, column=0, sticky='w', pady=5)
-        tk.Entry(param_frame, textvariable=self.config['timeout'], width=30).grid(row=2, column=1, pady=5)
+        tk.Label(param_frame, text="Timeout (seconds):", bg='white').grid(row=4, column=0, sticky='w', pady=5)
+        tk.Entry(param_frame, textvariable=self.config['timeout'], width=30).grid(row=4, column=1, pady=5)
+        
+        # Pytest path (blank runs the mock suites)
+        tk.Label(param_frame, text="Pytest Path (optional):", bg='white').grid(row=5, column=0, sticky='w', pady=5)
+        path_entry = tk.Entry(param_frame, textvariable=self.config['test_path'], width=30)
+        path_entry.grid(row=5, column=1, pady=5)
+        path_entry.bind('<Return>', lambda e: self.test_path_changed())
+        path_entry.bind('<FocusOut>', lambda e: self.test_path_changed())
+        
+        # Firmware image path or hash (part of the result cache key)
+        tk.Label(param_frame, text="Firmware Image/Hash:", bg='white').grid(row=6, column=0, sticky='w', pady=5)
+        tk.Entry(param_frame, textvariable=self.config['firmware'], width=30).grid(row=6, column=1, pady=5)
+        
+        # Run mode
+        tk.Label(param_frame, text="Run Mode:", bg='white').grid(row=7, column=0, sticky='w', pady=5)
+        self.run_mode_combo = ttk.Combobox(param_frame, state='readonly', width=27,
+                                           values=[label for _, label in RUN_MODES])
+        self.run_mode_combo.current(0)
+        self.run_mode_combo.grid(row=7, column=1, pady=5)
+        
+        # Immediate retries of failing tests (known-flaky tests get the full limit)
+        tk.Label(param_frame, text="Retries per Flaky Test:", bg='white').grid(row=8, column=0, sticky='w', pady=5)
+        tk.Entry(param_frame, textvariable=self.config['retries'], width=30).grid(row=8, column=1, pady=5)
+        tk.Label(param_frame, text="Retry Budget per Run:", bg='white').grid(row=9, column=0, sticky='w', pady=5)
+        tk.Entry(param_frame, textvariable=self.config['retry_budget'], width=30).grid(row=9, column=1, pady=5)
+        
+        # Queue priority (smoke runs jump ahead of queued regressions)
+        tk.Label(param_frame, text="Queue Priority:", bg='white').grid(row=10, column=0, sticky='w', pady=5)
+        self.priority_combo = ttk.Combobox(param_frame, state='readonly', width=27,
+                                           values=[label for _, label in PRIORITIES])
+        self.priority_combo.current([key for key, _ in PRIORITIES].index(DEFAULT_PRIORITY))
+        self.priority_combo.grid(row=10, column=1, pady=5)
         
         # Checkboxes
         tk.Checkbutton(param_frame, text="Enable Verbose Logging", 
-                      variable=self.config['verbose'], bg='white').grid(row=3, column=0, columnspan=2, sticky='w', pady=5)
+                      variable=self.config['verbose'], bg='white').grid(row=11, column=0, columnspan=2, sticky='w', pady=5)
         tk.Checkbutton(param_frame, text="Stop on First Failure", 
-                      variable=self.config['stop_on_fail'], bg='white').grid(row=4, column=0, columnspan=2, sticky='w', pady=5)
+                      variable=self.config['stop_on_fail'], bg='white').grid(row=12, column=0, columnspan=2, sticky='w', pady=5)
         
-        # Test Selection (placeholder for alpha)
+        # Test Selection (all tests of the suite are selected by default)
         test_frame = tk.LabelFrame(self.parent, text="3. Select Individual Tests", 
                                   font=('Arial', 10, 'bold'), bg='white', padx=10, pady=10)
         test_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
+        select_row = tk.Frame(test_frame, bg='white')
+        select_row.pack(fill='x', pady=(0, 5))
+        tk.Button(select_row, text="All", command=lambda: self.select_all(True)).pack(side='left')
+        tk.Button(select_row, text="None", command=lambda: self.select_all(False)).pack(side='left', padx=5)
+        tk.Button(select_row, text="⟳ Rescan", command=self.rescan).pack(side='right')
+        
         # Scrollable test list
-        test_list = tk.Text(test_frame, height=8, width=40, bg='#f9f9f9')
-        test_list.pack(fill='both', expand=True)
-        test_list.insert('1.0', '☑ test_can_init\n☑ test_can_send\n☑ test_can_receive\n☑ test_gpio_read\n☑ test_gpio_write\n☑ test_sensor_data\n☑ test_i2c_comm')
-        test_list.config(state='disabled')  # Read-only for alpha
+        list_frame = tk.Frame(test_frame, bg='white')
+        list_frame.pack(fill='both', expand=True)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side='right', fill='y')
+        self.test_list = tk.Listbox(list_frame, height=8, width=40, bg='#f9f9f9',
+                                    selectmode='multiple', exportselection=False,
+                                    yscrollcommand=scrollbar.set)
+        self.test_list.pack(side='left', fill='both', expand=True)
+        scrollbar.config(command=self.test_list.yview)
+        self.test_list.bind('<<ListboxSelect>>', lambda e: self.notify_selection_changed())
         
         # Action Buttons
         btn_frame = tk.Frame(self.parent, bg='white')
         btn_frame.pack(fill='x', padx=10, pady=10)
         
-        # RUN button (functional)
-        run_btn = tk.Button(btn_frame, text="▶ RUN TEST SUITE", 
+        # RUN and STOP buttons
+        run_row = tk.Frame(btn_frame, bg='white')
+        run_row.pack(fill='x', pady=(0, 10))
+        
+        run_btn = tk.Button(run_row, text="▶ RUN TEST SUITE", 
                            command=self.run_tests,
                            bg='#27ae60', fg='white', font=('Arial', 12, 'bold'), 
                            height=2, cursor='hand2')
-        run_btn.pack(fill='x', pady=(0, 10))
+        run_btn.pack(side='left', fill='x', expand=True)
         
-        # Save/Load buttons (non-functional in alpha)
+        stop_btn = tk.Button(run_row, text="■ STOP", 
+                            command=self.stop_tests,
+                            bg='#c0392b', fg='white', font=('Arial', 12, 'bold'), 
+                            height=2, cursor='hand2')
+        stop_btn.pack(side='right', padx=(5, 0))
+        
+        # Save/Load buttons (configs library, see ConfigManager)
         bottom_btns = tk.Frame(btn_frame, bg='white')
         bottom_btns.pack(fill='x')
         
@@ -99,28 +182,104 @@ class ConfigPanel:
         tk.Button(bottom_btns, text="Load Config",
                  command=self.load_saved_config).pack(side='right', fill='x', expand=True, padx=(5, 0))
     
-    def save_current_config(self):
-        """Save current configuration to file"""
-        from config_manager import ConfigManager
-        
-        config_data = {
+    def set_suite_info(self, test_count, est_seconds):
+        """Show the test count and estimated duration of the selected suite"""
+        if est_seconds is None:
+            estimate = "unknown"
+        else:
+            estimate = f"{int(est_seconds//60)}m {int(est_seconds%60)}s"
+        self.suite_info_label.config(text=f"{test_count} test cases | Est. duration: {estimate}")
+    
+    def set_suites(self, names):
+        """Fill the suite list, keeping the current suite if it is still there"""
+        current = self.suite_combo.get()
+        self.suite_combo['values'] = names
+        if current in names:
+            self.suite_combo.set(current)
+        elif names:
+            self.suite_combo.current(0)
+        self.listed_path = self.config['test_path'].get().strip()
+    
+    def set_tests(self, names, complete=True):
+        """Fill the test list; all tests start out selected
+        complete=False means the list covers only part of the test path."""
+        self.listed_complete = complete
+        self.test_list.delete(0, 'end')
+        if names:
+            self.test_list.insert('end', *names)
+            self.test_list.select_set(0, 'end')
+    
+    def select_tests(self, names):
+        """Select exactly the given tests (all of them when names is empty)"""
+        if not names:
+            self.select_all(True)
+            return
+        chosen = set(names)
+        self.test_list.select_clear(0, 'end')
+        for index, name in enumerate(self.test_list.get(0, 'end')):
+            if name in chosen:
+                self.test_list.select_set(index)
+        self.notify_selection_changed()
+    
+    def select_all(self, selected):
+        if selected:
+            self.test_list.select_set(0, 'end')
+        else:
+            self.test_list.select_clear(0, 'end')
+        self.notify_selection_changed()
+    
+    def selected_tests(self):
+        """Selected test names, or [] when the whole suite is selected (run it all)"""
+        selection = self.test_list.curselection()
+        if len(selection) == self.test_list.size() and self.listed_complete:
+            return []
+        return [self.test_list.get(index) for index in selection]
+    
+    def notify_suite_changed(self):
+        if self.on_suite_changed:
+            self.on_suite_changed(self.get_config_data())
+    
+    def notify_selection_changed(self):
+        if self.on_selection_changed:
+            self.on_selection_changed(self.get_config_data())
+    
+    def test_path_changed(self):
+        if self.config['test_path'].get().strip() != self.listed_path:
+            self.notify_suite_changed()
+    
+    def rescan(self):
+        """Collect the whole test path again, ignoring the cached index"""
+        if self.on_rescan:
+            self.on_rescan(self.get_config_data())
+    
+    def get_config_data(self):
+        """Collect the current configuration as a plain dict"""
+        return {
             'suite': self.suite_combo.get(),
             'device_ip': self.config['device_ip'].get(),
             'port': self.config['port'].get(),
+            'bench_pool': self.config['bench_pool'].get().strip(),
+            'agent': self.config['agent'].get().strip(),
             'timeout': self.config['timeout'].get(),
+            'test_path': self.config['test_path'].get().strip(),
+            'firmware': self.config['firmware'].get().strip(),
+            'run_mode': RUN_MODES[self.run_mode_combo.current()][0],
+            'retries': self.config['retries'].get().strip(),
+            'retry_budget': self.config['retry_budget'].get().strip(),
+            'priority': PRIORITIES[self.priority_combo.current()][0],
+            'tests': self.selected_tests(),
             'verbose': self.config['verbose'].get(),
             'stop_on_fail': self.config['stop_on_fail'].get()
         }
-        
-        manager = ConfigManager()
-        manager.save_config(config_data)
+    
+    def save_current_config(self):
+        """Save current configuration to file"""
+        config_data = self.get_config_data()
+        self.services.config_manager.save_config(config_data)
     
     def load_saved_config(self):
         """Load configuration from file"""
-        from config_manager import ConfigManager
-        
-        manager = ConfigManager()
-        config_data = manager.load_config()
+        config_data = self.services.config_manager.load_config()
         
         if config_data:
             # Update UI with loaded values
@@ -134,21 +293,49 @@ class ConfigPanel:
                 self.config['device_ip'].set(config_data['device_ip'])
             if 'port' in config_data:
                 self.config['port'].set(config_data['port'])
+            if 'bench_pool' in config_data:
+                self.config['bench_pool'].set(config_data['bench_pool'])
+            if 'agent' in config_data:
+                self.config['agent'].set(config_data['agent'])
             if 'timeout' in config_data:
                 self.config['timeout'].set(config_data['timeout'])
+            if 'test_path' in config_data:
+                self.config['test_path'].set(config_data['test_path'])
+            if 'firmware' in config_data:
+                self.config['firmware'].set(config_data['firmware'])
+            if 'run_mode' in config_data:
+                modes = [key for key, _ in RUN_MODES]
+                if config_data['run_mode'] in modes:
+                    self.run_mode_combo.current(modes.index(config_data['run_mode']))
+            if 'retries' in config_data:
+                self.config['retries'].set(config_data['retries'])
+            if 'retry_budget' in config_data:
+                self.config['retry_budget'].set(config_data['retry_budget'])
+            if 'priority' in config_data:
+                priorities = [key for key, _ in PRIORITIES]
+                if config_data['priority'] in priorities:
+                    self.priority_combo.current(priorities.index(config_data['priority']))
             if 'verbose' in config_data:
                 self.config['verbose'].set(config_data['verbose'])
             if 'stop_on_fail' in config_data:
                 self.config['stop_on_fail'].set(config_data['stop_on_fail'])
+            
+            self.notify_suite_changed()
+            # Suite and test names depend on the test path, known only after the refresh
+            if config_data.get('suite') in self.suite_combo['values'] and config_data['suite'] != self.suite_combo.get():
+                self.suite_combo.set(config_data['suite'])
+                self.notify_suite_changed()
+            self.select_tests(config_data.get('tests', []))
 
     def run_tests(self):
         """Trigger test execution"""
-        config_data = {
-            'suite': self.suite_combo.get(),
-            'device_ip': self.config['device_ip'].get(),
-            'port': self.config['port'].get(),
-            'timeout': self.config['timeout'].get(),
-            'verbose': self.config['verbose'].get(),
-            'stop_on_fail': self.config['stop_on_fail'].get()
-        }
-        self.on_run_callback(config_data)
\ No newline at end of file
+        if self.test_list.size() and not self.test_list.curselection():
+            messagebox.showwarning("No Tests Selected", "Select at least one test to run.")
+            return
+        config_data = self.get_config_data()
+        self.on_run_callback(config_data)
+    
+    def stop_tests(self):
+        """Cancel the running suite"""
+        if self.on_stop_callback:
+            self.on_stop_callback()
\ No newline at end of file
@@ -0,0 +1,279 @@
+"""
+Device Pool - Long-lived connections to HiL benches, shared by tests and runs
+One ConnectionPool per bench target keeps handshaken connections open between
+tests and between back-to-back runs, checks idle ones periodically, and
+reconnects with exponential backoff when a bench drops off.
+
+Tests in the pytest subprocess cannot share sockets with the dashboard, so each
+pool can also serve a local proxy port: a test connects to it over loopback
+(milliseconds) and is spliced onto a pooled bench connection. The connection
+returns to the pool when the test closes its end, so tests must finish their
+exchange before closing.
+"""
+
+import random
+import select
+import socket
+import threading
+import time
+
+
+# Seconds between health checks of idle connections
+HEALTH_INTERVAL = 10.0
+# Idle connections kept per target
+MAX_IDLE = 4
+# Reconnect backoff: first delay, cap, and the connect timeout
+BACKOFF_START = 0.1
+BACKOFF_MAX = 5.0
+CONNECT_TIMEOUT = 5.0
+
+SPLICE_CHUNK = 65536
+
+
+class TcpLink:
+    """A TCP connection to a bench"""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def is_alive(self):
+        """False once the bench has closed the connection or it has failed"""
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if not readable:
+                return True
+            # Readable while idle means either unread data or EOF
+            return self.sock.recv(1, socket.MSG_PEEK) != b''
+        except (OSError, ValueError):
+            return False
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def tcp_connect(target, timeout=CONNECT_TIMEOUT):
+    """Open a keep-alive TCP connection to (ip, port)"""
+    sock = socket.create_connection((target[0], int(target[1])), timeout=timeout)
+    sock.settimeout(None)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return TcpLink(sock)
+
+
+class PoolStats:
+    __slots__ = ('connects', 'reuses', 'failures', 'dropped')
+
+    def __init__(self):
+        self.connects = 0
+        self.reuses = 0
+        self.failures = 0
+        self.dropped = 0
+
+
+class ConnectionPool:
+    def __init__(self, target, connect=tcp_connect, max_idle=MAX_IDLE):
+        """connect(target) returns a link with is_alive() and close()"""
+        self.target = target
+        self.connect = connect
+        self.max_idle = max_idle
+        self.stats = PoolStats()
+
+        self._idle = []
+        self._lock = threading.Lock()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._proxy = None
+
+    def acquire(self, timeout=CONNECT_TIMEOUT):
+        """Return a healthy link, reusing an idle one when possible
+
+        Raises OSError if the bench cannot be reached before timeout.
+        """
+        while True:
+            with self._lock:
+                link = self._idle.pop() if self._idle else None
+            if link is None:
+                break
+            if link.is_alive():
+                self.stats.reuses += 1
+                return link
+            self.stats.dropped += 1
+            link.close()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            # Honor the backoff left by earlier failures, even from other callers
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                if time.monotonic() + wait > deadline:
+                    raise OSError(f"{self.target[0]}:{self.target[1]} unreachable, retrying in {wait:.1f}s")
+                time.sleep(wait)
+            try:
+                link = self.connect(self.target)
+            except OSError:
+                self.stats.failures += 1
+                self._backoff = min(max(self._backoff * 2, BACKOFF_START), BACKOFF_MAX)
+                # Jitter keeps benches restarting together from being hit in lockstep
+                self._retry_at = time.monotonic() + self._backoff * random.uniform(0.5, 1.0)
+                if self._retry_at > deadline:
+                    raise
+                continue
+            self._backoff = 0.0
+            self._retry_at = 0.0
+            self.stats.connects += 1
+            return link
+
+    def release(self, link, healthy=True):
+        """Hand a link back; broken links and links beyond max_idle are closed"""
+        if healthy and link.is_alive():
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(link)
+                    return
+        link.close()
+
+    def lease(self, timeout=CONNECT_TIMEOUT):
+        """Context manager: with pool.lease() as link: ..."""
+        return _Lease(self, timeout)
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def check_idle(self):
+        """Drop idle links the bench has closed (health check)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        alive = []
+        for link in idle:
+            if link.is_alive():
+                alive.append(link)
+            else:
+                self.stats.dropped += 1
+                link.close()
+        with self._lock:
+            self._idle.extend(alive)
+
+    def proxy_address(self):
+        """Start (once) and return the "host:port" of this pool's local proxy"""
+        with self._lock:
+            if self._proxy is None:
+                self._proxy = PoolProxy(self)
+            return self._proxy.address
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            proxy, self._proxy = self._proxy, None
+        for link in idle:
+            link.close()
+        if proxy is not None:
+            proxy.close()
+
+
+class _Lease:
+    def __init__(self, pool, timeout):
+        self.pool = pool
+        self.timeout = timeout
+        self.link = None
+
+    def __enter__(self):
+        self.link = self.pool.acquire(self.timeout)
+        return self.link
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failure while using the link may have left it in an unknown state
+        self.pool.release(self.link, healthy=exc_type is None)
+        return False
+
+
+class PoolProxy:
+    """Loopback listener that splices each accepted client onto a pooled link"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(16)
+        host, port = self.server.getsockname()
+        self.address = f'{host}:{port}'
+        threading.Thread(target=self._accept_forever, daemon=True).start()
+
+    def _accept_forever(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        try:
+            link = self.pool.acquire()
+        except OSError:
+            client.close()
+            return
+        healthy = self._splice(client, link.sock)
+        client.close()
+        self.pool.release(link, healthy)
+
+    def _splice(self, client, upstream):
+        """Copy bytes both ways until the test closes its end
+
+        Returns True if the bench connection is still usable afterwards.
+        """
+        while True:
+            try:
+                readable, _, _ = select.select([client, upstream], [], [])
+                if client in readable:
+                    data = client.recv(SPLICE_CHUNK)
+                    if not data:
+                        return True
+                    upstream.sendall(data)
+                if upstream in readable:
+                    data = upstream.recv(SPLICE_CHUNK)
+                    if not data:
+                        return False
+                    client.sendall(data)
+            except OSError:
+                return False
+
+    def close(self):
+        self.server.close()
+
+
+class DevicePools:
+    """Pools for every bench the dashboard talks to, plus their health checks"""
+
+    def __init__(self, health_interval=HEALTH_INTERVAL):
+        self.health_interval = health_interval
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._check_forever, daemon=True).start()
+
+    def get(self, target, connect=tcp_connect):
+        """The pool for a target, created on first use"""
+        key = (str(target[0]), str(target[1]), connect)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = ConnectionPool((key[0], key[1]), connect)
+            return pool
+
+    def _check_forever(self):
+        while not self._stop.wait(self.health_interval):
+            with self._lock:
+                pools = list(self._pools.values())
+            for pool in pools:
+                pool.check_idle()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
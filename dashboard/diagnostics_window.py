@@ -0,0 +1,117 @@
+"""
+Diagnostics Window - Live view of the dashboard's own profiling data
+Opened from the header. Shows per-hot-path timings (add_log, add_test_result,
+update_stats, the UI flush, event-loop lag, ...) and the queue depth and
+throughput of every EventBus sink, refreshed once a second. Profiling can be
+switched on and off here and the collected data exported as JSON.
+"""
+
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk, messagebox, filedialog
+
+
+REFRESH_MS = 1000
+
+
+def format_ms(value):
+    return '-' if value is None else f"{value:.3f}"
+
+
+class DiagnosticsWindow:
+    def __init__(self, parent, profiler):
+        self.profiler = profiler
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Diagnostics")
+        self.window.geometry("760x520")
+        self.window.configure(bg='white')
+
+        self.build_widgets()
+        self.refresh()
+
+    def build_widgets(self):
+        """Build the control bar and the hot path and sink tables"""
+        bar = tk.Frame(self.window, bg='white')
+        bar.pack(fill='x', padx=10, pady=10)
+
+        self.enabled_var = tk.BooleanVar(value=self.profiler.enabled)
+        tk.Checkbutton(bar, text="Profiling enabled", variable=self.enabled_var, bg='white',
+                       command=self.toggle).pack(side='left')
+        tk.Button(bar, text="Export...", command=self.export).pack(side='right')
+        tk.Button(bar, text="Reset", command=self.reset).pack(side='right', padx=5)
+
+        paths_frame = tk.LabelFrame(self.window, text="Hot Paths (ms)", font=('Arial', 10, 'bold'),
+                                    bg='white', padx=5, pady=5)
+        paths_frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        columns = ('calls', 'mean', 'p50', 'p95', 'max', 'total')
+        self.paths_tree = ttk.Treeview(paths_frame, columns=columns, height=9)
+        self.paths_tree.heading('#0', text='Path')
+        self.paths_tree.column('#0', width=160)
+        for column in columns:
+            self.paths_tree.heading(column, text=column.capitalize())
+            self.paths_tree.column(column, width=85, anchor='e')
+        self.paths_tree.pack(fill='both', expand=True)
+
+        sinks_frame = tk.LabelFrame(self.window, text="Event Sinks", font=('Arial', 10, 'bold'),
+                                    bg='white', padx=5, pady=5)
+        sinks_frame.pack(fill='x', padx=10, pady=(0, 10))
+        columns = ('queued', 'max_queued', 'rate', 'delivered', 'dropped')
+        headings = ('Queued', 'Max Queued', 'Events/s', 'Delivered', 'Dropped')
+        self.sinks_tree = ttk.Treeview(sinks_frame, columns=columns, height=5)
+        self.sinks_tree.heading('#0', text='Sink')
+        self.sinks_tree.column('#0', width=160)
+        for column, heading in zip(columns, headings):
+            self.sinks_tree.heading(column, text=heading)
+            self.sinks_tree.column(column, width=100, anchor='e')
+        self.sinks_tree.pack(fill='x')
+
+        self.status_label = tk.Label(self.window, text="", font=('Arial', 8), bg='white', fg='gray')
+        self.status_label.pack(fill='x', padx=10, pady=(0, 5))
+
+    def refresh(self):
+        """Redraw both tables from a profiler snapshot and reschedule"""
+        if not self.window.winfo_exists():
+            return
+        snapshot = self.profiler.snapshot()
+
+        self.paths_tree.delete(*self.paths_tree.get_children())
+        for name, stats in snapshot['hot_paths'].items():
+            self.paths_tree.insert('', 'end', text=name, values=(
+                stats['count'], format_ms(stats['mean_ms']), format_ms(stats['p50_ms']),
+                format_ms(stats['p95_ms']), format_ms(stats['max_ms']), format_ms(stats['total_ms'])))
+
+        self.sinks_tree.delete(*self.sinks_tree.get_children())
+        for name, stats in snapshot['sinks'].items():
+            rate = '-' if stats['per_second'] is None else f"{stats['per_second']:.1f}"
+            self.sinks_tree.insert('', 'end', text=name, values=(
+                stats['queued'], stats['max_queued'], rate, stats['delivered'], stats['dropped']))
+
+        if self.profiler.enabled:
+            self.status_label.config(text=f"Collecting since {self.profiler.started_at:%H:%M:%S}")
+        else:
+            self.status_label.config(text="Profiling is off (HIL_PROFILE=1 enables it at startup)")
+        self.window.after(REFRESH_MS, self.refresh)
+
+    def toggle(self):
+        self.profiler.enable(self.enabled_var.get())
+
+    def reset(self):
+        """Start collecting from scratch (the tables clear on the next refresh)"""
+        self.profiler.reset()
+
+    def export(self):
+        """Write the collected data to a JSON file"""
+        filename = filedialog.asksaveasfilename(
+            parent=self.window,
+            initialfile=f"diagnostics_{datetime.now():%Y%m%d_%H%M%S}.json",
+            title="Export Diagnostics",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not filename:  # User cancelled
+            return
+        try:
+            self.profiler.export(filename)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export diagnostics:\n{str(e)}", parent=self.window)
@@ -0,0 +1,188 @@
+"""
+Discovery Index - Cached pytest collection, kept up to date file by file
+Node ids collected from a test path are stored in SQLite together with the
+mtime, size and sha256 of every test file. A refresh stats the files and only
+re-collects the ones whose contents changed, so the dashboard can list a large
+suite instantly and catch up in the background. A change to a conftest.py or
+a pytest config file re-collects the whole path.
+"""
+
+import fnmatch
+import os
+import sqlite3
+import threading
+from result_cache import file_digest
+
+
+# Suite entry for a whole pytest path (the other entries are its test files)
+ALL_TESTS = 'All tests'
+# pytest's default python_files patterns
+TEST_FILE_PATTERNS = ('test_*.py', '*_test.py')
+# Files that can change what every test file collects
+GLOBAL_FILES = ('conftest.py', 'pytest.ini', 'pyproject.toml', 'setup.cfg', 'tox.ini')
+# pytest's default norecursedirs
+SKIP_DIRS = ('*.egg', '.*', '_darcs', 'build', 'CVS', 'dist', 'node_modules', 'venv', '{arch}', '__pycache__')
+# Beyond this many changed files the whole path is collected in one go
+MAX_COLLECT_PATHS = 200
+
+
+class CollectionError(Exception):
+    """pytest could not collect the test files (syntax or import error, bad usage)
+
+    When only some files failed, failed lists them (paths relative to the
+    collection root) and node_ids holds the tests of the files that did
+    collect; node_ids is None when nothing could be collected.
+    """
+
+    def __init__(self, message, node_ids=None, failed=()):
+        super().__init__(message)
+        self.node_ids = node_ids
+        self.failed = list(failed)
+
+
+def collection_root(test_path):
+    """Directory node ids are relative to (the pytest rootdir the runner uses)"""
+    path = os.path.abspath(test_path)
+    return path if os.path.isdir(path) else os.path.dirname(path)
+
+
+def scan_files(test_path):
+    """{path relative to the test root: os.stat_result} for test and global files"""
+    path = os.path.abspath(test_path)
+    if os.path.isfile(path):
+        return {os.path.basename(path): os.stat(path)}
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = [name for name in dirnames
+                       if not any(fnmatch.fnmatch(name, pattern) for pattern in SKIP_DIRS)]
+        for name in filenames:
+            if name in GLOBAL_FILES or any(fnmatch.fnmatch(name, pattern) for pattern in TEST_FILE_PATTERNS):
+                full = os.path.join(dirpath, name)
+                files[os.path.relpath(full, path).replace(os.sep, '/')] = os.stat(full)
+    return files
+
+
+def is_global(path):
+    return path.rsplit('/', 1)[-1] in GLOBAL_FILES
+
+
+class DiscoveryIndex:
+    def __init__(self, db_path="history.db"):
+        self.db_path = db_path
+        # Refreshed from worker threads, read from the UI thread
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS test_files ("
+                " test_path TEXT NOT NULL, path TEXT NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " size INTEGER NOT NULL, digest TEXT NOT NULL, PRIMARY KEY (test_path, path))")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS test_nodes ("
+                " test_path TEXT NOT NULL, path TEXT NOT NULL, position INTEGER NOT NULL,"
+                " nodeid TEXT NOT NULL)")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS test_nodes_by_file ON test_nodes (test_path, path, position)")
+
+    def refresh(self, test_path, collect, full=False):
+        """Bring the index for test_path up to date; returns the number of files collected
+
+        collect(paths) runs pytest --collect-only and returns node ids; paths=None
+        collects the whole test path. full=True re-collects everything. When
+        collect raises CollectionError for some files, the others are indexed
+        and the broken ones are left unrecorded, so they are collected again
+        on the next refresh; the error is then re-raised. If nothing could be
+        collected the index is left as it was.
+        """
+        key = os.path.abspath(test_path)
+        with self._refresh_lock:
+            files = scan_files(key)
+            with self._lock:
+                known = {path: (mtime, size, digest) for path, mtime, size, digest in self.conn.execute(
+                    "SELECT path, mtime_ns, size, digest FROM test_files WHERE test_path = ?", (key,))}
+
+            # Cheap stat comparison first; only files that look modified are hashed
+            updated = {}
+            changed = []
+            for path, stat in files.items():
+                entry = known.get(path)
+                if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size) and not full:
+                    continue
+                digest = file_digest(os.path.join(collection_root(key), path))
+                updated[path] = (stat.st_mtime_ns, stat.st_size, digest)
+                if full or entry is None or entry[2] != digest:
+                    changed.append(path)
+            removed = [path for path in known if path not in files]
+
+            collect_all = full or not known or any(is_global(path) for path in changed + removed)
+            targets = [path for path in changed if not is_global(path)]
+            if not collect_all and len(targets) > MAX_COLLECT_PATHS:
+                collect_all = True
+            if collect_all:
+                targets = [path for path in files if not is_global(path)]
+
+            node_ids = []
+            error = None
+            try:
+                if collect_all:
+                    node_ids = collect(None)
+                elif targets:
+                    node_ids = collect([os.path.join(collection_root(key), path) for path in targets])
+            except CollectionError as e:
+                # Failures outside the test files (a directory, conftest.py) cannot be narrowed down
+                if e.node_ids is None or not set(e.failed) <= set(files):
+                    raise
+                node_ids, error = e.node_ids, e
+            failed = set(error.failed) if error is not None else set()
+
+            by_file = {path: [] for path in targets}
+            for node_id in node_ids:
+                by_file.setdefault(node_id.split('::', 1)[0], []).append(node_id)
+
+            with self._lock, self.conn:
+                if collect_all:
+                    self.conn.execute("DELETE FROM test_nodes WHERE test_path = ?", (key,))
+                else:
+                    self.conn.executemany("DELETE FROM test_nodes WHERE test_path = ? AND path = ?",
+                                          ((key, path) for path in list(by_file) + removed))
+                self.conn.executemany(
+                    "INSERT INTO test_nodes (test_path, path, position, nodeid) VALUES (?, ?, ?, ?)",
+                    ((key, path, position, node_id)
+                     for path, ids in by_file.items() for position, node_id in enumerate(ids)))
+                # Broken files lose their record too, so they count as changed next time
+                self.conn.executemany("DELETE FROM test_files WHERE test_path = ? AND path = ?",
+                                      ((key, path) for path in removed + sorted(failed)))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO test_files VALUES (?, ?, ?, ?, ?)",
+                    ((key, path, *entry) for path, entry in updated.items() if path not in failed))
+            if error is not None:
+                raise error
+            return len(targets)
+
+    def is_indexed(self, test_path):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM test_files WHERE test_path = ? LIMIT 1",
+                                     (os.path.abspath(test_path),)).fetchone() is not None
+
+    def modules(self, test_path):
+        """Test files with at least one collected test, in path order"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT path FROM test_nodes WHERE test_path = ? ORDER BY path",
+                (os.path.abspath(test_path),))
+            return [path for path, in rows]
+
+    def tests(self, test_path, module=None):
+        """Collected node ids (of one test file if given), in collection order per file"""
+        query = "SELECT nodeid FROM test_nodes WHERE test_path = ?"
+        params = [os.path.abspath(test_path)]
+        if module is not None:
+            query += " AND path = ?"
+            params.append(module)
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY path, position", params)
+            return [node_id for node_id, in rows]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,199 @@
+"""
+Event Bus - Typed run events fanned out to independent sinks
+Runners publish events and never touch widgets. Every subscribed sink gets
+its own bounded queue and backpressure policy, so a slow sink (the GUI, a
+file logger, a JUnit writer) never slows test execution or the other sinks.
+
+Sinks are objects with handle(event). A subscription is either threaded (a
+daemon thread delivers events as they arrive) or pulled, where the owner
+calls drain() itself, e.g. from the Tk frame tick. A threaded sink may also
+define handle_batch(events) to take up to DRAIN_CHUNK queued events at once.
+
+Only log lines are ever dropped. Results and control events are always
+queued: there is one per test at most, so the suite size bounds them.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from profiler import profiled
+
+
+# Run events
+RunStarted = namedtuple('RunStarted', 'config')
+LogLine = namedtuple('LogLine', 'message')
+TestResult = namedtuple('TestResult', 'name status duration message attempts', defaults=('', 1))
+StatusChanged = namedtuple('StatusChanged', 'text')
+RunFinished = namedtuple('RunFinished', 'config results')
+
+# Rare events that steer a sink; never held back or dropped
+CONTROL_EVENTS = (RunStarted, StatusChanged, RunFinished)
+
+# Backpressure policies, applied when a sink's queue is full
+BLOCK = 'block'              # publisher waits for the sink (lossless)
+DROP_NEWEST = 'drop_newest'  # an incoming log line is discarded
+DROP_OLDEST = 'drop_oldest'  # the oldest queued log line is discarded
+
+DEFAULT_MAXSIZE = 10000
+# Events taken off a queue per lock acquisition by drain() and handle_batch delivery
+DRAIN_CHUNK = 256
+
+# The dashboard's pulled subscription (ResultsPanel, benchmark.HeadlessPanel):
+# frame interval, i.e. how often the Tk thread drains events and flushes the log
+FRAME_MS = 50
+# Share of each frame spent applying queued events, so a flood cannot starve the UI
+EVENT_BUDGET_MS = 25
+# Queue size of the dashboard's subscriptions (past it, the log spill sink makes runners wait)
+EVENT_QUEUE_SIZE = 100000
+
+
+class Subscription:
+    def __init__(self, sink, maxsize=DEFAULT_MAXSIZE, policy=DROP_OLDEST, name=None, events=None):
+        self.sink = sink
+        self.maxsize = maxsize
+        self.policy = policy
+        # Event types the sink wants (None: all); the rest are never queued
+        self.events = events
+        self.name = name or type(sink).__name__
+        self.dropped = 0
+        self.delivered = 0
+
+        # Log lines and all other events queue apart, so the oldest log line
+        # can be dropped in O(1); sequence numbers restore the order
+        self._logs = deque()
+        self._others = deque()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def __len__(self):
+        return len(self._logs) + len(self._others)
+
+    def offer(self, event):
+        """Queue an event according to the backpressure policy (publisher side)"""
+        if self.events is not None and not isinstance(event, self.events):
+            return
+        with self._cond:
+            if len(self) >= self.maxsize and not isinstance(event, CONTROL_EVENTS):
+                if self.policy == BLOCK:
+                    while len(self) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                elif isinstance(event, LogLine):
+                    self.dropped += 1
+                    if self.policy == DROP_NEWEST or not self._logs:
+                        return
+                    self._logs.popleft()
+            self._seq += 1
+            if isinstance(event, LogLine):
+                self._logs.append((self._seq, event))
+            else:
+                self._others.append((self._seq, event))
+            self._cond.notify_all()
+
+    def _pop(self):
+        """Remove and return the oldest queued event (lock held, queue not empty)"""
+        if self._logs and (not self._others or self._logs[0][0] < self._others[0][0]):
+            return self._logs.popleft()[1]
+        return self._others.popleft()[1]
+
+    def drain(self, max_items=None, deadline=None):
+        """Deliver queued events to the sink on the calling thread; returns the count
+
+        Stops after max_items events, or once time.perf_counter() passes
+        deadline. Events are taken DRAIN_CHUNK at a time under one lock.
+        """
+        delivered = 0
+        while max_items is None or delivered < max_items:
+            with self._cond:
+                if not len(self):
+                    break
+                count = min(len(self), DRAIN_CHUNK)
+                if max_items is not None:
+                    count = min(count, max_items - delivered)
+                chunk = [self._pop() for _ in range(count)]
+                self._cond.notify_all()
+            for event in chunk:
+                self.sink.handle(event)
+            delivered += count
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        self.delivered += delivered
+        return delivered
+
+    def start_thread(self):
+        """Deliver events from a dedicated daemon thread"""
+        self._thread = threading.Thread(target=self._deliver_forever, name=f'sink-{self.name}', daemon=True)
+        self._thread.start()
+
+    def _deliver_forever(self):
+        while True:
+            with self._cond:
+                while not len(self) and not self._closed:
+                    self._cond.wait()
+                if not len(self):
+                    return
+                handle_batch = getattr(self.sink, 'handle_batch', None)
+                count = min(len(self), DRAIN_CHUNK) if handle_batch is not None else 1
+                events = [self._pop() for _ in range(count)]
+                self._cond.notify_all()
+            if handle_batch is not None:
+                handle_batch(events)
+            else:
+                self.sink.handle(events[0])
+            self.delivered += count
+
+    def close(self, timeout=None):
+        """Stop accepting events; a delivery thread finishes the backlog first"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+class EventBus:
+    def __init__(self):
+        self._subscriptions = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, sink, maxsize=DEFAULT_MAXSIZE, policy=DROP_OLDEST, threaded=True, name=None,
+                  events=None):
+        """Attach a sink; threaded sinks get a delivery thread, others must drain()
+
+        events is a tuple of event types to deliver; others are skipped at
+        publish time and never take up queue space.
+        """
+        subscription = Subscription(sink, maxsize, policy, name, events)
+        if threaded:
+            subscription.start_thread()
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        subscription.close()
+
+    @property
+    def subscriptions(self):
+        return list(self._subscriptions)
+
+    @profiled('bus_publish')
+    def publish(self, event):
+        """Hand an event to every sink (safe from any thread)"""
+        # Copy-on-write list, so no lock is held while offering
+        for subscription in self._subscriptions:
+            subscription.offer(event)
+
+    # Shorthands used by the runners
+
+    def log(self, message):
+        self.publish(LogLine(message))
+
+    def result(self, name, status, duration, message='', attempts=1):
+        self.publish(TestResult(name, status, duration, message, attempts))
+
+    def status(self, text):
+        self.publish(StatusChanged(text))
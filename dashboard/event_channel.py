@@ -0,0 +1,45 @@
+"""
+Event Channel - Receives structured events from hil_pytest_plugin
+The dashboard listens on a local socket, the plugin inside the pytest
+subprocess connects to it and writes newline-delimited JSON. Events are
+decoded incrementally as lines arrive; the human-readable log is never parsed.
+"""
+
+import json
+import socket
+
+
+# How often a pending accept re-checks whether pytest already exited
+ACCEPT_POLL_SECONDS = 0.2
+
+
+class EventChannel:
+    def __init__(self):
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.server.settimeout(ACCEPT_POLL_SECONDS)
+        self.address = f"127.0.0.1:{self.server.getsockname()[1]}"
+
+    def events(self, process):
+        """Yield decoded events until pytest closes the connection
+
+        Returns early without events if the process exits before connecting
+        (e.g. a usage error before plugins are configured).
+        """
+        conn = None
+        while conn is None:
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                if process.poll() is not None:
+                    return
+        conn.settimeout(None)
+
+        with conn, conn.makefile('r', encoding='utf-8') as stream:
+            for line in stream:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def close(self):
+        self.server.close()
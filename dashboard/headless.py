@@ -0,0 +1,133 @@
+"""
+Headless Runner - Batch mode for CI and display-less bench controllers
+Runs a saved config (the JSON written by ConfigManager.save_config) with the
+same runners the dashboard uses. Instead of the results panel, EventBus sinks
+stream the log to stdout and optionally write a JUnit report and metrics.
+Never imports tkinter.
+
+Usage:
+    python headless.py CONFIG [--junit FILE] [--metrics FILE] [--profile FILE] [--no-history]
+    python main.py --headless CONFIG [--junit FILE] [--metrics FILE] [--profile FILE] [--no-history]
+
+Exit code: 0 all tests passed, 1 some tests failed, 2 the run could not start,
+broke off with an error (e.g. a pytest collection error) or was interrupted.
+"""
+
+import argparse
+import json
+import sys
+from event_bus import EventBus, BLOCK
+from sinks import StreamSink, JUnitSink, MetricsSink
+
+
+# ConfigPanel defaults, for configs saved before a field existed
+DEFAULT_CONFIG = {
+    'suite': 'CAN Bus Communication Tests',
+    'device_ip': '192.168.1.100',
+    'port': '8080',
+    'bench_pool': '',
+    'agent': '',
+    'timeout': '30',
+    'test_path': '',
+    'firmware': '',
+    'run_mode': 'full',
+    'retries': '0',
+    'retry_budget': '10',
+    'tests': [],
+    'verbose': False,
+    'stop_on_fail': False,
+}
+
+
+def load_config_file(path):
+    """Read a saved config, accepting files with or without the metadata wrapper"""
+    with open(path, 'r') as f:
+        config_with_meta = json.load(f)
+    config_data = config_with_meta.get('config', config_with_meta)
+    return dict(DEFAULT_CONFIG, **config_data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a saved HiL test config without the dashboard window")
+    parser.add_argument('config', help="config JSON saved by the dashboard")
+    parser.add_argument('--junit', metavar='FILE', help="write a JUnit XML report")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="write run metrics in the Prometheus text format")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="profile the dashboard's own hot paths and write the data as JSON")
+    parser.add_argument('--no-history', action='store_true',
+                        help="do not read or update history.db (history, cache and run archive)")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config_file(args.config)
+    except (OSError, ValueError) as e:
+        print(f'[ERROR] Failed to load configuration: {e}', file=sys.stderr)
+        return 2
+
+    bus = EventBus()
+    # CI output must be complete, so the stdout sink never drops
+    subscriptions = [bus.subscribe(StreamSink(sys.stdout), policy=BLOCK, name='stdout')]
+    if args.junit:
+        # Results are never dropped and log lines are not queued, so no need to block
+        subscriptions.append(bus.subscribe(JUnitSink(path=args.junit), events=JUnitSink.EVENTS, name='junit'))
+    if args.metrics:
+        subscriptions.append(bus.subscribe(MetricsSink(args.metrics), name='metrics'))
+    if args.profile:
+        from profiler import PROFILER
+        PROFILER.watch(bus)
+        PROFILER.enable()
+
+    history = cache = index = None
+    if not args.no_history:
+        from history_store import HistoryStore, suite_key
+        from result_cache import ResultCache
+        from run_archive import RunArchive
+        from discovery import DiscoveryIndex
+        history = HistoryStore()
+        cache = ResultCache()
+        archive = RunArchive()
+        index = DiscoveryIndex()
+
+    from device_pool import DevicePools
+    from scheduler import create_runner
+    pools = DevicePools()
+    runner = create_runner(config, bus, history=history, cache=cache, pools=pools, index=index)
+    runner.run_tests(config)
+    try:
+        runner.worker.join()
+    except KeyboardInterrupt:
+        # Ctrl+C stops the run like the dashboard's Stop button
+        runner.stop("from the terminal")
+        runner.worker.join()
+    pools.close()
+
+    # Recorded here, on the thread that opened the stores
+    if history is not None:
+        history.save_run(suite_key(config), runner.results)
+        cache.record(suite_key(config), config, runner.results)
+        archive.save_run(suite_key(config), runner.results)
+
+    if args.profile:
+        PROFILER.sample()
+        PROFILER.export(args.profile)
+
+    # Let every sink finish its backlog
+    for subscription in subscriptions:
+        subscription.close()
+
+    return exit_code(runner)
+
+
+def exit_code(runner):
+    """Exit code for a finished run, see the module docstring"""
+    if runner.error:
+        return 2
+    if runner.handle.cancelled and not (runner.stop_on_fail and runner.stats.failures):
+        # Stopped before the suite completed (Ctrl+C): not a pass
+        return 2
+    return 1 if runner.stats.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+HiL pytest plugin - Streams structured per-test events to the dashboard
+Loaded into the pytest subprocess with `-p hil_pytest_plugin`. When
+HIL_EVENTS_ADDR ("host:port") is set, every event is written as one line of
+JSON to that local socket:
+
+    {"event": "collect_error", "nodeid": ...}
+    {"event": "collected", "nodeids": [...]}
+    {"event": "start", "nodeid": ...}
+    {"event": "retry", "nodeid": ..., "attempt": ...}
+    {"event": "outcome", "nodeid": ..., "status": ..., "duration": ..., "longrepr": ...,
+     "attempts": ...}
+    {"event": "session_finish", "exitstatus": ...}
+
+status is one of PASSED, FAILED, SKIPPED, ERROR and duration covers setup,
+call and teardown of the final attempt. HIL_NODEIDS_FILE optionally names a
+file with one node id per line; only those tests run, in that order.
+HIL_RETRY_FILE optionally names a JSON file with the shard's RetryPolicy
+({"retries": n, "budget": n, "flaky": {nodeid: score}}); a failing test is
+then rerun on the spot while the policy allows, and only its last attempt is
+reported.
+
+Tests get a connected socket to their bench from the `hil_device` fixture.
+When the dashboard pools bench connections it sets HIL_DEVICE_PROXY and the
+fixture connects there (loopback) instead of handshaking with the bench.
+"""
+
+import json
+import os
+import socket
+import pytest
+
+# Retries drive pytest's runner directly through private APIs:
+# _pytest.runner.runtestprotocol and Item._initrequest(). Neither is covered
+# by pytest's deprecation policy, so retries are only enabled on the pytest
+# versions they were checked against (keep in step with requirements.txt).
+PYTEST_RETRY_VERSIONS = ((8, 0), (10, 0))
+try:
+    from _pytest.runner import runtestprotocol
+except ImportError:
+    runtestprotocol = None
+
+
+def check_retry_support():
+    """Raise pytest.UsageError unless this pytest supports on-the-spot retries"""
+    version = tuple(int(part) for part in pytest.__version__.split('.')[:2] if part.isdigit())
+    low, high = PYTEST_RETRY_VERSIONS
+    if (runtestprotocol is None or not hasattr(pytest.Function, '_initrequest')
+            or not low <= version < high):
+        raise pytest.UsageError(
+            f"hil_pytest_plugin: retries need pytest >={low[0]}.{low[1]},<{high[0]}.{high[1]} "
+            f"(found {pytest.__version__}); set retries to 0 or install a supported pytest")
+
+
+class EventWriter:
+    def __init__(self, address):
+        host, _, port = address.rpartition(':')
+        self.sock = socket.create_connection((host, int(port)))
+        # Outcome state per running test, folded over setup/call/teardown
+        self.pending = {}
+        self.retry = None
+        path = os.environ.get('HIL_RETRY_FILE')
+        if path:
+            check_retry_support()
+            # The dashboard's own policy class, so both sides apply the same limits
+            from retry_policy import RetryPolicy
+            with open(path, encoding='utf-8') as f:
+                self.retry = RetryPolicy(**json.load(f))
+
+    def send(self, **event):
+        # Unbuffered, so an interrupt (Stop) can never cause a line to be resent
+        self.sock.sendall((json.dumps(event) + '\n').encode('utf-8'))
+
+    def close(self):
+        self.sock.close()
+
+    # pytest hooks
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        path = os.environ.get('HIL_NODEIDS_FILE')
+        if not path:
+            return
+        with open(path, encoding='utf-8') as f:
+            order = {line.strip(): i for i, line in enumerate(f) if line.strip()}
+        selected = [item for item in items if item.nodeid in order]
+        deselected = [item for item in items if item.nodeid not in order]
+        selected.sort(key=lambda item: order[item.nodeid])
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            # nodeid of a test file is its path relative to the rootdir
+            self.send(event='collect_error', nodeid=report.nodeid)
+
+    def pytest_collection_finish(self, session):
+        self.send(event='collected', nodeids=[item.nodeid for item in session.items])
+
+    def pytest_runtest_protocol(self, item, nextitem):
+        if self.retry is None:
+            return None
+
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        attempt = 1
+        while True:
+            # Reports are held back so that only the last attempt is logged (private API)
+            reports = runtestprotocol(item, nextitem=nextitem, log=False)
+            if not any(report.failed for report in reports) or not self.retry.allow(item.nodeid, attempt):
+                break
+            self.send(event='retry', nodeid=item.nodeid, attempt=attempt)
+            attempt += 1
+            # Fresh function-scoped fixtures for the next attempt (private API, see above)
+            item._initrequest()
+
+        self.pending[item.nodeid]['attempts'] = attempt
+        for report in reports:
+            item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self.pending[nodeid] = {'status': 'PASSED', 'duration': 0.0, 'longrepr': '', 'attempts': 1}
+        self.send(event='start', nodeid=nodeid)
+
+    def pytest_runtest_logreport(self, report):
+        state = self.pending.setdefault(report.nodeid, {'status': 'PASSED', 'duration': 0.0,
+                                                        'longrepr': '', 'attempts': 1})
+        state['duration'] += report.duration
+
+        if report.when == 'call':
+            if hasattr(report, 'wasxfail'):
+                # Expected failures count as skipped, unexpected passes as passed
+                state['status'] = 'SKIPPED' if report.skipped else 'PASSED'
+            elif report.failed:
+                state['status'] = 'FAILED'
+            elif report.skipped:
+                state['status'] = 'SKIPPED'
+        elif report.failed:
+            # Fixture failure in setup or teardown
+            state['status'] = 'ERROR'
+        elif report.skipped and report.when == 'setup':
+            state['status'] = 'SKIPPED'
+
+        if report.failed and report.longrepr is not None:
+            state['longrepr'] += str(report.longrepr)
+
+    def pytest_runtest_logfinish(self, nodeid, location):
+        state = self.pending.pop(nodeid, None)
+        if state is not None:
+            self.send(event='outcome', nodeid=nodeid, **state)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self.send(event='session_finish', exitstatus=int(exitstatus))
+
+
+@pytest.fixture
+def hil_device():
+    """Socket connected to the bench under test (pooled when the dashboard allows)"""
+    proxy = os.environ.get('HIL_DEVICE_PROXY')
+    if proxy:
+        host, _, port = proxy.rpartition(':')
+    else:
+        host, port = os.environ['HIL_DEVICE_IP'], os.environ['HIL_DEVICE_PORT']
+    timeout = float(os.environ.get('HIL_TIMEOUT') or 30)
+    sock = socket.create_connection((host, int(port)), timeout=timeout)
+    yield sock
+    sock.close()
+
+
+def pytest_configure(config):
+    address = os.environ.get('HIL_EVENTS_ADDR')
+    if address:
+        config.pluginmanager.register(EventWriter(address), 'hil_event_writer')
+
+
+def pytest_unconfigure(config):
+    writer = config.pluginmanager.get_plugin('hil_event_writer')
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,201 @@
+"""
+History Browser - Pass-rate and duration trends over archived runs
+Opened from the results panel. Shows the last N runs of a suite as a pass-rate
+chart, a per-test table (pass rate, mean duration, latest status) and the run
+by run history of the selected test. All numbers come from RunArchive.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+# Choices for the "last N runs" window
+RUN_WINDOWS = (10, 50, 100, 500, 1000)
+DEFAULT_RUN_WINDOW = 50
+# Tests listed at once; the filter narrows large suites down
+MAX_TEST_ROWS = 1000
+
+CHART_HEIGHT = 110
+STATUS_COLORS = {'PASSED': '#27ae60', 'FAILED': '#e74c3c', 'ERROR': '#c0392b',
+                 'SKIPPED': '#95a5a6', None: '#ecf0f1'}
+
+
+def format_rate(rate):
+    return '-' if rate is None else f"{rate * 100:.0f}%"
+
+
+def format_seconds(seconds):
+    return '-' if seconds is None else f"{seconds:.2f}s"
+
+
+class HistoryBrowser:
+    def __init__(self, parent, archive, suite=None):
+        self.archive = archive
+        self.summary = []
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Run History")
+        self.window.geometry("900x650")
+        self.window.configure(bg='white')
+
+        self.build_widgets()
+
+        suites = self.archive.suites()
+        self.suite_combo['values'] = suites
+        if suite in suites:
+            self.suite_var.set(suite)
+        elif suites:
+            self.suite_var.set(suites[0])
+        self.refresh()
+
+    def build_widgets(self):
+        """Build the filter bar, the run chart, the test table and the test chart"""
+        bar = tk.Frame(self.window, bg='white')
+        bar.pack(fill='x', padx=10, pady=10)
+
+        tk.Label(bar, text="Suite:", bg='white').pack(side='left')
+        self.suite_var = tk.StringVar()
+        self.suite_combo = ttk.Combobox(bar, textvariable=self.suite_var, width=45, state='readonly')
+        self.suite_combo.pack(side='left', padx=5)
+        self.suite_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh())
+
+        tk.Label(bar, text="Last runs:", bg='white').pack(side='left', padx=(10, 0))
+        self.window_var = tk.StringVar(value=str(DEFAULT_RUN_WINDOW))
+        window_combo = ttk.Combobox(bar, textvariable=self.window_var, width=6, state='readonly',
+                                    values=[str(n) for n in RUN_WINDOWS])
+        window_combo.pack(side='left', padx=5)
+        window_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh())
+
+        tk.Label(bar, text="Filter:", bg='white').pack(side='left', padx=(10, 0))
+        self.filter_var = tk.StringVar()
+        filter_entry = tk.Entry(bar, textvariable=self.filter_var, width=20)
+        filter_entry.pack(side='left', padx=5)
+        filter_entry.bind('<Return>', lambda e: self.show_tests())
+
+        tk.Button(bar, text="Refresh", command=self.refresh).pack(side='right')
+
+        # Pass rate of every run in the window, oldest on the left
+        runs_frame = tk.LabelFrame(self.window, text="Pass Rate per Run", bg='white')
+        runs_frame.pack(fill='x', padx=10)
+        self.runs_canvas = tk.Canvas(runs_frame, height=CHART_HEIGHT, bg='white', highlightthickness=0)
+        self.runs_canvas.pack(fill='x', padx=5, pady=5)
+        self.runs_label = tk.Label(runs_frame, text='', bg='white', fg='gray', font=('Arial', 9))
+        self.runs_label.pack(anchor='w', padx=5)
+
+        # Per-test summary, least reliable tests first
+        tests_frame = tk.LabelFrame(self.window, text="Tests", bg='white')
+        tests_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        columns = ('test', 'runs', 'pass_rate', 'mean', 'latest')
+        self.tests_tree = ttk.Treeview(tests_frame, columns=columns, show='headings', height=10)
+        for column, text, width in (('test', 'Test Name', 380), ('runs', 'Runs', 60),
+                                    ('pass_rate', 'Pass Rate', 80), ('mean', 'Mean Duration', 100),
+                                    ('latest', 'Latest', 80)):
+            self.tests_tree.heading(column, text=text)
+            self.tests_tree.column(column, width=width)
+        scrollbar = ttk.Scrollbar(tests_frame, orient='vertical', command=self.tests_tree.yview)
+        self.tests_tree.configure(yscrollcommand=scrollbar.set)
+        self.tests_tree.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+        scrollbar.pack(side='right', fill='y', pady=5)
+        self.tests_tree.bind('<<TreeviewSelect>>', lambda e: self.show_test_trend())
+
+        # Selected test: one cell per run colored by status, duration as a line
+        trend_frame = tk.LabelFrame(self.window, text="Selected Test", bg='white')
+        trend_frame.pack(fill='x', padx=10, pady=(0, 10))
+        self.trend_canvas = tk.Canvas(trend_frame, height=CHART_HEIGHT, bg='white', highlightthickness=0)
+        self.trend_canvas.pack(fill='x', padx=5, pady=5)
+        self.trend_label = tk.Label(trend_frame, text='Select a test', bg='white', fg='gray',
+                                    font=('Arial', 9))
+        self.trend_label.pack(anchor='w', padx=5)
+
+    @property
+    def run_window(self):
+        return int(self.window_var.get())
+
+    def refresh(self):
+        """Re-query the archive for the selected suite and window"""
+        suite = self.suite_var.get()
+        if not suite:
+            self.runs_label.config(text='No runs archived yet')
+            return
+        runs = self.archive.runs(suite, self.run_window)
+        self.draw_runs(runs)
+        self.summary = self.archive.test_summary(suite, self.run_window)
+        # Least reliable first, tests that never executed last
+        self.summary.sort(key=lambda row: (row[2] is None, row[2] if row[2] is not None else 0, row[0]))
+        self.show_tests()
+        self.trend_canvas.delete('all')
+        self.trend_label.config(text='Select a test')
+
+    def draw_runs(self, runs):
+        """Bar per run: height is the pass rate of the tests that executed"""
+        canvas = self.runs_canvas
+        canvas.delete('all')
+        if not runs:
+            self.runs_label.config(text='No runs archived yet')
+            return
+        runs = list(reversed(runs))
+        canvas.update_idletasks()
+        width = max(canvas.winfo_width(), 200)
+        step = width / len(runs)
+        for i, (run_id, finished_at, total, passed, failed, skipped, errors, test_seconds) in enumerate(runs):
+            executed = passed + failed + errors
+            rate = passed / executed if executed else 1.0
+            top = CHART_HEIGHT - rate * (CHART_HEIGHT - 5)
+            color = STATUS_COLORS['PASSED'] if failed + errors == 0 else STATUS_COLORS['FAILED']
+            canvas.create_rectangle(i * step + 1, top, (i + 1) * step - 1, CHART_HEIGHT,
+                                    fill=color, outline='')
+
+        executed = sum(run[3] + run[4] + run[6] for run in runs)
+        passed = sum(run[3] for run in runs)
+        self.runs_label.config(
+            text=f"{len(runs)} runs from {runs[0][1]} to {runs[-1][1]} | "
+                 f"overall pass rate {format_rate(passed / executed if executed else None)} | "
+                 f"latest: {runs[-1][3]}/{runs[-1][2]} passed in {runs[-1][7]:.1f}s of test time")
+
+    def show_tests(self):
+        """Fill the test table from the last summary, applying the name filter"""
+        self.tests_tree.delete(*self.tests_tree.get_children())
+        needle = self.filter_var.get().strip().lower()
+        shown = 0
+        for name, runs, rate, mean, latest in self.summary:
+            if needle and needle not in name.lower():
+                continue
+            if shown >= MAX_TEST_ROWS:
+                break
+            self.tests_tree.insert('', 'end', iid=name,
+                                   values=(name, runs, format_rate(rate), format_seconds(mean), latest or '-'))
+            shown += 1
+
+    def show_test_trend(self):
+        """Chart the selected test run by run"""
+        selection = self.tests_tree.selection()
+        if not selection:
+            return
+        name = selection[0]
+        trend = list(reversed(self.archive.test_trend(self.suite_var.get(), name, self.run_window)))
+
+        canvas = self.trend_canvas
+        canvas.delete('all')
+        if not trend:
+            return
+        canvas.update_idletasks()
+        width = max(canvas.winfo_width(), 200)
+        step = width / len(trend)
+        longest = max(duration for _, _, _, duration in trend) or 1.0
+
+        strip = 14
+        points = []
+        for i, (run_id, finished_at, status, duration) in enumerate(trend):
+            canvas.create_rectangle(i * step + 1, CHART_HEIGHT - strip, (i + 1) * step - 1, CHART_HEIGHT,
+                                    fill=STATUS_COLORS.get(status, STATUS_COLORS[None]), outline='')
+            if status is not None and status != 'SKIPPED':
+                y = CHART_HEIGHT - strip - 4 - duration / longest * (CHART_HEIGHT - strip - 10)
+                points.extend(((i + 0.5) * step, y))
+        if len(points) >= 4:
+            canvas.create_line(*points, fill='#2980b9', width=2)
+
+        executed = [status for _, _, status, _ in trend if status not in (None, 'SKIPPED')]
+        passed = executed.count('PASSED')
+        self.trend_label.config(
+            text=f"{name}: {passed}/{len(executed)} executed runs passed | "
+                 f"longest {longest:.2f}s | latest {trend[-1][2] or 'not run'}")
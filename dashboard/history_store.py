@@ -0,0 +1,116 @@
+"""
+History Store - Per-test duration and outcome history in a local SQLite file
+Every finished run is saved in one transaction. The scheduler reads recent
+durations to order and shard tests (longest first) and recent failure rates
+to put likely failures first in stop-on-fail runs. Flakiness scores decide
+which failing tests are retried on the spot.
+"""
+
+import sqlite3
+from datetime import datetime
+from results_store import STATUS_CODES
+
+
+# Number of most recent runs of a test that estimates are based on
+DEFAULT_WINDOW = 10
+
+# Statuses whose duration reflects real execution time
+TIMED_CODES = (STATUS_CODES['PASSED'], STATUS_CODES['FAILED'], STATUS_CODES['ERROR'])
+FAILED_CODES = (STATUS_CODES['FAILED'], STATUS_CODES['ERROR'])
+PASSED_CODE = STATUS_CODES['PASSED']
+SKIPPED_CODE = STATUS_CODES['SKIPPED']
+
+
+def suite_key(config):
+    """History is kept per pytest path, or per mock suite name"""
+    return config.get('test_path') or config['suite']
+
+
+class HistoryStore:
+    def __init__(self, db_path="history.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " id INTEGER PRIMARY KEY, suite TEXT NOT NULL, finished_at TEXT NOT NULL)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " run_id INTEGER NOT NULL, suite TEXT NOT NULL, test TEXT NOT NULL,"
+                " status INTEGER NOT NULL, duration REAL NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 1)")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_by_test ON results (suite, test, run_id)")
+            # Databases from before retries were supported
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(results)")]
+            if 'attempts' not in columns:
+                self.conn.execute("ALTER TABLE results ADD COLUMN attempts INTEGER NOT NULL DEFAULT 1")
+
+    def save_run(self, suite, store):
+        """Save all results of a finished run (a ResultStore) in one transaction"""
+        if not len(store):
+            return None
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (suite, finished_at) VALUES (?, ?)",
+                (suite, datetime.now().isoformat()))
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO results (run_id, suite, test, status, duration, attempts)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, suite, name, code, duration, attempts)
+                 for name, code, duration, attempts
+                 in zip(store.names, store.status_codes, store.durations, store.attempts)))
+        return run_id
+
+    def _recent(self, where=""):
+        """Subquery over the last `window` results of every test in a suite
+        (parameters: suite, window)"""
+        return (
+            "SELECT test, status, duration FROM ("
+            " SELECT test, status, duration,"
+            "  ROW_NUMBER() OVER (PARTITION BY test ORDER BY run_id DESC) AS age"
+            f" FROM results WHERE suite = ? {where})"
+            " WHERE age <= ?")
+
+    def durations(self, suite, window=DEFAULT_WINDOW):
+        """{test: mean duration in seconds} over recent timed runs"""
+        codes = ','.join(str(code) for code in TIMED_CODES)
+        rows = self.conn.execute(
+            f"SELECT test, AVG(duration) FROM ({self._recent(f'AND status IN ({codes})')})"
+            " GROUP BY test", (suite, window))
+        return dict(rows.fetchall())
+
+    def failure_rates(self, suite, window=DEFAULT_WINDOW):
+        """{test: fraction of recent runs that failed}"""
+        codes = ','.join(str(code) for code in FAILED_CODES)
+        rows = self.conn.execute(
+            f"SELECT test, AVG(status IN ({codes})) FROM ({self._recent()})"
+            " GROUP BY test", (suite, window))
+        return dict(rows.fetchall())
+
+    def flakiness(self, suite, window=DEFAULT_WINDOW):
+        """{test: flakiness score} over recent executed runs
+
+        A run counts as flaky if the test passed only after a retry, or if its
+        outcome (pass/fail) differs from the previous run. The score is the
+        fraction of flaky runs; consistently passing or failing tests score 0.
+        """
+        failed = ','.join(str(code) for code in FAILED_CODES)
+        rows = self.conn.execute(
+            "SELECT test, AVG(flaky) FROM ("
+            " SELECT test, (status = ? AND attempts > 1)"
+            f"  OR (previous IS NOT NULL AND (status IN ({failed})) != (previous IN ({failed}))) AS flaky,"
+            "  ROW_NUMBER() OVER (PARTITION BY test ORDER BY run_id DESC) AS age"
+            " FROM (SELECT test, status, attempts, run_id,"
+            "  LAG(status) OVER (PARTITION BY test ORDER BY run_id) AS previous"
+            "  FROM results WHERE suite = ? AND status != ?))"
+            " WHERE age <= ? GROUP BY test",
+            (PASSED_CODE, suite, SKIPPED_CODE, window))
+        return {test: score for test, score in rows if score}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,103 @@
+"""
+JUnit Writer - Streams JUnit XML to disk while a run progresses
+Each result is written as a <testcase> element the moment it arrives, so
+memory use does not grow with the run and the report is complete as soon as
+the run ends. The <testsuite> totals are written as fixed-width placeholders
+and filled in on close.
+"""
+
+import os
+import re
+from datetime import datetime
+from results_store import parse_duration
+
+
+# Characters that are not allowed in XML 1.0 documents
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# Own escaping: xml.sax.saxutils imports urllib and http.client, ~40 ms of startup
+XML_TEXT = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+XML_ATTRIBUTE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+                               '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'})
+
+
+def escape(text):
+    return text.translate(XML_TEXT)
+
+
+def quoteattr(text):
+    """Double-quoted XML attribute value"""
+    return f'"{text.translate(XML_ATTRIBUTE)}"'
+
+
+def clean_text(text):
+    return INVALID_XML_CHARS.sub('?', str(text))
+
+
+def split_test_name(test_name, suite_name):
+    """Map a pytest node id (or mock test name) onto JUnit classname/name"""
+    parts = test_name.split('::')
+    if len(parts) == 1:
+        return suite_name, test_name
+    module = parts[0][:-3] if parts[0].endswith('.py') else parts[0]
+    classname = '.'.join([module.replace('/', '.').replace('\\', '.')] + parts[1:-1])
+    return classname, parts[-1]
+
+
+class JUnitWriter:
+    def __init__(self, path, suite_name):
+        self.path = path
+        self.suite_name = suite_name
+        self.timestamp = datetime.now().isoformat(timespec='seconds')
+        self.counts = {'tests': 0, 'failures': 0, 'errors': 0, 'skipped': 0}
+        self.total_time = 0.0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+        self._header_pos = self._file.tell()
+        self._write_header()
+
+    def _write_header(self):
+        # Zero-padded fixed width so the final totals fit in the same bytes
+        counts = ' '.join(f'{key}="{value:010d}"' for key, value in self.counts.items())
+        self._file.write(
+            f'<testsuite name={quoteattr(clean_text(self.suite_name))} {counts} '
+            f'time="{self.total_time:015.3f}" timestamp="{self.timestamp}">\n')
+
+    def add(self, test_name, status, duration, message=''):
+        """Write one <testcase> element"""
+        seconds = parse_duration(duration)
+        self.counts['tests'] += 1
+        self.total_time += seconds
+
+        classname, name = split_test_name(test_name, self.suite_name)
+        element = (f'  <testcase classname={quoteattr(clean_text(classname))} '
+                   f'name={quoteattr(clean_text(name))} time="{seconds:.3f}"')
+
+        message = clean_text(message or '')
+        summary = quoteattr(message.strip().splitlines()[-1] if message.strip() else '')
+        if status == 'FAILED':
+            self.counts['failures'] += 1
+            element += f'>\n    <failure message={summary}>{escape(message)}</failure>\n  </testcase>\n'
+        elif status == 'ERROR':
+            self.counts['errors'] += 1
+            element += f'>\n    <error message={summary}>{escape(message)}</error>\n  </testcase>\n'
+        elif status == 'SKIPPED':
+            self.counts['skipped'] += 1
+            element += '>\n    <skipped/>\n  </testcase>\n'
+        else:
+            element += '/>\n'
+        self._file.write(element)
+
+    def close(self):
+        """Close the document and fill in the totals"""
+        if self._file is None:
+            return
+        self._file.write('</testsuite>\n</testsuites>\n')
+        self._file.seek(self._header_pos)
+        self._write_header()
+        self._file.close()
+        self._file = None
@@ -0,0 +1,233 @@
+"""
+Log Index - Severity and test-name index over the session log
+Built as lines are ingested: one severity byte per line and, per test name,
+the numbers of the lines that mention it. Both live in sidecar files next to
+the LogStore's session log, so memory stays flat however long a soak run
+lasts: the severity bytes are appended to a file that is scanned
+memory-mapped with a compiled regex (in C), and the mentions go to a SQLite
+table keyed by (test, line). Severity filters, jumps to the next failure and
+test lookups thus stay instant on multi-million-line logs without touching
+the text. Substring search is LogStore.find. Like the store, the index is
+written and read from different threads under the store's lock.
+"""
+
+import mmap
+import os
+import re
+import sqlite3
+from array import array
+
+
+# Severity codes, one byte per line
+OTHER, INFO, PASS, FAIL, ERROR, WARNING = range(6)
+SEVERITY_NAMES = ('Other', 'INFO', 'PASS', 'FAIL', 'ERROR', 'WARNING')
+ALL_SEVERITIES = tuple(range(len(SEVERITY_NAMES)))
+FAILURE_SEVERITIES = (FAIL, ERROR)
+
+# "[TAG] ...", optionally behind the "[ip:port] " prefix of bench pool runs
+TAG_PATTERN = re.compile(r'(?:\[[^\]\s]+\] )?\[([A-Z]+)\]')
+TAGS = {'INFO': INFO, 'SYSTEM': INFO, 'PASS': PASS, 'FAIL': FAIL, 'ERROR': ERROR,
+        'WARNING': WARNING, 'RETRY': WARNING}
+# pytest -v outcome lines ("path::test PASSED [ 40%]") and summary lines ("FAILED path::test - ...")
+OUTCOME_PATTERN = re.compile(r'(?:\[[^\]\s]+\] )?(?:\S+::[^\s\[]*(?:\[[^\]]*\])? (PASSED|FAILED|ERROR|XPASS)\b|(FAILED|ERROR) \S+::)')
+OUTCOMES = {'PASSED': PASS, 'XPASS': PASS, 'FAILED': FAIL, 'ERROR': ERROR}
+# A pytest node id, or else a bare test function name
+NODE_ID_PATTERN = re.compile(r'[\w/.-]+\.py::[^\s\[\]]+(?:\[[^\]]*\])?')
+TEST_NAME_PATTERN = re.compile(r'\btest_\w+')
+
+# Lines scanned per step when looking backwards for filtered lines
+BACKWARD_WINDOW = 4096
+
+
+def classify(line):
+    """Severity code of one log line"""
+    # Cheap prefilters keep the regexes off most untagged output lines
+    if line.startswith('['):
+        match = TAG_PATTERN.match(line)
+        if match is not None and match.group(1) in TAGS:
+            return TAGS[match.group(1)]
+    if '::' in line:
+        match = OUTCOME_PATTERN.match(line)
+        if match is not None:
+            return OUTCOMES[match.group(1) or match.group(2)]
+    return OTHER
+
+
+def severity_pattern(codes):
+    """Compiled byte pattern matching any of the severity codes"""
+    return re.compile(b'[' + b''.join(re.escape(bytes([code])) for code in codes) + b']')
+
+
+class LogIndex:
+    def __init__(self, store):
+        """Index over the lines appended to store (a LogStore); add() follows its appends"""
+        self.store = store
+        # Shared with the store, so a batch is stored and indexed in one step
+        self.lock = store.lock
+        self.line_count = 0
+        self.counts = [0] * len(SEVERITY_NAMES)
+        # Test name -> id in the mentions table (bounded by the suites, not the log)
+        self.test_ids = {}
+        self._patterns = {}
+        self._file = None
+        self._map = None
+        self._mapped = 0
+        self.conn = None
+
+    def __len__(self):
+        return self.line_count
+
+    def _open(self):
+        """Create the sidecars of the store's session file on first use"""
+        base = os.path.splitext(self.store.path)[0]
+        self._file = open(base + '.severity', 'w+b')
+        db_path = base + '.tests.db'
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        # Queried from the Tk thread, written from the spill sink's; self.lock serializes them
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Rebuilt from scratch every session: durability is not needed
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("CREATE TABLE mentions (test INTEGER NOT NULL, line INTEGER NOT NULL,"
+                          " PRIMARY KEY (test, line)) WITHOUT ROWID")
+
+    def add(self, lines):
+        """Index a batch of lines, numbered on from the lines already indexed"""
+        if not lines:
+            return
+        with self.lock:
+            if self._file is None:
+                self._open()
+            number = self.line_count
+            codes = array('B')
+            mentions = []
+            for line in lines:
+                code = classify(line)
+                codes.append(code)
+                self.counts[code] += 1
+                match = None
+                if '::' in line:
+                    match = NODE_ID_PATTERN.search(line)
+                if match is None and 'test_' in line:
+                    match = TEST_NAME_PATTERN.search(line)
+                if match is not None:
+                    test_id = self.test_ids.setdefault(match.group(), len(self.test_ids))
+                    mentions.append((test_id, number))
+                number += 1
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(codes.tobytes())
+            with self.conn:
+                self.conn.executemany("INSERT INTO mentions VALUES (?, ?)", mentions)
+            self.line_count = number
+
+    def _severities(self):
+        """The severity bytes of all lines, memory-mapped (remapped as the file grows)"""
+        if not self.line_count:
+            return b''
+        if self._mapped != self.line_count:
+            self._file.flush()
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped = self.line_count
+        return self._map
+
+    def has_test(self, test):
+        return test in self.test_ids
+
+    def _test_lines(self, test, start, stop, backwards=False):
+        """Ascending (or descending) numbers of the lines in [start, stop) mentioning test"""
+        test_id = self.test_ids.get(test)
+        if test_id is None:
+            return iter(())
+        order = 'DESC' if backwards else 'ASC'
+        rows = self.conn.execute(f"SELECT line FROM mentions WHERE test = ? AND line >= ? AND line < ?"
+                                 f" ORDER BY line {order}", (test_id, start, stop))
+        return (line for line, in rows)
+
+    def count(self, codes=ALL_SEVERITIES):
+        with self.lock:
+            return sum(self.counts[code] for code in codes)
+
+    def _pattern(self, codes):
+        key = tuple(sorted(codes))
+        if key not in self._patterns:
+            self._patterns[key] = severity_pattern(key)
+        return self._patterns[key]
+
+    def next_line(self, start, codes=FAILURE_SEVERITIES):
+        """First line >= start with one of the severities, or None"""
+        with self.lock:
+            match = self._pattern(codes).search(self._severities(), start)
+            return None if match is None else match.start()
+
+    def lines_from(self, start, codes, limit, test=None, stop=None):
+        """Up to limit line numbers in [start, stop) with the severities (and mentioning test)"""
+        with self.lock:
+            stop = self.line_count if stop is None else min(stop, self.line_count)
+            severities = self._severities()
+            if test is not None:
+                wanted = set(codes)
+                result = []
+                for line in self._test_lines(test, start, stop):
+                    if severities[line] in wanted:
+                        result.append(line)
+                        if len(result) == limit:
+                            break
+                return result
+            if len(codes) == len(ALL_SEVERITIES):
+                return list(range(start, min(start + limit, stop)))
+            result = []
+            for match in self._pattern(codes).finditer(severities, start, stop):
+                result.append(match.start())
+                if len(result) == limit:
+                    break
+            return result
+
+    def lines_before(self, stop, codes, limit, test=None):
+        """Up to limit line numbers < stop with the severities, ascending"""
+        with self.lock:
+            stop = min(stop, self.line_count)
+            severities = self._severities()
+            if test is not None:
+                wanted = set(codes)
+                result = []
+                for line in self._test_lines(test, 0, stop, backwards=True):
+                    if severities[line] in wanted:
+                        result.append(line)
+                        if len(result) == limit:
+                            break
+                return result[::-1]
+            if len(codes) == len(ALL_SEVERITIES):
+                return list(range(max(0, stop - limit), stop))
+            # Regexes only scan forwards: widen a window back from stop until it holds enough
+            pattern = self._pattern(codes)
+            window = max(limit * 4, BACKWARD_WINDOW)
+            while True:
+                start = max(0, stop - window)
+                result = [match.start() for match in pattern.finditer(severities, start, stop)]
+                if len(result) >= limit or start == 0:
+                    return result[-limit:] if limit else []
+                window *= 4
+
+    def find_test(self, test, start, backwards=False):
+        """Next line >= start (or last line < start) mentioning test, or None"""
+        with self.lock:
+            if backwards:
+                lines = self._test_lines(test, 0, start, backwards=True)
+            else:
+                lines = self._test_lines(test, start, self.line_count)
+            return next(lines, None)
+
+    def close(self):
+        with self.lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
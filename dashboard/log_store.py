@@ -0,0 +1,195 @@
+"""
+Log Store - Append-only on-disk log with a bounded in-memory tail
+Every log line is spilled to a session file under logs/. Only the most recent
+lines stay in memory (a ring buffer); older lines are paged back in from disk
+through a sparse byte-offset index: one 64-bit checkpoint every
+CHECKPOINT_LINES lines, from which the file is scanned to the wanted line.
+That is 8 bytes per thousand lines, so memory stays flat on soak runs.
+Substring search scans the file memory-mapped.
+
+The store is written by the log spill sink's thread (sinks.LogStoreSink)
+and read from the Tk thread; every method takes the store's lock, which its
+LogIndex shares, so a reader never sees one ahead of the other.
+
+Starting a session deletes all but the newest KEEP_SESSIONS earlier sessions
+(the log and its index sidecars, see LogIndex), so logs/ does not grow
+without bound either.
+"""
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+
+# Lines kept in memory for fast access to the live end of the log
+DEFAULT_TAIL_LINES = 5000
+# One byte offset is indexed for every CHECKPOINT_LINES lines written
+CHECKPOINT_LINES = 1024
+# Earlier sessions kept in the log directory when a new one starts
+KEEP_SESSIONS = 10
+SESSION_PREFIX = 'session_'
+
+
+def session_name(filename):
+    """'session_<stamp>' of a session's log or sidecar file, else None"""
+    if not filename.startswith(SESSION_PREFIX):
+        return None
+    return filename.split('.', 1)[0]
+
+
+def prune_sessions(log_dir, keep=KEEP_SESSIONS):
+    """Delete the files of all but the newest keep sessions; returns the number deleted"""
+    sessions = {}
+    for filename in os.listdir(log_dir):
+        name = session_name(filename)
+        if name is not None:
+            sessions.setdefault(name, []).append(filename)
+    deleted = 0
+    # Stamps sort chronologically
+    for name in sorted(sessions)[:max(len(sessions) - keep, 0)]:
+        for filename in sessions[name]:
+            try:
+                os.remove(os.path.join(log_dir, filename))
+                deleted += 1
+            except OSError:
+                # E.g. still open by another dashboard on Windows; next time
+                pass
+    return deleted
+
+
+class LogStore:
+    def __init__(self, log_dir="logs", tail_lines=DEFAULT_TAIL_LINES):
+        self.log_dir = log_dir
+        self.tail = deque(maxlen=tail_lines)
+        self.line_count = 0
+        self.path = None
+        # Reentrant: readers call each other (find -> line_offset -> ...)
+        self.lock = threading.RLock()
+
+        self._file = None
+        self._size = 0
+        self._checkpoints = array('Q')
+
+    def _open(self):
+        """Create the session log file on first use, pruning old sessions"""
+        if not os.path.exists(self.log_dir):
+            os.makedirs(self.log_dir)
+        prune_sessions(self.log_dir)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = os.path.join(self.log_dir, f"{SESSION_PREFIX}{stamp}.log")
+        # Append mode: writes always land at the end even after seeks for reads
+        self._file = open(self.path, 'a+b')
+
+    def append(self, lines):
+        """Append a batch of lines (without trailing newlines)"""
+        if not lines:
+            return
+        with self.lock:
+            if self._file is None:
+                self._open()
+
+            chunks = []
+            for line in lines:
+                if self.line_count % CHECKPOINT_LINES == 0:
+                    self._checkpoints.append(self._size)
+                data = (line + '\n').encode('utf-8', 'replace')
+                chunks.append(data)
+                self._size += len(data)
+                self.line_count += 1
+                self.tail.append(line)
+
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(b''.join(chunks))
+
+    def read_lines(self, start, stop):
+        """Return lines [start, stop), from memory when possible, else from disk"""
+        with self.lock:
+            start = max(0, start)
+            stop = min(stop, self.line_count)
+            if start >= stop:
+                return []
+
+            tail_start = self.line_count - len(self.tail)
+            if start >= tail_start:
+                return list(islice(self.tail, start - tail_start, stop - tail_start))
+
+            self._file.flush()
+            self._file.seek(self.line_offset(start))
+            lines = []
+            for _ in range(stop - start):
+                lines.append(self._file.readline().decode('utf-8', 'replace').rstrip('\n'))
+            return lines
+
+    def read_numbered(self, numbers):
+        """Return the lines with the given ascending numbers (for filtered views)"""
+        lines = []
+        run_start = None
+        for position, number in enumerate(numbers):
+            # Consecutive numbers are read as one range
+            if run_start is None:
+                run_start = number
+            if position + 1 == len(numbers) or numbers[position + 1] != number + 1:
+                lines.extend(self.read_lines(run_start, number + 1))
+                run_start = None
+        return lines
+
+    def _block_end(self, block):
+        """Byte offset where a checkpoint block ends"""
+        return self._checkpoints[block + 1] if block + 1 < len(self._checkpoints) else self._size
+
+    def line_offset(self, number):
+        """Byte offset of a line in the session file (scanned from its checkpoint)"""
+        with self.lock:
+            block, skip = divmod(number, CHECKPOINT_LINES)
+            offset = self._checkpoints[block]
+            if skip:
+                self._file.flush()
+                self._file.seek(offset)
+                data = self._file.read(self._block_end(block) - offset)
+                position = -1
+                for _ in range(skip):
+                    position = data.index(b'\n', position + 1)
+                offset += position + 1
+            return offset
+
+    def line_at(self, offset, data=None):
+        """Number of the line containing a byte offset (data: the file, if mapped already)"""
+        with self.lock:
+            block = bisect_right(self._checkpoints, offset) - 1
+            start = self._checkpoints[block]
+            if data is None:
+                self._file.flush()
+                self._file.seek(start)
+                chunk = self._file.read(offset - start)
+            else:
+                chunk = data[start:offset]
+            return block * CHECKPOINT_LINES + chunk.count(b'\n')
+
+    def find(self, text, start, backwards=False):
+        """Number of the first line >= start (or the last line < start) containing text, or None"""
+        with self.lock:
+            if not text or self._file is None or not self._size:
+                return None
+            needle = text.encode('utf-8')
+            self._file.flush()
+            with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if backwards:
+                    end = self.line_offset(start) if start < self.line_count else self._size
+                    offset = data.rfind(needle, 0, end)
+                elif start < self.line_count:
+                    offset = data.find(needle, self.line_offset(start))
+                else:
+                    offset = -1
+                return None if offset < 0 else self.line_at(offset, data)
+
+    def close(self):
+        """Flush and close the session file"""
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,325 @@
+"""
+Log Viewer - Live log widget backed by a bounded ring buffer
+The Text widget never holds more than max_lines lines. Every line is spilled
+to the session LogStore on disk by a LogStoreSink on its own thread, without
+loss; each frame the widget shows the lines stored since the last one, and
+skips ahead to the newest if more than a frame's worth arrived. Scrolling to
+the top of the widget pages older lines back in, and scrolling to the bottom
+pages forward until the view catches up with the live end again.
+
+Lines are indexed by severity and test name as they are ingested (LogIndex),
+so severity filters, jumps to the next failure and test lookups never scan
+the text; substring search scans the session file memory-mapped.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+from log_index import LogIndex, SEVERITY_NAMES, ALL_SEVERITIES, FAILURE_SEVERITIES
+from log_store import LogStore
+
+
+# Most lines the Text widget holds at once
+DEFAULT_VIEW_LINES = 5000
+# Most new lines inserted into the widget per frame (older ones are only skipped on screen)
+DEFAULT_MAX_FLUSH_LINES = 2000
+# Lines paged in from the store per scroll step at either edge
+PAGE_LINES = 1000
+
+
+class LogViewer:
+    def __init__(self, parent, max_flush_lines=DEFAULT_MAX_FLUSH_LINES,
+                 max_lines=DEFAULT_VIEW_LINES, log_dir="logs"):
+        self.parent = parent
+        self.max_lines = max_lines
+        self.max_flush_lines = max_flush_lines
+
+        # Filled by the panel's LogStoreSink; flush() shows what it has added
+        self.store = LogStore(log_dir, tail_lines=max_lines)
+        self.index = LogIndex(self.store)
+        # Stored lines flush() has caught up with
+        self.seen_lines = 0
+
+        # Store line numbers shown in the widget, in order (contiguous unless filtered)
+        self.view_lines = deque()
+        # True while the view tracks the live end of the log
+        self.following = True
+        self._paging_pending = False
+
+        # Filter: severity codes shown, and the test whose lines alone are shown (or None)
+        self.severities = ALL_SEVERITIES
+        self.test_filter = None
+        # Line the last jump or search landed on
+        self.current_line = None
+
+        self.build_widgets()
+
+    def build_widgets(self):
+        """Build the filter and search bars, the log Text widget and its scrollbar"""
+        controls = tk.Frame(self.parent, bg='white')
+        controls.pack(fill='x', padx=5, pady=(5, 0))
+
+        tk.Button(controls, text="⤓ Jump to Live",
+                  command=self.jump_to_live).pack(side='right')
+        tk.Button(controls, text="⏭ Next Failure",
+                  command=self.next_failure).pack(side='right', padx=5)
+        self.position_label = tk.Label(controls, text="", font=('Arial', 8),
+                                       bg='white', fg='gray')
+        self.position_label.pack(side='left')
+
+        # Severity filters
+        filters = tk.Frame(self.parent, bg='white')
+        filters.pack(fill='x', padx=5)
+        self.severity_vars = []
+        for name in SEVERITY_NAMES:
+            var = tk.BooleanVar(value=True)
+            tk.Checkbutton(filters, text=name, variable=var, bg='white',
+                           command=self.apply_filter).pack(side='left')
+            self.severity_vars.append(var)
+
+        # Search (a test name is looked up in the index, anything else is a substring)
+        search = tk.Frame(self.parent, bg='white')
+        search.pack(fill='x', padx=5)
+        tk.Label(search, text="Find:", bg='white').pack(side='left')
+        self.search_var = tk.StringVar()
+        entry = tk.Entry(search, textvariable=self.search_var, width=30)
+        entry.pack(side='left', padx=5)
+        entry.bind('<Return>', lambda e: self.find())
+        entry.bind('<Shift-Return>', lambda e: self.find(backwards=True))
+        tk.Button(search, text="▲", command=lambda: self.find(backwards=True)).pack(side='left')
+        tk.Button(search, text="▼", command=self.find).pack(side='left', padx=(2, 5))
+        self.test_only_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search, text="Only this test's lines", variable=self.test_only_var,
+                       bg='white', command=self.apply_filter).pack(side='left')
+
+        self.scrollbar = ttk.Scrollbar(self.parent, orient='vertical', command=self._scroll_text)
+        self.scrollbar.pack(side='right', fill='y', pady=5)
+
+        self.text = tk.Text(self.parent, height=10, bg='#0c0c0c', fg='#00ff00',
+                            font=('Courier', 9), wrap='word')
+        self.text.pack(fill='both', expand=True, padx=5, pady=5)
+        self.text.tag_configure('current', background='#3a3a00')
+        self.text.configure(yscrollcommand=self.on_text_scrolled)
+        self.text.config(state='disabled')
+
+    def flush(self):
+        """Show the lines stored since the last flush, if following"""
+        # The index is written last, so its lines are all in the store too
+        count = self.index.line_count
+        first = self.seen_lines
+        if count == first:
+            return
+        self.seen_lines = count
+
+        if self.following:
+            # Jumps and paging may already have shown some of them
+            if self.view_lines:
+                first = max(first, self.view_lines[-1] + 1)
+            numbers = self._lines_after(first, count - first, stop=count)
+            if len(numbers) > self.max_flush_lines:
+                # Too many for one frame: show only the newest (all are in the store)
+                self._clear_widget()
+                numbers = numbers[-self.max_flush_lines:]
+            self._insert_lines('end', self.store.read_numbered(numbers))
+            self.view_lines.extend(numbers)
+            self._trim_top()
+            self.text.see('end')
+
+        self._update_position_label()
+
+    def _filtered(self):
+        return len(self.severities) != len(ALL_SEVERITIES) or self.test_filter is not None
+
+    def _lines_after(self, start, count, stop=None):
+        """Up to count shown line numbers >= start (and < stop)"""
+        return self.index.lines_from(start, self.severities, count, self.test_filter, stop)
+
+    def _lines_before(self, stop, count):
+        """Up to count shown line numbers < stop, ascending"""
+        return self.index.lines_before(stop, self.severities, count, self.test_filter)
+
+    def jump_to_live(self):
+        """Reload the most recent lines and resume following"""
+        self._show(self._lines_before(self.store.line_count, self.max_lines))
+        self.following = True
+        self.current_line = None
+        self.text.see('end')
+        self._update_position_label()
+
+    def show_line(self, number):
+        """Stop following and show a page of the log around one line, highlighted"""
+        half = min(PAGE_LINES, self.max_lines) // 2
+        before = self._lines_before(number, half)
+        after = self._lines_after(number + 1, half)
+        # The target is shown even if the filter would hide it
+        self._show(before + [number] + after)
+        self.following = False
+        self.current_line = number
+        widget_line = len(before) + 1
+        self.text.tag_add('current', f'{widget_line}.0', f'{widget_line + 1}.0')
+        self.text.see(f'{widget_line}.0')
+        self._update_position_label()
+
+    def _anchor(self, backwards):
+        """Line a jump or search continues from"""
+        if self.current_line is not None:
+            return self.current_line if backwards else self.current_line + 1
+        if self.following or not self.view_lines:
+            return self.store.line_count if backwards else 0
+        first_visible = int(self.text.index('@0,0').split('.')[0]) - 1
+        return self.view_lines[min(first_visible, len(self.view_lines) - 1)]
+
+    def next_failure(self):
+        """Jump to the next [FAIL]/[ERROR] line (of the filtered test, if any)"""
+        start = self._anchor(False)
+        if self.test_filter is not None:
+            lines = self.index.lines_from(start, FAILURE_SEVERITIES, 1, self.test_filter)
+            number = lines[0] if lines else None
+        else:
+            number = self.index.next_line(start, FAILURE_SEVERITIES)
+        self._land(number, "No more failures")
+
+    def find(self, backwards=False):
+        """Jump to the next (or previous) line matching the search text"""
+        text = self.search_var.get().strip()
+        if not text:
+            return
+        start = self._anchor(backwards)
+        if self.index.has_test(text):
+            number = self.index.find_test(text, start, backwards)
+        else:
+            number = self.store.find(text, start, backwards)
+        self._land(number, f"'{text}' not found")
+
+    def _land(self, number, message):
+        if number is None:
+            self.text.bell()
+            self.position_label.config(text=message)
+        else:
+            self.show_line(number)
+
+    def apply_filter(self):
+        """Re-show the log with the severity and test filters from the controls"""
+        self.severities = tuple(code for code, var in zip(ALL_SEVERITIES, self.severity_vars) if var.get())
+        test = self.search_var.get().strip()
+        if self.test_only_var.get() and not self.index.has_test(test):
+            # Only indexed test names can filter; anything else is just searched
+            self.test_only_var.set(False)
+            self.text.bell()
+        self.test_filter = test if self.test_only_var.get() else None
+
+        if self.following or self.current_line is None:
+            self.jump_to_live()
+        else:
+            self.show_line(self.current_line)
+
+    def _scroll_text(self, *args):
+        # Created before the Text widget so it packs on the right edge
+        self.text.yview(*args)
+
+    def on_text_scrolled(self, first, last):
+        """yscrollcommand hook: update the scrollbar and page at the edges"""
+        self.scrollbar.set(first, last)
+        first, last = float(first), float(last)
+
+        if self.following and last < 1.0:
+            # The user scrolled away from the live end; stop auto-scrolling
+            self.following = False
+            self._update_position_label()
+
+        at_top = first <= 0.0 and self.view_lines and self.view_lines[0] > 0
+        at_bottom = last >= 1.0 and not self.following
+        if (at_top or at_bottom) and not self._paging_pending:
+            # Page outside the scroll callback so widget edits do not re-enter it
+            self._paging_pending = True
+            self.text.after_idle(self._page, at_top)
+
+    def _page(self, older):
+        """Bring the adjacent page of lines in from the store"""
+        self._paging_pending = False
+
+        if older:
+            numbers = self._lines_before(self.view_lines[0], PAGE_LINES)
+            if not numbers:
+                return
+            self._insert_lines('1.0', self.store.read_numbered(numbers))
+            self.view_lines.extendleft(reversed(numbers))
+            self._trim_bottom()
+            # Keep the previously visible line in place
+            self.text.yview(f'{len(numbers) + 1}.0')
+        else:
+            last = self.view_lines[-1] if self.view_lines else -1
+            numbers = self._lines_after(last + 1, PAGE_LINES)
+            if numbers:
+                first_visible = self.text.index('@0,0')
+                self._insert_lines('end', self.store.read_numbered(numbers))
+                self.view_lines.extend(numbers)
+                removed = self._trim_top()
+                line = int(first_visible.split('.')[0]) - removed
+                self.text.yview(f'{max(line, 1)}.0')
+            else:
+                self.following = True
+                self.current_line = None
+                self.text.see('end')
+
+        self._update_position_label()
+
+    def _show(self, numbers):
+        """Replace the widget contents with the given store lines"""
+        self._clear_widget()
+        self._insert_lines('end', self.store.read_numbered(numbers))
+        self.view_lines.extend(numbers)
+
+    def _insert_lines(self, index, lines):
+        if not lines:
+            return
+        self.text.config(state='normal')
+        self.text.insert(index, '\n'.join(lines) + '\n')
+        self.text.config(state='disabled')
+
+    def _clear_widget(self):
+        self.text.config(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.config(state='disabled')
+        self.view_lines.clear()
+
+    def _trim_top(self):
+        """Drop the oldest widget lines beyond max_lines, return how many"""
+        excess = len(self.view_lines) - self.max_lines
+        if excess <= 0:
+            return 0
+        self.text.config(state='normal')
+        self.text.delete('1.0', f'{excess + 1}.0')
+        self.text.config(state='disabled')
+        for _ in range(excess):
+            self.view_lines.popleft()
+        return excess
+
+    def _trim_bottom(self):
+        """Drop the newest widget lines beyond max_lines"""
+        shown = len(self.view_lines)
+        excess = shown - self.max_lines
+        if excess <= 0:
+            return
+        self.text.config(state='normal')
+        self.text.delete(f'{shown - excess + 1}.0', f'{shown + 1}.0')
+        self.text.config(state='disabled')
+        for _ in range(excess):
+            self.view_lines.pop()
+
+    def _update_position_label(self):
+        total = self.store.line_count
+        if self._filtered() and self.test_filter is None:
+            total_text = f"{self.index.count(self.severities):,} of {total:,} lines"
+        elif self._filtered():
+            total_text = f"{self.test_filter} | {total:,} lines"
+        else:
+            total_text = f"{total:,} lines"
+        if self.following:
+            text = f"Live | {total_text}"
+        elif self.view_lines:
+            text = (f"Lines {self.view_lines[0] + 1:,}-{self.view_lines[-1] + 1:,} "
+                    f"| {total_text} (paused)")
+        else:
+            text = f"No matching lines | {total_text} (paused)"
+        self.position_label.config(text=text)
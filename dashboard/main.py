@@ -1,34 +1,296 @@
 """
 HiL Test Automation Dashboard - Main Entry point
 Alpha version - GUI Framework with Mock Test Execution
+
+Usage:
+    python main.py                                  # dashboard window
+    python main.py --headless CONFIG [--junit FILE] # batch run, see headless.py
+    python main.py --startup-report [FILE]          # time startup, exit 1 over budget
+
+tkinter and the panels are imported only when the window is built, so the
+headless mode never loads them. Stores, pools and runners are created on
+first use (see services.py); work the first screen does not need waits until
+the window is shown. Every startup is timed against STARTUP_BUDGET and the
+result logged.
 """
-import tkinter as tk
-from tkinter import ttk
-from config_panel import ConfigPanel # Left Panel - Config
-from results_panel import ResultsPanel # Right Panel - Results
+import time
+# Taken before any other import, so the startup report covers the dashboard's imports
+STARTUP_BEGAN = time.perf_counter()
+
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from event_bus import EventBus
+from profiler import PROFILER, StartupTimer
+from services import Services
+from sinks import JUnitSink
+
+# How often the queue's expected start times are recomputed
+QUEUE_REFRESH_MS = 10000
+# How often a background test collection is checked for completion
+DISCOVERY_POLL_MS = 200
+# Seconds from launch until the dashboard is ready; HIL_STARTUP_BUDGET overrides it
+STARTUP_BUDGET = 2.0
+
+
+def startup_budget():
+    try:
+        return float(os.environ.get('HIL_STARTUP_BUDGET', STARTUP_BUDGET))
+    except ValueError:
+        return STARTUP_BUDGET
+
 
 class HiLDashboard:
-    def __init__(self, root):
+    def __init__(self, root, startup=None):
         self.root = root
         self.root.title("HiL Test Automation Dashboard - Alpha v0.1")
         self.root.geometry("1200x800")
         self.root.configure(bg='#f0f0f0')
         
+        self.startup = startup or StartupTimer(startup_budget())
+        # Called without arguments once startup is complete
+        self.ready_callbacks = []
+        
+        # History, result cache, run archive, bench pools, discovery index,
+        # run queue and config manager, each created on first use
+        self.services = Services()
+        self.test_runner = None
+        # Start time and estimated duration of the current run
+        self.run_started = None
+        self.run_estimate = None
+        
+        # Runners publish here; the results panel and the report writer subscribe
+        self.bus = EventBus()
+        self.junit_sink = JUnitSink(report_dir="reports")
+        # Results are never dropped, and skipping log lines keeps the queue short,
+        # so the report is complete without ever pausing the run
+        self.bus.subscribe(self.junit_sink, events=JUnitSink.EVENTS, name='junit')
+        # Sink queue depths for the Diagnostics window (sampled only while profiling)
+        PROFILER.watch(self.bus)
+        
         # Create main container
-        self.create_header()
-        self.create_main_panels()
+        with self.startup.phase('header'):
+            self.create_header()
+        with self.startup.phase('panels'):
+            self.create_main_panels()
+        self.results_panel.run_finished_callbacks.append(self.on_run_finished)
+        
+        # Idle callbacks run in order, so this runs after the first layout and redraw
+        self.root.after_idle(self.finish_startup)
+    
+    def finish_startup(self):
+        """Startup work the first screen does not need, then the startup report"""
+        self.startup.mark('window shown')
+        
+        with self.startup.phase('last run'):
+            last_run = self.services.archive.last_run()
+            if last_run is not None:
+                finished_at, total, passed, failed = last_run
+                self.results_panel.set_last_run(finished_at.replace('T', ' ')[:16], total, passed)
+        with self.startup.phase('suite lists'):
+            self.on_suite_changed(self.config_panel.get_config_data())
+        with self.startup.phase('run queue'):
+            # Runs queued when the dashboard was last closed
+            run_queue = self.services.run_queue
+            if len(run_queue):
+                self.results_panel.add_log(f'[INFO] Resuming {len(run_queue)} queued runs')
+                self.start_next_run()
+            self.refresh_queue()
+        
+        self.startup.finish(self.services.created)
+        level = 'WARNING' if self.startup.over_budget else 'INFO'
+        self.results_panel.add_log(f'[{level}] {self.startup.summary()}')
+        for callback in self.ready_callbacks:
+            callback()
+
+    def is_running(self):
+        return self.test_runner is not None and self.test_runner.is_running
 
     def on_run_tests(self, config):
-        """Callback when Run button is pressed"""
+        """Callback when Run button is pressed: queue the run, start it if the bench is free"""
+        from history_store import suite_key
+        
+        self.services.run_queue.push(config)
+        if self.is_running():
+            self.results_panel.add_log(f'[INFO] Queued {suite_key(config)} ({config.get("priority", "normal")})')
+        self.start_next_run()
+    
+    def start_next_run(self):
+        """Start the highest-priority queued run unless one is in progress"""
+        from scheduler import create_runner
+        
+        if not self.is_running():
+            queued = self.services.run_queue.pop()
+            if queued is not None:
+                config = queued.config
+                services = self.services
+                # Bench pools and the discovery index are only needed by runs that use them
+                pools = None if config.get('agent') else services.device_pools
+                index = services.discovery if config.get('test_path') and not config.get('agent') else None
+                self.test_runner = create_runner(config, self.bus, history=services.history,
+                                                 cache=services.result_cache, pools=pools, index=index)
+                self.run_started = time.monotonic()
+                self.run_estimate = self.estimate_suite(config)[1]
+                self.test_runner.run_tests(config)
+        self.refresh_queue()
+    
+    def on_remove_queued(self, run_id):
+        self.services.run_queue.remove(run_id)
+        self.refresh_queue()
+    
+    def on_stop_tests(self):
+        """Callback when Stop button is pressed (queued runs still start afterwards)"""
+        if not self.is_running():
+            self.results_panel.add_log('[INFO] No run in progress')
+            return
+        self.results_panel.add_log('[WARNING] Stopping the run...')
+        self.test_runner.stop("by user")
+    
+    def on_run_finished(self, config, results):
+        """Record per-test durations and results, then start the next queued run"""
+        from history_store import suite_key
+        
+        key = suite_key(config)
+        self.services.history.save_run(key, results)
+        self.services.result_cache.record(key, config, results)
+        self.services.archive.save_run(key, results)
+        self.refresh_suite_info(self.config_panel.get_config_data())
+        self.start_next_run()
+    
+    def refresh_queue(self):
+        """Show queued runs with expected start times, chaining history-based estimates"""
+        if self.refresh_queue_job is not None:
+            self.root.after_cancel(self.refresh_queue_job)
+        
+        start = datetime.now()
+        if self.is_running():
+            if self.run_estimate is None:
+                start = None
+            else:
+                remaining = self.run_estimate - (time.monotonic() - self.run_started)
+                start += timedelta(seconds=max(remaining, 0))
+        
+        entries = []
+        for queued in self.services.run_queue.entries():
+            entries.append((queued, start.strftime('%H:%M:%S') if start else 'unknown'))
+            if start is not None:
+                estimate = self.estimate_suite(queued.config)[1]
+                start = start + timedelta(seconds=estimate) if estimate is not None else None
+        self.queue_panel.show(entries)
+        
+        # Expected start times drift while a run overruns or finishes early
+        self.refresh_queue_job = self.root.after(QUEUE_REFRESH_MS, self.refresh_queue)
+    
+    def on_view_history(self):
+        """Open the history browser on the configured suite"""
+        from history_browser import HistoryBrowser
+        from history_store import suite_key
+        HistoryBrowser(self.root, self.services.archive, suite_key(self.config_panel.get_config_data()))
+    
+    def on_suite_changed(self, config):
+        """Fill the suite and test lists from the index, then re-collect in the background"""
+        self.show_suite(config)
+        if config.get('test_path') and not config.get('agent'):
+            # An agent's test path is on the bench PC, collected there at run time
+            if os.path.exists(config['test_path']):
+                self.start_discovery(config)
+            else:
+                self.results_panel.add_log(f'[WARNING] Test path not found: {config["test_path"]}')
+    
+    def on_rescan(self, config):
+        """Collect the whole test path again"""
+        if config.get('test_path') and not config.get('agent'):
+            self.results_panel.add_log(f'[INFO] Collecting {config["test_path"]}...')
+            self.start_discovery(config, full=True)
+    
+    def show_suite(self, config):
+        """Show the suites of the configured path and the tests of the selected suite"""
+        from discovery import ALL_TESTS
+        
+        if config.get('test_path'):
+            self.config_panel.set_suites([ALL_TESTS] + self.services.discovery.modules(config['test_path']))
+        else:
+            from mock_test_runner import MOCK_SUITES
+            self.config_panel.set_suites(list(MOCK_SUITES))
+        config = self.config_panel.get_config_data()
+        self.config_panel.set_tests(self.suite_tests(config),
+                                    complete=not config.get('test_path') or config['suite'] == ALL_TESTS)
+        self.refresh_suite_info(self.config_panel.get_config_data())
+    
+    def suite_tests(self, config):
+        """Names of the tests in the configured suite (pytest ones as far as indexed)"""
+        from discovery import ALL_TESTS
+        
+        if config.get('test_path'):
+            module = None if config['suite'] == ALL_TESTS else config['suite']
+            return self.services.discovery.tests(config['test_path'], module)
         from mock_test_runner import MockTestRunner
+        return [test['name'] for test in MockTestRunner.get_mock_tests(config['suite'])]
+    
+    def start_discovery(self, config, full=False):
+        """Re-collect changed test files of a pytest path on a background thread"""
+        from pytest_runner import PytestRunner
+        collector = PytestRunner(self.bus)
+        # Created here: services belong to the Tk thread
+        discovery = self.services.discovery
+        outcome = {}
         
-        if not hasattr(self, 'test_runner'):
-            self.test_runner = MockTestRunner(self.results_panel)
+        def refresh():
+            try:
+                outcome['collected'] = discovery.refresh(
+                    config['test_path'], lambda paths: collector.collect(config, paths), full)
+            except Exception as e:
+                outcome['error'] = e
         
-        self.test_runner.run_tests(config)
+        thread = threading.Thread(target=refresh, daemon=True)
+        thread.start()
+        self.root.after(DISCOVERY_POLL_MS, self.poll_discovery, thread, config, outcome)
+    
+    def poll_discovery(self, thread, config, outcome):
+        """Update the lists once a background collection has finished (UI thread)"""
+        if thread.is_alive():
+            self.root.after(DISCOVERY_POLL_MS, self.poll_discovery, thread, config, outcome)
+            return
+        error = outcome.get('error')
+        if error is not None:
+            self.results_panel.add_log(f'[WARNING] Test discovery failed: {error}')
+            # Only some files failed: the rest were indexed and are shown
+            if getattr(error, 'node_ids', None) is None:
+                return
+        current = self.config_panel.get_config_data()
+        if (outcome.get('collected') or error is not None) and current.get('test_path') == config['test_path']:
+            if error is None:
+                self.results_panel.add_log(f'[INFO] Re-collected {outcome["collected"]} changed test files')
+            self.show_suite(current)
+            self.config_panel.select_tests(current['tests'])
+    
+    def on_diagnostics(self):
+        """Open the profiling view of the dashboard's own hot paths"""
+        from diagnostics_window import DiagnosticsWindow
+        DiagnosticsWindow(self.root, PROFILER)
+    
+    def refresh_suite_info(self, config):
+        """Update the test count / duration estimate shown for a suite"""
+        self.config_panel.set_suite_info(*self.estimate_suite(config))
+    
+    def estimate_suite(self, config):
+        """(test count, estimated seconds or None) for a suite, from run history"""
+        from history_store import suite_key
+        from scheduler import parse_targets, estimate_duration
         
+        durations = self.services.history.durations(suite_key(config))
+        names = config.get('tests') or self.suite_tests(config)
+        if not names and config.get('test_path') and not self.services.discovery.is_indexed(config['test_path']):
+            # Not collected yet: the known tests are the ones with history
+            names = list(durations)
+        tests = [{'name': name} for name in names]
+        return len(tests), estimate_duration(tests, len(parse_targets(config)), durations)
+    
     def create_header(self):
         """Top header bar"""
+        import tkinter as tk
+        
         header = tk.Frame(self.root, bg='#2c3e50', height=80)
         header.pack(fill='x', padx=10, pady=10)
         header.pack_propagate(False)
@@ -43,15 +305,22 @@ class HiLDashboard:
                            font=('Arial', 10), bg='#2c3e50', fg='#bdc3c7')
         subtitle.pack(side='left', padx=5)
         
-        # Settings/Help buttons (non-functional in alpha)
+        # Header buttons: Diagnostics opens the profiling view; Settings/Help are placeholders
         btn_frame = tk.Frame(header, bg='#2c3e50')
         btn_frame.pack(side='right', padx=20)
         
+        tk.Button(btn_frame, text="Diagnostics", width=10,
+                  command=self.on_diagnostics).pack(side='left', padx=5)
         tk.Button(btn_frame, text="Settings", width=10).pack(side='left', padx=5)
         tk.Button(btn_frame, text="Help", width=10).pack(side='left', padx=5)
     
     def create_main_panels(self):
         """Create left and right panel containers"""
+        import tkinter as tk
+        from config_panel import ConfigPanel # Left Panel - Config
+        from queue_panel import QueuePanel # Left Panel - Run queue
+        from results_panel import ResultsPanel # Right Panel - Results
+        
         main_container = tk.Frame(self.root, bg='#f0f0f0')
         main_container.pack(fill='both', expand=True, padx=10, pady=(0, 10))
         
@@ -61,20 +330,44 @@ class HiLDashboard:
                                    relief='solid', bd=2)
         left_panel.pack(side='left', fill='both', expand=True, padx=(0, 5))
         
-        # Add config panel (pass dummy callback for now)
-        self.config_panel = ConfigPanel(left_panel, self.on_run_tests)
+        # Add config panel; its callbacks run, stop and rescan suites and refresh the estimate
+        self.config_panel = ConfigPanel(left_panel, self.on_run_tests, self.on_suite_changed,
+                                        self.on_stop_tests, self.refresh_suite_info, self.on_rescan,
+                                        services=self.services)
+        self.queue_panel = QueuePanel(left_panel, on_remove=self.on_remove_queued)
+        self.refresh_queue_job = None
         
         # RIGHT PANEL - Results 
         right_panel = tk.Frame(main_container, bg='white')
         right_panel.pack(side='right', fill='both', expand=True, padx=(5, 0))
         
         # Add results panel
-        self.results_panel = ResultsPanel(right_panel)
+        self.results_panel = ResultsPanel(right_panel, self.bus, junit_sink=self.junit_sink,
+                                          on_view_history=self.on_view_history)
 
 
 def main():
-    root = tk.Tk()
-    app = HiLDashboard(root)
+    if len(sys.argv) > 1 and sys.argv[1] == '--headless':
+        from headless import main as headless_main
+        sys.exit(headless_main(sys.argv[2:]))
+    
+    startup = StartupTimer(startup_budget(), began=STARTUP_BEGAN)
+    startup.add('imports', time.perf_counter() - STARTUP_BEGAN)
+    with startup.phase('tk'):
+        import tkinter as tk
+        root = tk.Tk()
+    app = HiLDashboard(root, startup)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == '--startup-report':
+        # For CI (e.g. under xvfb-run): report, close, fail when over budget
+        def report():
+            print('\n'.join(startup.report_lines()))
+            if len(sys.argv) > 2:
+                startup.export(sys.argv[2])
+            root.destroy()
+        app.ready_callbacks.append(report)
+        root.mainloop()
+        sys.exit(1 if startup.over_budget else 0)
     root.mainloop()
 
 
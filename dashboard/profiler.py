@@ -0,0 +1,260 @@
+"""
+Profiler - Opt-in timing of the dashboard's own hot paths
+Off by default; HIL_PROFILE=1 (or the Diagnostics window) switches it on.
+Decorated hot paths then record their duration, the results panel records
+event-loop lag (how late each UI frame runs) and a sampler thread records the
+queue depth and throughput of every EventBus sink once a second. While off, a
+decorated call costs one attribute check.
+
+snapshot() summarizes everything for the Diagnostics window; export() writes
+the summary plus the per-second samples as JSON for offline analysis.
+
+StartupTimer is always on: it times the phases of the dashboard's startup
+and holds the total against a budget.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+# Recent samples kept per hot path for percentiles
+RECENT_SAMPLES = 2000
+# Seconds between sink samples, and how many are kept for export (one hour)
+SAMPLE_INTERVAL = 1.0
+MAX_SAMPLES = 3600
+
+
+class Timing:
+    """Duration statistics of one hot path (seconds)"""
+    __slots__ = ('count', 'total', 'max', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def summary(self):
+        """Milliseconds; percentiles cover the recent samples"""
+        recent = sorted(self.recent)
+
+        def percentile(fraction):
+            return recent[min(int(len(recent) * fraction), len(recent) - 1)] * 1000 if recent else 0.0
+
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 4) if self.count else 0.0,
+            'p50_ms': round(percentile(0.5), 4),
+            'p95_ms': round(percentile(0.95), 4),
+            'max_ms': round(self.max * 1000, 4),
+        }
+
+
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = datetime.now()
+        self.timings = {}
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        # Latest per-sink sample: name -> (queued, delivered, dropped, per second)
+        self.sinks = {}
+        self.max_queued = {}
+        self._lock = threading.Lock()
+        self._buses = []
+        self._last_sample = None
+        self._sampler = None
+
+    def enable(self, enabled=True):
+        if enabled and not self.enabled:
+            # A new collection period
+            self.reset()
+        self.enabled = enabled
+        if enabled:
+            self._start_sampler()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now()
+            self.timings = {}
+            self.samples.clear()
+            self.sinks = {}
+            self.max_queued = {}
+            self._last_sample = None
+
+    def record(self, name, seconds):
+        """Add one duration to a hot path's statistics"""
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = Timing()
+            timing.add(seconds)
+
+    def profiled(self, name):
+        """Decorator timing every call of a function while profiling is on"""
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def watch(self, bus):
+        """Sample the sink queues of an EventBus while profiling is on"""
+        self._buses.append(bus)
+        if self.enabled:
+            self._start_sampler()
+
+    def _start_sampler(self):
+        if self._sampler is None and self._buses:
+            self._sampler = threading.Thread(target=self._sample_forever, name='profiler', daemon=True)
+            self._sampler.start()
+
+    def _sample_forever(self):
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            if self.enabled:
+                self.sample()
+
+    def sample(self):
+        """Record depth, delivered and dropped counts of every sink"""
+        now = time.monotonic()
+        current = {}
+        for bus in self._buses:
+            for subscription in bus.subscriptions:
+                current[subscription.name] = (len(subscription), subscription.delivered, subscription.dropped)
+        with self._lock:
+            elapsed = now - self._last_sample[0] if self._last_sample else None
+            previous = self._last_sample[1] if self._last_sample else {}
+            for name, (queued, delivered, dropped) in current.items():
+                rate = None
+                if elapsed and name in previous:
+                    rate = (delivered - previous[name][1]) / elapsed
+                self.sinks[name] = (queued, delivered, dropped, rate)
+                self.max_queued[name] = max(self.max_queued.get(name, 0), queued)
+            self._last_sample = (now, current)
+            lag = self.timings.get('event_loop_lag')
+            self.samples.append({
+                'time': round(time.time(), 3),
+                'sinks': {name: list(values) for name, values in current.items()},
+                'event_loop_lag_ms': round(lag.recent[-1] * 1000, 3) if lag and lag.recent else None,
+            })
+
+    def snapshot(self):
+        """{'hot_paths': {name: stats}, 'sinks': {name: stats}} (times in ms)"""
+        with self._lock:
+            hot_paths = {name: timing.summary() for name, timing in sorted(self.timings.items())}
+            sinks = {name: {'queued': queued, 'max_queued': self.max_queued.get(name, queued),
+                            'delivered': delivered, 'dropped': dropped,
+                            'per_second': round(rate, 1) if rate is not None else None}
+                     for name, (queued, delivered, dropped, rate) in sorted(self.sinks.items())}
+        return {'hot_paths': hot_paths, 'sinks': sinks}
+
+    def export(self, path):
+        """Write the snapshot and the per-second samples as JSON"""
+        data = {'started_at': self.started_at.isoformat(timespec='seconds'),
+                'exported_at': datetime.now().isoformat(timespec='seconds')}
+        data.update(self.snapshot())
+        with self._lock:
+            data['samples'] = list(self.samples)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+class StartupTimer:
+    """Wall-clock phases of the dashboard's startup, held against a budget (seconds)"""
+
+    def __init__(self, budget, began=None):
+        self.budget = budget
+        # perf_counter() at launch; phases are timed from here
+        self.began = time.perf_counter() if began is None else began
+        self.phases = []
+        # Milestone -> seconds since launch, e.g. when the window was first shown
+        self.marks = {}
+        # Service -> seconds it took to create, see Services.created
+        self.services = {}
+        self.total = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def mark(self, name):
+        self.marks[name] = time.perf_counter() - self.began
+
+    def finish(self, services=None):
+        """Startup is complete; returns the total"""
+        self.total = time.perf_counter() - self.began
+        self.services = dict(services or {})
+        if PROFILER.enabled:
+            PROFILER.record('startup', self.total)
+        return self.total
+
+    @property
+    def over_budget(self):
+        return self.total is not None and self.total > self.budget
+
+    def slowest(self, count=3):
+        return sorted(self.phases, key=lambda phase: phase[1], reverse=True)[:count]
+
+    def summary(self):
+        """One line for the log"""
+        shown = self.marks.get('window shown')
+        window = f", window shown after {shown:.2f} s" if shown is not None else ""
+        text = f"Startup took {self.total:.2f} s{window} (budget {self.budget:g} s)"
+        if self.over_budget:
+            slowest = ', '.join(f"{name} {seconds:.2f} s" for name, seconds in self.slowest())
+            text += f" - over budget; slowest: {slowest}"
+        return text
+
+    def report_lines(self):
+        """Phase table for the terminal"""
+        lines = [f"{'phase':<24}{'seconds':>10}"]
+        lines += [f"{name:<24}{seconds:>10.3f}" for name, seconds in self.phases]
+        lines += [f"  service {name:<14}{seconds:>10.3f}" for name, seconds in sorted(self.services.items())]
+        lines += [f"{name:<24}{seconds:>10.3f}" for name, seconds in self.marks.items()]
+        lines.append(f"{'total':<24}{self.total:>10.3f}   budget {self.budget:.3f}"
+                     f"{'  OVER BUDGET' if self.over_budget else ''}")
+        return lines
+
+    def export(self, path):
+        """Write the report as JSON"""
+        data = {'total_s': round(self.total, 4), 'budget_s': self.budget, 'over_budget': self.over_budget,
+                'phases': [[name, round(seconds, 4)] for name, seconds in self.phases],
+                'services': {name: round(seconds, 4) for name, seconds in self.services.items()},
+                'marks': {name: round(seconds, 4) for name, seconds in self.marks.items()}}
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+# Shared by every instrumented module
+PROFILER = Profiler(enabled=os.environ.get('HIL_PROFILE') == '1')
+profiled = PROFILER.profiled
@@ -0,0 +1,228 @@
+"""
+Pytest Runner - Executes a real pytest suite for beta version
+pytest runs as a subprocess on a background thread with hil_pytest_plugin
+loaded. Per-test results arrive as structured events over an EventChannel;
+the human-readable output is streamed line by line into the log only. Both
+are published on the EventBus.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from discovery import CollectionError
+from event_channel import EventChannel
+from run_handle import stop_process
+from retry_policy import RetryPolicy
+from scheduler import BaseRunner, prepare_tests
+
+
+# Directory holding hil_pytest_plugin, put on the subprocess PYTHONPATH
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class PytestRunner(BaseRunner):
+    def test_root(self, config):
+        """Directory pytest runs in; node ids are reported relative to it"""
+        path = os.path.abspath(config['test_path'])
+        return path if os.path.isdir(path) else os.path.dirname(path)
+
+    def build_command(self, config, paths=None, collect_only=False):
+        """Build the pytest command line for a config (optionally limited to paths)"""
+        root = self.test_root(config)
+        # A fixed rootdir keeps node ids identical between collection and shards
+        cmd = [sys.executable, '-m', 'pytest', '-p', 'hil_pytest_plugin',
+               '-p', 'no:cacheprovider', f'--rootdir={root}']
+        if collect_only:
+            # One broken file must not hide the tests of all the others
+            cmd.extend(['--collect-only', '-q', '--continue-on-collection-errors'])
+        else:
+            cmd.append('-v')
+            if config.get('stop_on_fail'):
+                cmd.append('-x')
+            if not config.get('verbose'):
+                cmd.append('--tb=short')
+        cmd.extend(paths or [os.path.abspath(config['test_path'])])
+        return cmd
+
+    def build_environment(self, config, channel=None, node_ids_file=None, retry_file=None,
+                          use_pool=False):
+        """Expose the target device, the event channel and retry limits to the subprocess
+
+        use_pool routes the tests through the bench's pooled connection; only
+        shards that run tests need it, collection never touches the device.
+        """
+        env = dict(os.environ)
+        env['HIL_DEVICE_IP'] = str(config['device_ip'])
+        env['HIL_DEVICE_PORT'] = str(config['port'])
+        if use_pool and self.pools is not None:
+            # Tests reach the bench through the dashboard's connection pool
+            env['HIL_DEVICE_PROXY'] = self.pools.get((config['device_ip'], config['port'])).proxy_address()
+        env['HIL_TIMEOUT'] = str(config['timeout'])
+        env['PYTHONUNBUFFERED'] = '1'
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [PLUGIN_DIR, env.get('PYTHONPATH')]))
+        if channel is not None:
+            env['HIL_EVENTS_ADDR'] = channel.address
+        if node_ids_file is not None:
+            env['HIL_NODEIDS_FILE'] = node_ids_file
+        if retry_file is not None:
+            env['HIL_RETRY_FILE'] = retry_file
+        return env
+
+    def write_retry_file(self, retry):
+        """Hand a RetryPolicy to the plugin, which rebuilds it from the file"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump(retry.to_dict(), f)
+            return f.name
+
+    def collect(self, config, paths=None):
+        """Run pytest --collect-only (on paths, or the whole test path) and return node ids
+
+        Raises CollectionError when pytest fails, e.g. on a syntax or import
+        error in a test file; if only some files failed, the error carries
+        them and the node ids of the rest. Finding no tests is not an error.
+        """
+        channel = EventChannel()
+        with tempfile.TemporaryFile('w+', encoding='utf-8', errors='replace') as output:
+            try:
+                process = subprocess.Popen(
+                    self.build_command(config, paths, collect_only=True),
+                    stdout=output,
+                    stderr=subprocess.STDOUT,
+                    cwd=self.test_root(config),
+                    env=self.build_environment(config, channel),
+                )
+                node_ids = []
+                failed = []
+                for event in channel.events(process):
+                    if event.get('event') == 'collected':
+                        node_ids = event['nodeids']
+                    elif event.get('event') == 'collect_error':
+                        failed.append(event['nodeid'])
+                return_code = process.wait()
+            finally:
+                channel.close()
+            # 1: some files failed to collect; the rest are in node_ids
+            if return_code == 1 and failed:
+                raise CollectionError(f"{len(failed)} test files failed to collect: {', '.join(failed)}",
+                                      node_ids, failed)
+            # 5: no tests collected
+            if return_code not in (0, 5):
+                output.seek(0)
+                lines = [line.strip() for line in output if line.strip()]
+                summary = f': {lines[-1].strip("= ")}' if lines else ''
+                raise CollectionError(f"pytest --collect-only exited with code {return_code}{summary}")
+        return node_ids
+
+    def list_tests(self, config):
+        """The suite's node ids, from the discovery index when there is one"""
+        if self.index is None:
+            return [{'name': node_id} for node_id in self.collect(config)]
+        collected = self.index.refresh(config['test_path'], lambda paths: self.collect(config, paths))
+        if collected:
+            self.bus.log(f'[INFO] Re-collected {collected} changed test files')
+        return [{'name': node_id} for node_id in self.index.tests(config['test_path'])]
+
+    def run_shard(self, config, target, tests, log, report, retry=None, handle=None):
+        """Run tests against one bench, blocking until pytest exits
+
+        tests=None runs the whole test path. Output lines go to log(line) and
+        results to report(name, status, duration, message, attempts). Failing
+        tests are retried inside pytest as the RetryPolicy allows. Cancelling
+        the RunHandle interrupts pytest (killed after a grace period). Safe to
+        call from any thread. Returns the pytest exit code.
+        """
+        if handle is not None and handle.cancelled:
+            return 0
+        shard_config = dict(config, device_ip=target[0], port=target[1])
+        paths = node_ids_file = retry_file = None
+        if retry is not None and retry.retries and retry.budget:
+            retry_file = self.write_retry_file(retry)
+        if tests is not None:
+            # Node ids go through a file (no command-line length limit); only
+            # their files are passed so collection stays narrow
+            node_ids = [test['name'] for test in tests]
+            paths = list(dict.fromkeys(node_id.split('::', 1)[0] for node_id in node_ids))
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+                f.write('\n'.join(node_ids))
+                node_ids_file = f.name
+
+        process = None
+
+        def interrupt():
+            stop_process(process)
+
+        channel = EventChannel()
+        try:
+            process = subprocess.Popen(
+                self.build_command(shard_config, paths),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                cwd=self.test_root(config),
+                env=self.build_environment(shard_config, channel, node_ids_file, retry_file, use_pool=True),
+            )
+
+            if handle is not None:
+                handle.on_cancel(interrupt)
+
+            # The human log is only forwarded, results come from the channel
+            def pump_output():
+                for line in process.stdout:
+                    log(line.rstrip('\n'))
+            output_thread = threading.Thread(target=pump_output, daemon=True)
+            output_thread.start()
+
+            for event in channel.events(process):
+                if event.get('event') == 'outcome':
+                    if config.get('stop_on_fail') and event['status'] in ('FAILED', 'ERROR') and handle is not None:
+                        # -x already ends this pytest; only the other benches need interrupting
+                        handle.remove_callback(interrupt)
+                    report(event['nodeid'], event['status'], event['duration'], event['longrepr'],
+                           event.get('attempts', 1))
+                elif event.get('event') == 'retry':
+                    log(f"[RETRY] {event['nodeid']} failed on attempt {event['attempt']}, retrying")
+
+            output_thread.join()
+            return process.wait()
+        finally:
+            if handle is not None:
+                handle.remove_callback(interrupt)
+            channel.close()
+            for path in (node_ids_file, retry_file):
+                if path is not None:
+                    os.remove(path)
+
+    def execute(self, config, hints):
+        """Run the whole suite on the configured device (worker thread)"""
+        self.bus.log(f'\n[INFO] Starting pytest: {config["test_path"]}')
+        self.bus.log(f'[INFO] Target device: {config["device_ip"]}:{config["port"]}')
+
+        try:
+            tests = None
+            if (config.get('tests') or hints.cached is not None
+                    or (config.get('stop_on_fail') and hints.failure_rates)):
+                # A test selection, run mode or fail-fast ordering needs the explicit test list
+                tests = prepare_tests(self.list_tests(config), config, hints)
+                self.bus.log(f'[INFO] {len(tests)} tests selected')
+                if self.handle.cancelled:
+                    return None
+            if tests == []:
+                return None
+            return_code = self.run_shard(config, (config['device_ip'], config['port']), tests,
+                                         self.bus.log, self.report, RetryPolicy.from_config(config, hints),
+                                         self.handle)
+        except OSError as e:
+            self.bus.log(f'[ERROR] Failed to start pytest: {e}')
+            return 'pytest could not be started'
+        except CollectionError as e:
+            self.bus.log(f'[ERROR] Failed to collect tests: {e}')
+            return 'test collection failed'
+
+        if return_code not in (0, 1):
+            # 2+ means pytest itself failed (interrupted, usage or collection error)
+            return f"pytest exited with code {return_code}"
+        return None
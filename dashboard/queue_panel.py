@@ -0,0 +1,59 @@
+"""
+Queue Panel - Pending runs and when they are expected to start
+Lists the RunQueue in start order with an estimated start time per run,
+based on historical suite durations, and lets a queued run be removed.
+The widgets are built when the first run is queued and hidden while the
+queue is empty.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from run_queue import PRIORITIES
+
+
+PRIORITY_LABELS = dict(PRIORITIES)
+
+
+class QueuePanel:
+    def __init__(self, parent, on_remove=None):
+        self.parent = parent
+        self.on_remove = on_remove
+        self.frame = None
+
+    def build_panel(self):
+        self.frame = frame = tk.LabelFrame(self.parent, text="Run Queue",
+                                           font=('Arial', 10, 'bold'), bg='white', padx=10, pady=5)
+
+        columns = ('priority', 'suite', 'start')
+        self.tree = ttk.Treeview(frame, columns=columns, show='headings', height=3)
+        self.tree.heading('priority', text='Priority')
+        self.tree.heading('suite', text='Suite')
+        self.tree.heading('start', text='Expected Start')
+        self.tree.column('priority', width=90)
+        self.tree.column('suite', width=200)
+        self.tree.column('start', width=100)
+        self.tree.pack(side='left', fill='x', expand=True)
+
+        self.remove_button = tk.Button(frame, text="Remove", command=self.remove_selected)
+        self.remove_button.pack(side='right', padx=(5, 0))
+
+    def show(self, entries):
+        """entries: [(QueuedRun, expected start text)] in start order"""
+        if not entries:
+            if self.frame is not None:
+                self.frame.pack_forget()
+            return
+        if self.frame is None:
+            self.build_panel()
+        # Packed last in the left panel, below the run buttons
+        self.frame.pack(fill='x', padx=10, pady=(0, 10))
+        self.tree.delete(*self.tree.get_children())
+        for queued, start in entries:
+            suite = queued.config.get('test_path') or queued.config.get('suite', '')
+            self.tree.insert('', 'end', iid=str(queued.id),
+                             values=(PRIORITY_LABELS.get(queued.priority, queued.priority), suite, start))
+
+    def remove_selected(self):
+        selection = self.tree.selection()
+        if selection and self.on_remove:
+            self.on_remove(int(selection[0]))
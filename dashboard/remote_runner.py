@@ -0,0 +1,217 @@
+"""
+Remote Runner - Runs a suite on a bench agent and follows its events
+Used when a config names an agent ("host[:port]", see bench_agent.py). The
+run is handed to the agent together with the RunHints from this dashboard's
+history; the agent's log lines and results are republished on the local
+EventBus, so the results panel, reports and history work as for a local run.
+
+The connection is an asyncio session on the run's worker thread. When it
+breaks, the runner reconnects and resumes after the last event it
+acknowledged; events from before the blip are never reported twice. Stop
+and stop-on-fail are forwarded to the agent.
+"""
+
+import asyncio
+import uuid
+from agent_protocol import ProtocolError, parse_agent, encode_frame, read_frame, decode_event, encode_hints
+from event_bus import RunStarted, LogLine, TestResult, StatusChanged, RunFinished
+from scheduler import BaseRunner
+
+
+CONNECT_TIMEOUT = 10.0
+# Seconds between reconnection attempts (doubling up to the maximum), and how
+# long a run is followed without a connection before it is given up
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 5.0
+RECONNECT_TIMEOUT = 600.0
+
+
+class AgentLost(Exception):
+    pass
+
+
+class RemoteRunner(BaseRunner):
+    def __init__(self, bus, history=None, cache=None, pools=None, index=None):
+        super().__init__(bus, history, cache, pools, index)
+        # Identifies this dashboard to agents across reconnects
+        self.client_id = uuid.uuid4().hex[:12]
+
+    def execute(self, config, hints):
+        """Start the run on the agent and report its events (worker thread)"""
+        try:
+            host, port = parse_agent(config['agent'])
+        except ProtocolError as e:
+            self.bus.log(f'[ERROR] {e}')
+            return 'invalid agent address'
+        self.bus.log(f'\n[INFO] Starting test suite: {config["suite"]} on agent {host}:{port}')
+        # Named here, so the agent recognizes a request repeated after a blip
+        config = dict(config, run_id=uuid.uuid4().hex[:12])
+        return asyncio.run(self._follow(config, hints, host, port))
+
+    async def _follow(self, config, hints, host, port):
+        """Connect, reconnecting after failures, until the agent's run finishes"""
+        prefix = f'[{host}:{port}]'
+        # Agent process and last event seen (None until the first welcome)
+        self.session = None
+        self.last_seen = None
+        # Whether the agent accepted the run, whether its events are being
+        # reported, and whether a busy agent just finished another run
+        self.run_id = config['run_id']
+        self.accepted = False
+        self.following = False
+        self.agent_free = False
+        self.remote_status = None
+        # Events of this run the agent discarded before they reached us
+        self.lost_events = 0
+
+        loop = asyncio.get_running_loop()
+        stop_requested = asyncio.Event()
+        stop_callback = lambda: loop.call_soon_threadsafe(stop_requested.set)
+        self.handle.on_cancel(stop_callback)
+
+        delay = RECONNECT_DELAY
+        lost_at = None
+        try:
+            while True:
+                try:
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port),
+                                                            CONNECT_TIMEOUT)
+                except (OSError, asyncio.TimeoutError) as e:
+                    if self.session is None:
+                        self.bus.log(f'[ERROR] Cannot reach agent {host}:{port}: {e}')
+                        return 'agent unreachable'
+                else:
+                    if lost_at is not None:
+                        self.bus.log(f'[INFO] Reconnected to agent {host}:{port}')
+                    try:
+                        if await self._session(reader, writer, config, hints, prefix, stop_requested):
+                            return self._remote_error()
+                    except (asyncio.IncompleteReadError, ConnectionError, ProtocolError) as e:
+                        reason = 'closed' if isinstance(e, asyncio.IncompleteReadError) else e or type(e).__name__
+                        self.bus.log(f'[WARNING] Lost connection to agent {host}:{port} ({reason}), '
+                                     f'reconnecting...')
+                        delay = RECONNECT_DELAY
+                        lost_at = loop.time()
+                    except AgentLost as e:
+                        self.bus.log(f'[ERROR] {e}')
+                        return 'agent restarted'
+                    finally:
+                        writer.close()
+
+                if self.handle.cancelled:
+                    self.bus.log(f'[WARNING] Agent {host}:{port} unreachable; its run may go on')
+                    return None
+                if lost_at is not None and loop.time() - lost_at > RECONNECT_TIMEOUT:
+                    self.bus.log(f'[ERROR] No connection to agent {host}:{port} '
+                                 f'for {RECONNECT_TIMEOUT:.0f} s, giving up')
+                    return 'agent unreachable'
+                try:
+                    await asyncio.wait_for(stop_requested.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+        finally:
+            self.handle.remove_callback(stop_callback)
+
+    async def _session(self, reader, writer, config, hints, prefix, stop_requested):
+        """One connection; True once the run finished, exceptions when it breaks"""
+        writer.write(encode_frame({'type': 'hello', 'client': self.client_id,
+                                   'session': self.session, 'resume': self.last_seen}))
+        welcome = await read_frame(reader)
+        if self.session is not None and welcome['session'] != self.session:
+            raise AgentLost("The agent restarted; the rest of the run is lost")
+        self.session = welcome['session']
+        if self.last_seen is None:
+            self.last_seen = welcome['next'] - 1
+        run_request = encode_frame({'type': 'run', 'config': config, 'hints': encode_hints(hints)})
+        if not self.accepted:
+            writer.write(run_request)
+
+        stopper = asyncio.create_task(self._forward_stop(writer, stop_requested))
+        try:
+            while True:
+                message = await read_frame(reader)
+                kind = message.get('type')
+                if kind == 'events':
+                    finished = self._receive(message['first'], message['events'], prefix)
+                    writer.write(encode_frame({'type': 'ack', 'seq': self.last_seen}))
+                    if finished:
+                        await writer.drain()
+                        return True
+                    if self.agent_free and not self.accepted and not self.handle.cancelled:
+                        self.agent_free = False
+                        writer.write(run_request)
+                elif kind == 'gap':
+                    self._gap(message['first'], message['count'])
+                elif kind == 'started':
+                    self.accepted = True
+                elif kind == 'busy':
+                    self.bus.log('[INFO] The agent is busy with another run; waiting for it to finish')
+                elif kind == 'failed':
+                    self.bus.log(f'[ERROR] The agent could not start the run: {message.get("error")}')
+                    self.remote_status = 'Error - agent could not start the run'
+                    return True
+                elif kind == 'not_running' and not self.accepted:
+                    # Stopped while still waiting for the agent
+                    return True
+        finally:
+            stopper.cancel()
+
+    async def _forward_stop(self, writer, stop_requested):
+        await stop_requested.wait()
+        writer.write(encode_frame({'type': 'stop', 'run_id': self.run_id, 'reason': self.handle.reason}))
+        await writer.drain()
+
+    def _receive(self, first, events, prefix):
+        """Report a batch of events in order; True at the end of the run"""
+        for seq, item in enumerate(events, first):
+            if seq <= self.last_seen:
+                # Resent after a reconnect
+                continue
+            if seq > self.last_seen + 1:
+                # Always announced by a gap message; not expected otherwise
+                self._gap(self.last_seen + 1, seq - self.last_seen - 1)
+            self.last_seen = seq
+
+            event = decode_event(item)
+            if not self.following:
+                # Events before this run's start belong to other runs
+                if isinstance(event, RunStarted):
+                    self.following = event.config.get('run_id') == self.run_id
+                elif isinstance(event, RunFinished):
+                    self.agent_free = True
+            elif isinstance(event, LogLine):
+                self.bus.log('\n'.join(f'{prefix} {line}' if line else line
+                                       for line in event.message.split('\n')))
+            elif isinstance(event, TestResult):
+                self.report(*event)
+            elif isinstance(event, StatusChanged):
+                self.remote_status = event.text
+            elif isinstance(event, RunFinished):
+                return True
+        return False
+
+    def _gap(self, first, count):
+        """The agent discarded count events from first on (its journal bound)"""
+        end = first + count - 1
+        if end <= self.last_seen:
+            return
+        count = end - max(first, self.last_seen + 1) + 1
+        self.last_seen = end
+        if self.following or self.accepted:
+            # The rest of the stream is still this run's
+            self.following = True
+            self.lost_events += count
+            self.bus.log(f'[WARNING] {count} events of the run were discarded by the agent '
+                         f'before they could be delivered; the results are incomplete')
+        else:
+            # Whatever ran before may have finished meanwhile
+            self.agent_free = True
+
+    def _remote_error(self):
+        """The agent run's error status text, if it ended with one"""
+        if self.remote_status and self.remote_status.startswith('Error - '):
+            return self.remote_status[len('Error - '):]
+        if self.lost_events:
+            return f'{self.lost_events} events lost'
+        return None
@@ -0,0 +1,153 @@
+"""
+Result Cache - Latest result of every test, keyed by what the test ran against
+Each entry remembers the outcome of a test together with an input key built
+from the firmware hash, the relevant config fields and the test's own source.
+Run modes use it to rerun only last failures, skip tests whose inputs have
+not changed since they passed, or run failures before everything else.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from results_store import STATUS_CODES
+
+
+# Run modes offered by ConfigPanel
+RUN_FULL = 'full'
+RUN_FAILED = 'failed'
+RUN_CHANGED = 'changed'
+RUN_FAILURES_FIRST = 'failures_first'
+
+FAILED_CODES = (STATUS_CODES['FAILED'], STATUS_CODES['ERROR'])
+# A test only counts as up to date if it passed or was deliberately skipped
+SETTLED_CODES = (STATUS_CODES['PASSED'], STATUS_CODES['SKIPPED'])
+
+# Config fields that change what a test exercises (bench address does not)
+KEY_FIELDS = ('suite', 'test_path', 'timeout')
+
+
+def file_digest(path):
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def firmware_hash(config):
+    """Hash of the firmware image, or the firmware field itself if it is not a file"""
+    firmware = str(config.get('firmware', '')).strip()
+    if firmware and os.path.isfile(firmware):
+        return file_digest(firmware)
+    return firmware
+
+
+def config_key(config):
+    """Digest of the firmware and the config fields that affect test outcomes"""
+    fields = {name: config.get(name) for name in KEY_FIELDS}
+    fields['firmware'] = firmware_hash(config)
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+class InputKeys:
+    """Computes per-test input keys for one config, hashing each source file once"""
+
+    def __init__(self, config):
+        self.config_key = config_key(config)
+        self.root = None
+        if config.get('test_path'):
+            path = os.path.abspath(config['test_path'])
+            self.root = path if os.path.isdir(path) else os.path.dirname(path)
+        self._files = {}
+
+    def source_digest(self, test_name):
+        """Digest of the file a pytest node id lives in ('' for mock tests)"""
+        if self.root is None:
+            return ''
+        path = os.path.join(self.root, test_name.split('::', 1)[0])
+        if path not in self._files:
+            try:
+                self._files[path] = file_digest(path)
+            except OSError:
+                self._files[path] = ''
+        return self._files[path]
+
+    def __call__(self, test_name):
+        text = f"{self.config_key}|{test_name}|{self.source_digest(test_name)}"
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+class CacheSnapshot:
+    """Cached entries of one suite, loaded up front so workers need no database"""
+    __slots__ = ('mode', 'entries')
+
+    def __init__(self, mode, entries):
+        self.mode = mode
+        # {test: (status code, input key)}
+        self.entries = entries
+
+    def failed(self, test_name):
+        entry = self.entries.get(test_name)
+        return entry is not None and entry[0] in FAILED_CODES
+
+
+def select_tests(tests, config, snapshot):
+    """Apply the run mode to an ordered test list (idempotent, order preserving)"""
+    if snapshot is None or snapshot.mode == RUN_FULL:
+        return list(tests)
+
+    if snapshot.mode == RUN_FAILED:
+        return [t for t in tests if snapshot.failed(t['name'])]
+
+    if snapshot.mode == RUN_FAILURES_FIRST:
+        failed = [t for t in tests if snapshot.failed(t['name'])]
+        rest = [t for t in tests if not snapshot.failed(t['name'])]
+        return failed + rest
+
+    if snapshot.mode == RUN_CHANGED:
+        input_key = InputKeys(config)
+        selected = []
+        for test in tests:
+            entry = snapshot.entries.get(test['name'])
+            if entry is None or entry[0] not in SETTLED_CODES or entry[1] != input_key(test['name']):
+                selected.append(test)
+        return selected
+
+    return list(tests)
+
+
+class ResultCache:
+    def __init__(self, db_path="history.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                " suite TEXT NOT NULL, test TEXT NOT NULL, status INTEGER NOT NULL,"
+                " input_key TEXT NOT NULL, recorded_at TEXT NOT NULL,"
+                " PRIMARY KEY (suite, test))")
+
+    def snapshot(self, suite, mode):
+        """Load the cached entries of a suite for the given run mode"""
+        if mode == RUN_FULL:
+            return CacheSnapshot(mode, {})
+        rows = self.conn.execute(
+            "SELECT test, status, input_key FROM result_cache WHERE suite = ?", (suite,))
+        return CacheSnapshot(mode, {test: (status, key) for test, status, key in rows})
+
+    def record(self, suite, config, store):
+        """Replace the cached entries for every test in a finished run (a ResultStore)"""
+        input_key = InputKeys(config)
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO result_cache (suite, test, status, input_key, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                ((suite, name, code, input_key(name), now)
+                 for name, code in zip(store.names, store.status_codes)))
+
+    def close(self):
+        self.conn.close()
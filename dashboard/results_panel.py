@@ -1,21 +1,55 @@
 """
 Results Panel - Right side of dashboard
 Contains status bar, test results summary, results table, and live log viewer
+The panel is an EventBus sink; its queue is drained on the Tk thread.
+Log lines bypass it: a threaded LogStoreSink spills them to the session log
+without loss, and the log viewer shows them from there.
 """
 
+import os
+import shutil
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from datetime import datetime
+from tkinter import messagebox, filedialog
+from event_bus import (RunStarted, LogLine, TestResult, StatusChanged, RunFinished, BLOCK,
+                       FRAME_MS, EVENT_BUDGET_MS, EVENT_QUEUE_SIZE)
+from log_viewer import LogViewer, DEFAULT_MAX_FLUSH_LINES
+from profiler import PROFILER, profiled
+from results_table import ResultsTable
+from run_stats import RunStats, format_elapsed
+from sinks import LogStoreSink
 
 
 class ResultsPanel:
-    def __init__(self, parent):
+    def __init__(self, parent, bus, junit_sink=None, on_view_history=None,
+                 max_log_flush_lines=DEFAULT_MAX_FLUSH_LINES):
         self.parent = parent
+        # Source of the "Export JUnit XML" file
+        self.junit_sink = junit_sink
+        self.on_view_history = on_view_history
         
-        # Results data
-        self.test_results = []
-        self.stats = {'total': 0, 'passed': 0, 'failed': 0, 'duration': '0:00'}
+        # Results data: stats accumulate per result, see update_stats()
+        self.stats = RunStats()
+        self.run_started = None
+        self._stats_dirty = False
+        self._shown_stats = {}
+        
+        # Run events but log lines, drained on the Tk thread, see poll_events()
+        self.subscription = bus.subscribe(self, maxsize=EVENT_QUEUE_SIZE, threaded=False, name='dashboard',
+                                          events=(RunStarted, TestResult, StatusChanged, RunFinished))
+        
+        self.bus = bus
+        self.max_log_flush_lines = max_log_flush_lines
+        
+        # Called as callback(config, results) when a run completes
+        self.run_finished_callbacks = []
         
         self.build_panel()
+        self.update_stats()
+        # When the next frame should run; how late it actually runs is the event-loop lag
+        self._frame_due = time.perf_counter() + FRAME_MS / 1000
+        self.parent.after(FRAME_MS, self.on_frame)
     
     def build_panel(self):
         """Build all results widgets"""
@@ -29,17 +63,18 @@ class ResultsPanel:
                                      font=('Arial', 10, 'bold'), bg='#fff3cd')
         self.status_label.pack(side='left', padx=10, pady=10)
         
-        tk.Label(status_frame, text="Last Run: Never", 
-                font=('Arial', 9), bg='#fff3cd', fg='gray').pack(side='left', padx=10)
+        self.last_run_label = tk.Label(status_frame, text="Last Run: Never", 
+                                       font=('Arial', 9), bg='#fff3cd', fg='gray')
+        self.last_run_label.pack(side='left', padx=10)
         
-        # Export buttons (non-functional in alpha)
+        # History and export buttons
         btn_frame = tk.Frame(status_frame, bg='#fff3cd')
         btn_frame.pack(side='right', padx=10)
         
-        tk.Button(btn_frame, text="📊 View Report", 
-                 command=lambda: messagebox.showinfo("Info", "Report feature coming in Beta")).pack(side='left', padx=2)
+        tk.Button(btn_frame, text="📊 View History", 
+                 command=self.view_history).pack(side='left', padx=2)
         tk.Button(btn_frame, text="📥 Export JUnit XML",
-                 command=lambda: messagebox.showinfo("Info", "Export feature coming in Beta")).pack(side='left', padx=2)
+                 command=self.export_junit).pack(side='left', padx=2)
         
         # Test Results Summary
         summary_frame = tk.LabelFrame(self.parent, text="Test Results Summary", 
@@ -71,30 +106,20 @@ class ResultsPanel:
             
             self.stat_widgets[key] = value_label
         
+        # Skips and duration percentiles
+        self.stat_widgets['detail'] = tk.Label(summary_frame, text='', font=('Arial', 9),
+                                               bg='white', fg='gray')
+        self.stat_widgets['detail'].pack(anchor='w')
+        
         # Results Table
         table_frame = tk.LabelFrame(self.parent, text="Test Results Table", 
                                    font=('Arial', 11, 'bold'), bg='white', 
                                    relief='solid', bd=2)
         table_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
-        # Create Treeview
-        columns = ('test', 'status', 'duration')
-        self.results_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=6)
-        
-        self.results_tree.heading('test', text='Test Name')
-        self.results_tree.heading('status', text='Status')
-        self.results_tree.heading('duration', text='Duration')
-        
-        self.results_tree.column('test', width=300)
-        self.results_tree.column('status', width=100)
-        self.results_tree.column('duration', width=100)
-        
-        # Scrollbar for table
-        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.results_tree.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-        scrollbar.pack(side='right', fill='y', pady=5)
+        # Virtualized table: only the visible rows exist as Treeview items
+        self.results_table = ResultsTable(table_frame)
+        self.results_tree = self.results_table.tree
         
         # Live Log Viewer
         log_frame = tk.LabelFrame(self.parent, text="Live Test Execution Log", 
@@ -102,47 +127,133 @@ class ResultsPanel:
                                  relief='solid', bd=2)
         log_frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
         
-        # Log text widget
-        self.log_text = tk.Text(log_frame, height=10, bg='#0c0c0c', fg='#00ff00', 
-                               font=('Courier', 9), wrap='word')
-        self.log_text.pack(fill='both', expand=True, padx=5, pady=5)
-        
-        log_scroll = ttk.Scrollbar(log_frame, orient='vertical', command=self.log_text.yview)
-        self.log_text.configure(yscrollcommand=log_scroll.set)
+        # Bounded log viewer over the session log, which its own sink thread writes
+        self.log_viewer = LogViewer(log_frame, max_flush_lines=self.max_log_flush_lines)
+        self.log_text = self.log_viewer.text
+        self.log_subscription = self.bus.subscribe(
+            LogStoreSink(self.log_viewer.store, self.log_viewer.index), maxsize=EVENT_QUEUE_SIZE,
+            policy=BLOCK, name='log_store', events=LogStoreSink.EVENTS)
         
         # Initial log message
-        self.log_text.insert('end', '[SYSTEM] Dashboard initialized. Ready to run tests.\n')
-        self.log_text.config(state='disabled')
+        self.add_log('[SYSTEM] Dashboard initialized. Ready to run tests.')
     
     def update_status(self, status_text):
         """Update status bar"""
         self.status_label.config(text=f"Status: {status_text}")
     
-    def update_stats(self, total, passed, failed, duration):
-        """Update summary statistics"""
-        self.stat_widgets['total'].config(text=str(total))
-        self.stat_widgets['passed'].config(text=str(passed))
-        self.stat_widgets['failed'].config(text=str(failed))
-        self.stat_widgets['duration'].config(text=duration)
+    def set_last_run(self, finished_at, total, passed):
+        """Show when the latest run finished and how it went"""
+        self.last_run_label.config(text=f"Last Run: {finished_at} ({passed}/{total} passed)")
     
-    def add_test_result(self, test_name, status, duration):
-        """Add a row to results table"""
-        tag = 'passed' if status == 'PASSED' else 'failed'
-        self.results_tree.insert('', 'end', values=(test_name, status, duration), tags=(tag,))
-        
-        # Color coding
-        self.results_tree.tag_configure('passed', foreground='#27ae60')
-        self.results_tree.tag_configure('failed', foreground='#e74c3c')
+    @profiled('update_stats')
+    def update_stats(self):
+        """Redraw the summary from the stats accumulator (changed widgets only)"""
+        stats = self.stats
+        elapsed = time.monotonic() - self.run_started if self.run_started is not None else 0
+        values = {
+            'total': str(stats.total),
+            'passed': str(stats.passed),
+            'failed': str(stats.failures),
+            'duration': format_elapsed(elapsed) if self.run_started is not None
+                        else self._shown_stats.get('duration', '0:00'),
+            'detail': (f"Skipped: {stats.skipped} | p50: {stats.percentile(0.5):.2f}s | "
+                       f"p95: {stats.percentile(0.95):.2f}s | max: {stats.max_duration:.2f}s"),
+        }
+        for key, text in values.items():
+            if self._shown_stats.get(key) != text:
+                self.stat_widgets[key].config(text=text)
+                self._shown_stats[key] = text
+        self._stats_dirty = False
+    
+    @profiled('add_test_result')
+    def add_test_result(self, test_name, status, duration, message='', attempts=1):
+        """Add a row to results table (drawn on the next frame)"""
+        self.results_table.add(test_name, status, duration, attempts)
+        self.stats.add(status, duration)
+        self._stats_dirty = True
     
     def clear_results(self):
         """Clear all results"""
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-        self.update_stats(0, 0, 0, '0:00')
+        self.results_table.clear()
+        self.stats = RunStats()
+        self.update_stats()
+    
+    def start_run(self, config):
+        """Clear results and start the run clock"""
+        self.clear_results()
+        self.run_started = time.monotonic()
     
+    def run_finished(self, config, results):
+        """Stop the run clock and notify listeners (results is a ResultStore)"""
+        self.update_stats()
+        self.run_started = None
+        self.set_last_run(datetime.now().strftime('%Y-%m-%d %H:%M'), self.stats.total, self.stats.passed)
+        
+        for callback in self.run_finished_callbacks:
+            callback(config, results)
+    
+    def view_history(self):
+        """Open the multi-run history browser"""
+        if self.on_view_history is None:
+            messagebox.showinfo("Info", "Run history is not available")
+            return
+        self.on_view_history()
+    
+    def export_junit(self):
+        """Copy the last finished run's JUnit report to a chosen location"""
+        report_path = self.junit_sink.last_report_path if self.junit_sink is not None else None
+        if report_path is None:
+            messagebox.showinfo("Info", "No finished run to export yet")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            initialfile=os.path.basename(report_path),
+            title="Export JUnit XML",
+            defaultextension=".xml",
+            filetypes=[("XML files", "*.xml"), ("All files", "*.*")]
+        )
+        if not filename:  # User cancelled
+            return
+        
+        try:
+            shutil.copyfile(report_path, filename)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export report:\n{str(e)}")
+    
+    @profiled('add_log')
     def add_log(self, message):
-        """Add message to log viewer"""
-        self.log_text.config(state='normal')
-        self.log_text.insert('end', message + '\n')
-        self.log_text.see('end')  # Auto-scroll to bottom
-        self.log_text.config(state='disabled')
\ No newline at end of file
+        """Queue message for the session log, in line with the runner's output"""
+        self.log_subscription.offer(LogLine(message))
+    
+    @profiled('flush_log')
+    def flush_log(self):
+        """Show newly stored log lines with a single widget insert"""
+        self.log_viewer.flush()
+    
+    def on_frame(self):
+        """Periodic UI tick: apply runner events, redraw table and log, reschedule"""
+        if PROFILER.enabled:
+            PROFILER.record('event_loop_lag', max(0.0, time.perf_counter() - self._frame_due))
+        self.poll_events()
+        self.results_table.refresh()
+        if self._stats_dirty or self.run_started is not None:
+            self.update_stats()
+        self.flush_log()
+        self._frame_due = time.perf_counter() + FRAME_MS / 1000
+        self.parent.after(FRAME_MS, self.on_frame)
+    
+    @profiled('poll_events')
+    def poll_events(self):
+        """Drain queued run events on the Tk thread, for at most EVENT_BUDGET_MS"""
+        self.subscription.drain(deadline=time.perf_counter() + EVENT_BUDGET_MS / 1000)
+    
+    def handle(self, event):
+        """Apply a single run event to the widgets"""
+        if isinstance(event, TestResult):
+            self.add_test_result(event.name, event.status, event.duration, event.message, event.attempts)
+        elif isinstance(event, StatusChanged):
+            self.update_status(event.text)
+        elif isinstance(event, RunStarted):
+            self.start_run(event.config)
+        elif isinstance(event, RunFinished):
+            self.run_finished(event.config, event.results)
@@ -0,0 +1,59 @@
+"""
+Results Store - Compact columnar storage for test results
+One parallel array per column instead of a dict or widget row per test, so
+tens of thousands of results cost a few bytes each and clearing is O(1).
+"""
+
+from array import array
+
+
+# Status column codes; the index into STATUSES is what gets stored
+STATUSES = ('PASSED', 'FAILED', 'SKIPPED', 'ERROR')
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def parse_duration(duration):
+    """Accept '1.23s' strings as well as plain seconds"""
+    if isinstance(duration, str):
+        duration = duration.strip().rstrip('s') or 0
+    return float(duration)
+
+
+class ResultStore:
+    __slots__ = ('names', 'status_codes', 'durations', 'attempts', 'generation')
+
+    def __init__(self):
+        self.generation = 0
+        self.clear()
+
+    def __len__(self):
+        return len(self.names)
+
+    def append(self, name, status, duration, attempts=1):
+        """Record one result; status is one of STATUSES, attempts counts retries"""
+        self.names.append(name)
+        self.status_codes.append(STATUS_CODES.get(status, STATUS_CODES['ERROR']))
+        self.durations.append(parse_duration(duration))
+        self.attempts.append(min(attempts, 255))
+
+    def flaky_count(self):
+        """Results that passed only after a retry"""
+        passed = STATUS_CODES['PASSED']
+        return sum(1 for code, attempts in zip(self.status_codes, self.attempts)
+                   if code == passed and attempts > 1)
+
+    def row(self, index):
+        """Return (name, status, duration string) for display"""
+        status = STATUSES[self.status_codes[index]]
+        if self.attempts[index] > 1:
+            status += f" ({self.attempts[index]} tries)"
+        return (self.names[index], status, f"{self.durations[index]:.2f}s")
+
+    def clear(self):
+        """Drop all results by swapping in fresh columns"""
+        self.names = []
+        self.status_codes = array('B')
+        self.durations = array('d')
+        self.attempts = array('B')
+        # Lets views tell a cleared store apart from one with the same length
+        self.generation += 1
@@ -0,0 +1,151 @@
+"""
+Results Table - Virtualized view over a ResultStore
+The Treeview only ever holds one row item per visible line. Scrolling and new
+results rewrite those items from the store instead of inserting or deleting
+rows, so table cost depends on the window height rather than the suite size.
+"""
+
+from tkinter import ttk
+from profiler import profiled
+from results_store import ResultStore, STATUSES
+
+
+# Fallback when the ttk theme does not report a row height
+DEFAULT_ROW_HEIGHT = 20
+# Rows moved per mouse wheel notch
+WHEEL_ROWS = 3
+
+STATUS_TAGS = {'PASSED': 'passed', 'FAILED': 'failed', 'ERROR': 'failed', 'SKIPPED': 'skipped'}
+
+
+class ResultsTable:
+    def __init__(self, parent, visible_rows=6):
+        self.parent = parent
+        self.store = ResultStore()
+
+        # Store index of the first visible row
+        self.offset = 0
+        # True while the view sticks to the newest results
+        self.following = True
+        self._dirty = False
+
+        self.build_widgets(visible_rows)
+
+    def build_widgets(self, visible_rows):
+        """Build the Treeview and its scrollbar"""
+        columns = ('test', 'status', 'duration')
+        self.tree = ttk.Treeview(self.parent, columns=columns, show='headings', height=visible_rows)
+
+        self.tree.heading('test', text='Test Name')
+        self.tree.heading('status', text='Status')
+        self.tree.heading('duration', text='Duration')
+
+        self.tree.column('test', width=300)
+        self.tree.column('status', width=100)
+        self.tree.column('duration', width=100)
+
+        # Color coding, configured once
+        self.tree.tag_configure('passed', foreground='#27ae60')
+        self.tree.tag_configure('failed', foreground='#e74c3c')
+        self.tree.tag_configure('skipped', foreground='#7f8c8d')
+
+        self.scrollbar = ttk.Scrollbar(self.parent, orient='vertical', command=self.on_scrollbar)
+
+        self.tree.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+        self.scrollbar.pack(side='right', fill='y', pady=5)
+
+        self.row_items = []
+        self._rendered = []
+        self._set_row_count(visible_rows)
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', self.on_wheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_rows(-WHEEL_ROWS))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_rows(WHEEL_ROWS))
+
+    def add(self, test_name, status, duration, attempts=1):
+        """Record a result; the view is redrawn on the next refresh()"""
+        self.store.append(test_name, status, duration, attempts)
+        self._dirty = True
+
+    def clear(self):
+        """Drop all results in O(1)"""
+        self.store.clear()
+        self.offset = 0
+        self.following = True
+        self._dirty = True
+
+    @profiled('table_refresh')
+    def refresh(self):
+        """Redraw the visible window if anything changed (called once per frame)"""
+        if not self._dirty:
+            return
+        self._dirty = False
+
+        visible = len(self.row_items)
+        total = len(self.store)
+        if self.following:
+            self.offset = max(0, total - visible)
+        self.offset = max(0, min(self.offset, total - visible))
+
+        generation = self.store.generation
+        for slot, item in enumerate(self.row_items):
+            index = self.offset + slot
+            key = (generation, index if index < total else None)
+            if self._rendered[slot] == key:
+                continue
+            self._rendered[slot] = key
+
+            if index < total:
+                row = self.store.row(index)
+                status = STATUSES[self.store.status_codes[index]]
+                self.tree.item(item, values=row, tags=(STATUS_TAGS[status],))
+            else:
+                self.tree.item(item, values=('', '', ''), tags=())
+
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_rows(self, delta):
+        """Move the window by delta rows"""
+        self.scroll_to(self.offset + delta)
+        return 'break'
+
+    def scroll_to(self, offset):
+        visible = len(self.row_items)
+        total = len(self.store)
+        self.offset = max(0, min(offset, total - visible))
+        self.following = self.offset >= total - visible
+        self._dirty = True
+        self.refresh()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'"""
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.store)))
+        elif action == 'scroll':
+            step = len(self.row_items) if unit == 'pages' else 1
+            self.scroll_rows(int(amount) * step)
+
+    def on_wheel(self, event):
+        return self.scroll_rows(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+
+    def on_resize(self, event):
+        """Match the number of row items to the rows that fit"""
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT
+        heading_height = DEFAULT_ROW_HEIGHT + 5
+        rows = max(1, (event.height - heading_height) // int(row_height))
+        if rows != len(self.row_items):
+            self._set_row_count(rows)
+            self._dirty = True
+            self.refresh()
+
+    def _set_row_count(self, rows):
+        while len(self.row_items) < rows:
+            self.row_items.append(self.tree.insert('', 'end', values=('', '', '')))
+            self._rendered.append(None)
+        while len(self.row_items) > rows:
+            self.tree.delete(self.row_items.pop())
+            self._rendered.pop()
@@ -0,0 +1,57 @@
+"""
+Retry Policy - Bounded immediate retries of failing tests
+Shared by the runners (MockTestRunner retries in process, BenchScheduler
+splits the budget between benches) and by hil_pytest_plugin, which gets the
+policy of its shard through HIL_RETRY_FILE and retries inside pytest. Kept
+free of dashboard imports so the plugin can load it in the pytest process.
+"""
+
+
+# Flakiness score from which a failing test is retried up to the full limit
+FLAKY_THRESHOLD = 0.1
+
+
+class RetryPolicy:
+    """Bounded immediate retries of failing tests on one bench
+
+    Known-flaky tests (flakiness score >= FLAKY_THRESHOLD) are retried up to
+    `retries` times, any other failing test once, so that new flakiness gets
+    noticed. Every retry spends one unit of the budget.
+    """
+    __slots__ = ('retries', 'budget', 'flaky')
+
+    def __init__(self, retries=0, budget=0, flaky=None):
+        self.retries = max(retries, 0)
+        self.budget = max(budget, 0)
+        self.flaky = flaky or {}
+
+    @classmethod
+    def from_config(cls, config, hints):
+        from scheduler import config_int
+        return cls(config_int(config, 'retries'), config_int(config, 'retry_budget'), hints.flaky)
+
+    def to_dict(self):
+        """JSON-ready state (only the flaky scores that matter); RetryPolicy(**d) restores it"""
+        flaky = {name: score for name, score in self.flaky.items() if score >= FLAKY_THRESHOLD}
+        return {'retries': self.retries, 'budget': self.budget, 'flaky': flaky}
+
+    def max_retries(self, test_name):
+        if not self.retries:
+            return 0
+        return self.retries if self.is_flaky(test_name) else 1
+
+    def is_flaky(self, test_name):
+        return self.flaky.get(test_name, 0.0) >= FLAKY_THRESHOLD
+
+    def allow(self, test_name, attempt):
+        """True if a test that failed on `attempt` may run again (spends budget)"""
+        if attempt > self.max_retries(test_name) or self.budget <= 0:
+            return False
+        self.budget -= 1
+        return True
+
+    def split(self, count):
+        """Divide the budget between count benches"""
+        share, extra = divmod(self.budget, count)
+        return [RetryPolicy(self.retries, share + (1 if i < extra else 0), self.flaky)
+                for i in range(count)]
@@ -0,0 +1,221 @@
+"""
+Run Archive - Every finished run kept as compact per-run columns
+Each suite has an append-only test dictionary that gives every test a column
+index. A run is stored as one row holding two blobs indexed by that column:
+one status code byte and one uint32 duration in milliseconds per test, so a
+5,000-test run costs about 25 KB and a test's column never moves.
+
+Trend queries never build per-result Python objects: the history of one test
+is sliced out of the blobs by SQLite (substr), and per-test summaries over the
+last N runs add whole runs at once as big integers with one counter lane per
+test.
+"""
+
+import sqlite3
+import sys
+from array import array
+from datetime import datetime
+from results_store import STATUSES, STATUS_CODES
+
+
+# Status byte for a test that did not take part in a run
+NOT_RUN = 255
+
+# Lanes are 16 bits wide, so at most this many runs are summed at once
+MAX_TREND_RUNS = 65535
+DURATION_LIMIT_MS = 0xFFFFFFFF
+
+TIMED_CODES = (STATUS_CODES['PASSED'], STATUS_CODES['FAILED'], STATUS_CODES['ERROR'])
+
+
+def _indicator(codes):
+    """bytes.translate table mapping the given status codes to 1, all else to 0"""
+    return bytes(1 if value in codes else 0 for value in range(256))
+
+
+PASSED_TABLE = _indicator((STATUS_CODES['PASSED'],))
+TIMED_TABLE = _indicator(TIMED_CODES)
+
+
+def _to_little_endian(values):
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def lane_sum(blobs, width, count, source_width=1, table=None):
+    """Element-wise sum of little-endian unsigned columns across many blobs
+
+    Every blob holds up to count values of source_width bytes (shorter blobs
+    are zero padded). Each is widened into lanes of width bytes, read as one
+    big integer and added, so the per-element work happens in C.
+    """
+    total = 0
+    span = count * width
+    for blob in blobs:
+        if table is not None:
+            blob = blob.translate(table)
+        lanes = bytearray(span)
+        used = len(blob) // source_width
+        for byte in range(source_width):
+            lanes[byte:used * width:width] = blob[byte::source_width]
+        total += int.from_bytes(lanes, 'little')
+    typecode = {2: 'H', 8: 'Q'}[width]
+    return _from_little_endian(typecode, total.to_bytes(span, 'little'))
+
+
+class RunArchive:
+    def __init__(self, db_path="history.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self._create_schema()
+        # suite -> {test name: column}, loaded on first use
+        self._columns = {}
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS archive_tests ("
+                " suite TEXT NOT NULL, name TEXT NOT NULL, col INTEGER NOT NULL,"
+                " PRIMARY KEY (suite, name))")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS archive_runs ("
+                " id INTEGER PRIMARY KEY, suite TEXT NOT NULL, finished_at TEXT NOT NULL,"
+                " total INTEGER NOT NULL, passed INTEGER NOT NULL, failed INTEGER NOT NULL,"
+                " skipped INTEGER NOT NULL, errors INTEGER NOT NULL, test_seconds REAL NOT NULL,"
+                " statuses BLOB NOT NULL, durations BLOB NOT NULL)")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS archive_runs_by_suite ON archive_runs (suite, id)")
+
+    def columns(self, suite):
+        """{test name: column index} of a suite"""
+        columns = self._columns.get(suite)
+        if columns is None:
+            rows = self.conn.execute("SELECT name, col FROM archive_tests WHERE suite = ?", (suite,))
+            columns = self._columns[suite] = dict(rows.fetchall())
+        return columns
+
+    def save_run(self, suite, store):
+        """Archive a finished run (a ResultStore); returns the run id"""
+        if not len(store):
+            return None
+        columns = self.columns(suite)
+        new_tests = []
+        for name in store.names:
+            if name not in columns:
+                columns[name] = len(columns)
+                new_tests.append((suite, name, columns[name]))
+
+        width = len(columns)
+        statuses = bytearray([NOT_RUN]) * width
+        durations = array('I', bytes(4 * width))
+        counts = [0] * len(STATUSES)
+        # A test reported twice in a run (a retry) keeps its last result
+        for name, code, duration in zip(store.names, store.status_codes, store.durations):
+            col = columns[name]
+            statuses[col] = code
+            durations[col] = min(int(round(duration * 1000)), DURATION_LIMIT_MS) if code in TIMED_CODES else 0
+        for code in statuses:
+            if code != NOT_RUN:
+                counts[code] += 1
+
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO archive_tests (suite, name, col) VALUES (?, ?, ?)", new_tests)
+                cursor = self.conn.execute(
+                    "INSERT INTO archive_runs (suite, finished_at, total, passed, failed, skipped,"
+                    " errors, test_seconds, statuses, durations) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (suite, datetime.now().isoformat(timespec='seconds'), sum(counts),
+                     counts[STATUS_CODES['PASSED']], counts[STATUS_CODES['FAILED']],
+                     counts[STATUS_CODES['SKIPPED']], counts[STATUS_CODES['ERROR']],
+                     sum(durations) / 1000, bytes(statuses), _to_little_endian(durations)))
+        except sqlite3.Error:
+            # Forget the unsaved columns so they are assigned again next time
+            self._columns.pop(suite, None)
+            raise
+        return cursor.lastrowid
+
+    def suites(self):
+        """Archived suites, most recently run first"""
+        rows = self.conn.execute(
+            "SELECT suite FROM archive_runs GROUP BY suite ORDER BY MAX(id) DESC")
+        return [suite for suite, in rows]
+
+    def last_run(self, suite=None):
+        """(finished_at, total, passed, failed) of the latest run, or None"""
+        if suite is None:
+            row = self.conn.execute(
+                "SELECT finished_at, total, passed, failed + errors FROM archive_runs"
+                " ORDER BY id DESC LIMIT 1").fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT finished_at, total, passed, failed + errors FROM archive_runs"
+                " WHERE suite = ? ORDER BY id DESC LIMIT 1", (suite,)).fetchone()
+        return row
+
+    def runs(self, suite, limit=50):
+        """Run-level trend, newest first: (id, finished_at, total, passed, failed,
+        skipped, errors, test_seconds)"""
+        rows = self.conn.execute(
+            "SELECT id, finished_at, total, passed, failed, skipped, errors, test_seconds"
+            " FROM archive_runs WHERE suite = ? ORDER BY id DESC LIMIT ?", (suite, limit))
+        return rows.fetchall()
+
+    def test_trend(self, suite, test, limit=50):
+        """One test over the last runs, newest first: (run id, finished_at,
+        status or None if not run, duration seconds)"""
+        col = self.columns(suite).get(test)
+        if col is None:
+            return []
+        # Only the test's own byte and duration leave SQLite
+        rows = self.conn.execute(
+            "SELECT id, finished_at, substr(statuses, ?, 1), substr(durations, ?, 4)"
+            " FROM archive_runs WHERE suite = ? ORDER BY id DESC LIMIT ?",
+            (col + 1, 4 * col + 1, suite, limit))
+        trend = []
+        for run_id, finished_at, status, duration in rows:
+            code = status[0] if status else NOT_RUN
+            millis = int.from_bytes(duration, 'little') if len(duration) == 4 else 0
+            trend.append((run_id, finished_at, STATUSES[code] if code != NOT_RUN else None, millis / 1000))
+        return trend
+
+    def test_summary(self, suite, limit=50):
+        """Per-test trend over the last runs:
+        [(name, executed runs, pass rate, mean duration, status in the latest run)]"""
+        columns = self.columns(suite)
+        count = len(columns)
+        limit = min(limit, MAX_TREND_RUNS)
+        rows = self.conn.execute(
+            "SELECT statuses, durations FROM archive_runs WHERE suite = ? ORDER BY id DESC LIMIT ?",
+            (suite, limit)).fetchall()
+        if not rows or not count:
+            return []
+
+        status_blobs = [statuses for statuses, _ in rows]
+        passed = lane_sum(status_blobs, 2, count, table=PASSED_TABLE)
+        executed = lane_sum(status_blobs, 2, count, table=TIMED_TABLE)
+        total_ms = lane_sum((durations for _, durations in rows), 8, count, source_width=4)
+
+        latest = status_blobs[0]
+
+        summary = []
+        for name, col in columns.items():
+            runs = executed[col]
+            code = latest[col] if col < len(latest) else NOT_RUN
+            summary.append((name, runs,
+                            passed[col] / runs if runs else None,
+                            total_ms[col] / runs / 1000 if runs else None,
+                            STATUSES[code] if code != NOT_RUN else None))
+        return summary
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,77 @@
+"""
+Run Handle - Cooperative cancellation of a test run
+Every run gets a RunHandle. Stopping it (Stop button, stop-on-fail) sets a flag
+that runners check before scheduling the next test, wakes any wait() and calls
+the registered cancel callbacks, which interrupt in-flight pytest workers.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+
+
+# Seconds an interrupted pytest gets for fixture teardown before it is killed
+STOP_GRACE_SECONDS = 5.0
+
+
+class RunHandle:
+    def __init__(self):
+        self.reason = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="by user"):
+        """Stop the run (safe from any thread; only the first reason is kept)"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def wait(self, seconds):
+        """Sleep up to seconds; True if the run was cancelled meanwhile"""
+        return self._event.wait(seconds)
+
+    def on_cancel(self, callback):
+        """Call callback once the run is cancelled (right away if it already is)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def stop_process(process, grace=STOP_GRACE_SECONDS):
+    """Interrupt a pytest process in the background, killing it after grace seconds
+
+    SIGINT lets pytest run fixture teardown and print its summary; where that
+    is unavailable the process is terminated instead.
+    """
+    def stop():
+        if process.poll() is not None:
+            return
+        try:
+            if os.name == 'posix':
+                process.send_signal(signal.SIGINT)
+            else:
+                process.terminate()
+            process.wait(grace)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        except OSError:
+            pass
+    threading.Thread(target=stop, daemon=True).start()
@@ -0,0 +1,80 @@
+"""
+Run Queue - Pending suite runs, persisted so they survive a restart
+Runs wait in a SQLite table next to the run history and are taken highest
+priority first (smoke before normal before full regression), oldest first
+within a priority. The dashboard starts the next one as soon as a run ends.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+
+# Priority keys stored in configs, in the order they run, with their labels
+PRIORITIES = (
+    ('smoke', 'Smoke'),
+    ('normal', 'Normal'),
+    ('regression', 'Full regression'),
+)
+PRIORITY_RANK = {key: rank for rank, (key, _) in enumerate(PRIORITIES)}
+DEFAULT_PRIORITY = 'normal'
+
+
+class QueuedRun:
+    __slots__ = ('id', 'priority', 'enqueued_at', 'config')
+
+    def __init__(self, id, priority, enqueued_at, config):
+        self.id = id
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.config = config
+
+
+class RunQueue:
+    def __init__(self, db_path="history.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS run_queue ("
+                " id INTEGER PRIMARY KEY, rank INTEGER NOT NULL, priority TEXT NOT NULL,"
+                " enqueued_at TEXT NOT NULL, config TEXT NOT NULL)")
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM run_queue").fetchone()[0]
+
+    def push(self, config):
+        """Queue a run at the priority named in config['priority']; returns its id"""
+        priority = config.get('priority', DEFAULT_PRIORITY)
+        if priority not in PRIORITY_RANK:
+            priority = DEFAULT_PRIORITY
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO run_queue (rank, priority, enqueued_at, config) VALUES (?, ?, ?, ?)",
+                (PRIORITY_RANK[priority], priority, datetime.now().isoformat(timespec='seconds'),
+                 json.dumps(config)))
+        return cursor.lastrowid
+
+    def entries(self):
+        """Queued runs in the order they will start"""
+        rows = self.conn.execute(
+            "SELECT id, priority, enqueued_at, config FROM run_queue ORDER BY rank, id")
+        return [QueuedRun(run_id, priority, enqueued_at, json.loads(config))
+                for run_id, priority, enqueued_at, config in rows]
+
+    def pop(self):
+        """Remove and return the next run to start, or None"""
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT id, priority, enqueued_at, config FROM run_queue ORDER BY rank, id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self.conn.execute("DELETE FROM run_queue WHERE id = ?", (row[0],))
+        return QueuedRun(row[0], row[1], row[2], json.loads(row[3]))
+
+    def remove(self, run_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM run_queue WHERE id = ?", (run_id,))
+
+    def close(self):
+        self.conn.close()
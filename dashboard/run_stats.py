@@ -0,0 +1,78 @@
+"""
+Run Statistics - Incremental accumulator for a test run
+Every result updates the counts and a log-spaced duration histogram in O(1),
+so nothing ever rescans the test list. Percentiles are read from the
+histogram (within ~5% of the exact value); max is exact.
+"""
+
+import math
+from results_store import parse_duration
+
+
+# Histogram buckets grow by 5% from 1 ms; 400 buckets reach past 80 hours
+MIN_DURATION = 0.001
+BUCKET_GROWTH = 1.05
+NUM_BUCKETS = 400
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+
+def format_elapsed(seconds):
+    """m:ss, as shown in the Duration stat box"""
+    return f"{int(seconds//60)}:{int(seconds%60):02d}"
+
+
+class RunStats:
+    __slots__ = ('total', 'passed', 'failed', 'skipped', 'errors',
+                 'max_duration', 'timed', '_buckets')
+
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.max_duration = 0.0
+        # Results that contribute to the duration percentiles (not skipped)
+        self.timed = 0
+        self._buckets = [0] * NUM_BUCKETS
+
+    def add(self, status, duration):
+        """Account for one result; duration may be seconds or a '1.23s' string"""
+        self.total += 1
+        if status == 'PASSED':
+            self.passed += 1
+        elif status == 'FAILED':
+            self.failed += 1
+        elif status == 'ERROR':
+            self.errors += 1
+        else:
+            self.skipped += 1
+            return
+
+        duration = parse_duration(duration)
+        self.timed += 1
+        if duration > self.max_duration:
+            self.max_duration = duration
+        if duration <= MIN_DURATION:
+            index = 0
+        else:
+            index = min(NUM_BUCKETS - 1, int(math.log(duration / MIN_DURATION) / _LOG_GROWTH) + 1)
+        self._buckets[index] += 1
+
+    @property
+    def failures(self):
+        """Failed plus errored results, as shown in the Failed stat box"""
+        return self.failed + self.errors
+
+    def percentile(self, q):
+        """Approximate duration percentile, q in [0, 1]"""
+        if not self.timed:
+            return 0.0
+        target = max(1, math.ceil(q * self.timed))
+        seen = 0
+        for index, count in enumerate(self._buckets):
+            seen += count
+            if seen >= target:
+                # Upper edge of the bucket, never beyond the observed max
+                return min(MIN_DURATION * BUCKET_GROWTH ** index, self.max_duration)
+        return self.max_duration
@@ -0,0 +1,368 @@
+"""
+Bench Scheduler - Runs one suite across a pool of identical HiL benches
+The suite is split into one shard per bench (round-robin, or balanced by
+historical duration when known), every shard runs on its own worker thread,
+and the streamed results are merged into one run on the EventBus.
+Also home of BaseRunner, the run lifecycle every runner shares.
+"""
+
+import heapq
+import re
+import threading
+from datetime import datetime
+from event_bus import RunStarted, RunFinished
+from profiler import profiled
+from results_store import ResultStore
+from retry_policy import RetryPolicy
+from run_handle import RunHandle
+from run_stats import RunStats, format_elapsed
+
+
+def parse_targets(config):
+    """Return the bench pool as [(ip, port), ...]
+
+    'bench_pool' holds "ip[:port]" entries separated by commas or whitespace;
+    entries without a port use the configured port. Without a pool the single
+    device_ip/port target is used.
+    """
+    pool = str(config.get('bench_pool', '')).strip()
+    if not pool:
+        return [(config['device_ip'], config['port'])]
+
+    targets = []
+    for entry in re.split(r'[,\s]+', pool):
+        if not entry:
+            continue
+        ip, _, port = entry.partition(':')
+        targets.append((ip, port or config['port']))
+    return targets
+
+
+def shard_round_robin(tests, count):
+    """Deal tests out to count shards in turn"""
+    return [tests[i::count] for i in range(count)]
+
+
+def duration_cost(tests, durations):
+    """Return a test -> expected seconds function
+
+    Tests without history are assumed to take the average known duration.
+    """
+    known = [durations[t['name']] for t in tests if t['name'] in durations]
+    fallback = sum(known) / len(known) if known else 1.0
+
+    def cost(test):
+        return durations.get(test['name'], fallback)
+    return cost
+
+
+def shard_by_duration(tests, count, durations):
+    """Longest-processing-time-first: give each test to the least loaded shard"""
+    cost = duration_cost(tests, durations)
+
+    shards = [[] for _ in range(count)]
+    loads = [(0.0, i) for i in range(count)]
+    for test in sorted(tests, key=cost, reverse=True):
+        load, i = heapq.heappop(loads)
+        shards[i].append(test)
+        heapq.heappush(loads, (load + cost(test), i))
+    return shards
+
+
+def shard_tests(tests, count, durations=None):
+    """Split tests into count shards, balanced by duration when history exists"""
+    if durations:
+        return shard_by_duration(tests, count, durations)
+    return shard_round_robin(tests, count)
+
+
+def order_tests(tests, durations=None, failure_rates=None, stop_on_fail=False):
+    """Order one bench's tests
+
+    Stop-on-fail runs put historically failing tests first (shortest first
+    among equals) so a bad build fails fast; otherwise the longest tests go
+    first. Without history the collected order is kept.
+    """
+    durations = durations or {}
+    cost = duration_cost(tests, durations)
+    if stop_on_fail and failure_rates:
+        return sorted(tests, key=lambda t: (-failure_rates.get(t['name'], 0.0), cost(t)))
+    if durations:
+        return sorted(tests, key=cost, reverse=True)
+    return list(tests)
+
+
+def estimate_duration(tests, count, durations):
+    """Expected wall-clock seconds on count benches, or None without history"""
+    if not tests or not durations:
+        return None
+    cost = duration_cost(tests, durations)
+    shards = shard_by_duration(tests, count, durations)
+    return max(sum(cost(test) for test in shard) for shard in shards)
+
+
+class RunHints:
+    """What a run knows up front: recent durations, failure rates, flakiness
+    scores and cached results"""
+    __slots__ = ('durations', 'failure_rates', 'flaky', 'cached')
+
+    def __init__(self, durations=None, failure_rates=None, flaky=None, cached=None):
+        self.durations = durations or {}
+        self.failure_rates = failure_rates or {}
+        self.flaky = flaky or {}
+        # CacheSnapshot for the selected run mode, or None
+        self.cached = cached
+
+
+def load_hints(config, history=None, cache=None):
+    """Read history and result cache for a config's suite
+
+    Must be called on the thread that owns the store connections; the
+    returned RunHints can then be used from any worker thread.
+    """
+    from history_store import suite_key
+    key = suite_key(config)
+    hints = RunHints()
+    if history is not None:
+        hints.durations = history.durations(key)
+        hints.failure_rates = history.failure_rates(key)
+        hints.flaky = history.flakiness(key)
+    mode = config.get('run_mode', 'full')
+    if cache is not None and mode != 'full':
+        hints.cached = cache.snapshot(key, mode)
+    return hints
+
+
+def select_configured(tests, config):
+    """Keep the tests picked in the dashboard (all of them when none were picked)"""
+    chosen = config.get('tests')
+    if not chosen:
+        return tests
+    chosen = set(chosen)
+    return [test for test in tests if test['name'] in chosen]
+
+
+def prepare_tests(tests, config, hints):
+    """Order one bench's tests by history, then apply the selection and run mode"""
+    tests = order_tests(select_configured(tests, config), hints.durations, hints.failure_rates,
+                        config.get('stop_on_fail'))
+    if hints.cached is None:
+        return tests
+    from result_cache import select_tests
+    return select_tests(tests, config, hints.cached)
+
+
+def config_int(config, key, default=0):
+    """Integer config field; blank or malformed values give the default"""
+    try:
+        return int(str(config.get(key, '')).strip() or default)
+    except ValueError:
+        return default
+
+
+class BaseRunner:
+    """Run lifecycle shared by the runners
+
+    run_tests() publishes RunStarted, calls execute(config, hints) on a worker
+    thread and publishes the summary and RunFinished. Subclasses implement
+    execute(), reporting through self.report() and logging through self.bus,
+    and return None or an error status text. They must check self.handle
+    before starting each test; stop() and stop-on-fail cancel it.
+    """
+
+    def __init__(self, bus, history=None, cache=None, pools=None, index=None):
+        self.bus = bus
+        self.history = history
+        self.cache = cache
+        # DevicePools shared with earlier runs, or None to connect per run
+        self.pools = pools
+        # DiscoveryIndex that pytest collection is cached in, or None to always collect
+        self.index = index
+        self.is_running = False
+        self.worker = None
+
+        # Latest run, filled in as results are reported
+        self.results = ResultStore()
+        self.stats = RunStats()
+        self.handle = RunHandle()
+        self.stop_on_fail = False
+        # Error status text of the latest run (e.g. pytest exited with code 2), or None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def run_tests(self, config, hints=None):
+        """Start a run on a worker thread (called from the UI thread)
+
+        hints (RunHints) come from the caller when the history lives elsewhere,
+        e.g. with the dashboard of a bench agent; by default they are loaded
+        here. Returns the run's RunHandle, or None if a run is already in progress.
+        """
+        if self.is_running:
+            self.bus.log('[WARNING] Tests already running!')
+            return None
+
+        self.is_running = True
+        self.results = ResultStore()
+        self.stats = RunStats()
+        self.handle = RunHandle()
+        self.error = None
+        self.stop_on_fail = bool(config.get('stop_on_fail'))
+        self.bus.publish(RunStarted(config))
+        self.bus.status("Running...")
+
+        # History is read here because the stores belong to the calling thread
+        if hints is None:
+            hints = load_hints(config, self.history, self.cache)
+        self.worker = threading.Thread(target=self._worker, args=(config, hints), daemon=True)
+        self.worker.start()
+        return self.handle
+
+    def stop(self, reason="by user"):
+        """Cancel the current run; in-flight tests are interrupted"""
+        if self.is_running:
+            self.handle.cancel(reason)
+
+    def execute(self, config, hints):
+        raise NotImplementedError
+
+    @profiled('runner_report')
+    def report(self, test_name, status, duration, message='', attempts=1):
+        """Record one result (thread-safe, called from any worker)"""
+        with self._lock:
+            self.results.append(test_name, status, duration, attempts)
+            self.stats.add(status, duration)
+            self.bus.result(test_name, status, duration, message, attempts)
+        if self.stop_on_fail and status in ('FAILED', 'ERROR') and not self.handle.cancelled:
+            self.bus.log(f'[WARNING] Stopping the run: {test_name} {status.lower()}')
+            self.handle.cancel(f"after {test_name} failed")
+
+    def _worker(self, config, hints):
+        start_time = datetime.now()
+        try:
+            error = self.execute(config, hints)
+        except Exception as e:
+            self.bus.log(f'[ERROR] Run failed: {e}')
+            error = 'run failed'
+        self._finish_execution(config, start_time, error)
+
+    def _finish_execution(self, config, start_time, error=None):
+        """Publish the summary and the end of the run (worker thread)"""
+        stats = self.stats
+        self.error = error
+        duration_str = format_elapsed((datetime.now() - start_time).total_seconds())
+
+        self.bus.log('\n[INFO] Test execution complete!')
+        self.bus.log(f'[INFO] Results: {stats.passed} passed, '
+                     f'{stats.failures} failed, {stats.total} total')
+        self.bus.log(f'[INFO] Duration: {duration_str}')
+        flaky = self.results.flaky_count()
+        if flaky:
+            self.bus.log(f'[INFO] Flaky: {flaky} tests passed only after a retry')
+
+        if self.handle.cancelled:
+            self.bus.status(f"Stopped {self.handle.reason}")
+        elif error:
+            self.bus.status(f"Error - {error}")
+        elif stats.failures > 0:
+            self.bus.status("Complete - Some tests failed")
+        else:
+            self.bus.status("Complete - All tests passed")
+
+        # Cleared first so a RunFinished handler can start the next queued run
+        self.is_running = False
+        self.bus.publish(RunFinished(config, self.results))
+
+
+class BenchScheduler(BaseRunner):
+    def __init__(self, bus, executor, history=None, cache=None, pools=None):
+        """executor provides list_tests(config) and
+        run_shard(config, target, tests, log, report, retry, handle), which must be
+        thread-safe; report is called as report(name, status, duration, message,
+        attempts), retry is the bench's RetryPolicy (or None) and handle the
+        run's RunHandle"""
+        super().__init__(bus, history, cache, pools)
+        self.executor = executor
+
+    def execute(self, config, hints):
+        """Start one worker per non-empty shard and wait for all of them"""
+        self.bus.log(f'\n[INFO] Starting test suite: {config["suite"]}')
+
+        targets = parse_targets(config)
+        try:
+            tests = self.executor.list_tests(config)
+        except Exception as e:
+            self.bus.log(f'[ERROR] Failed to list tests: {e}')
+            return 'could not list tests'
+        if self.handle.cancelled:
+            return None
+        tests = select_configured(tests, config)
+        if hints.cached is not None:
+            # Drop tests the run mode skips before they take up shard capacity
+            from result_cache import select_tests
+            tests = select_tests(tests, config, hints.cached)
+        shards = [prepare_tests(shard, config, hints)
+                  for shard in shard_tests(tests, len(targets), hints.durations)]
+
+        self.bus.log(f'[INFO] Sharding {len(tests)} tests across {len(targets)} benches')
+
+        busy = [(target, shard) for target, shard in zip(targets, shards) if shard]
+        retry_policies = RetryPolicy.from_config(config, hints).split(max(len(busy), 1))
+
+        self._failed_benches = []
+        workers = []
+        for (target, shard), retry in zip(busy, retry_policies):
+            self.bus.log(f'[INFO] {target[0]}:{target[1]} -> {len(shard)} tests')
+            worker = threading.Thread(target=self._run_shard, args=(config, target, shard, retry), daemon=True)
+            worker.start()
+            workers.append(worker)
+
+        for worker in workers:
+            worker.join()
+        if self._failed_benches:
+            return f"{len(self._failed_benches)} of {len(workers)} benches failed"
+        return None
+
+    def _run_shard(self, config, target, shard, retry):
+        """Run one shard on its bench (worker thread)"""
+        prefix = f'[{target[0]}:{target[1]}]'
+
+        def log(message):
+            self.bus.log(f'{prefix} {message}')
+
+        try:
+            return_code = self.executor.run_shard(config, target, shard, log, self.report, retry, self.handle)
+        except Exception as e:
+            log(f'[ERROR] Bench failed: {e}')
+            self._failed_benches.append(target)
+            return
+        if return_code not in (None, 0, 1) and not self.handle.cancelled:
+            # pytest itself failed on this bench (collection or usage error)
+            log(f'[ERROR] pytest exited with code {return_code}')
+            self._failed_benches.append(target)
+
+
+def create_runner(config, bus, history=None, cache=None, pools=None, index=None):
+    """Pick the runner for a config
+
+    An agent address hands the whole run to that bench agent. Otherwise a
+    pytest path runs the real suite, synthetic_tests the seeded load
+    generator of benchmark.py, and anything else the mock suites; with a
+    bench pool the chosen runner becomes the executor of a BenchScheduler.
+    pools (DevicePools) keeps bench connections open across runs, index
+    (DiscoveryIndex) caches pytest collection.
+    """
+    if config.get('agent'):
+        # The agent picks the runner and shards across its benches itself
+        from remote_runner import RemoteRunner
+        return RemoteRunner(bus, history=history, cache=cache)
+    if config.get('test_path'):
+        from pytest_runner import PytestRunner as runner_class
+    elif config.get('synthetic_tests'):
+        from synthetic_runner import SyntheticRunner as runner_class
+    else:
+        from mock_test_runner import MockTestRunner as runner_class
+
+    if len(parse_targets(config)) > 1:
+        return BenchScheduler(bus, runner_class(bus, pools=pools, index=index),
+                              history=history, cache=cache, pools=pools)
+    return runner_class(bus, history=history, cache=cache, pools=pools, index=index)
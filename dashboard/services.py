@@ -0,0 +1,72 @@
+"""
+Services - Long-lived stores and pools shared by the whole dashboard
+Every service is created on first use and then reused by all panels and
+runs: startup only pays for what the first screen needs, and nothing (like
+ConfigManager, which touches the configs directory) is rebuilt per click.
+Modules are imported on first use too.
+
+Create and use the services on the Tk thread; the stores hold SQLite
+connections of the thread that opened them.
+"""
+
+import time
+from functools import cached_property
+
+
+class Services:
+    def __init__(self):
+        # name -> seconds its import and construction took, for the startup report
+        self.created = {}
+
+    def _created(self, name, began, service):
+        self.created[name] = time.perf_counter() - began
+        return service
+
+    @cached_property
+    def history(self):
+        """Per-test duration/outcome history used for ordering and estimates"""
+        began = time.perf_counter()
+        from history_store import HistoryStore
+        return self._created('history', began, HistoryStore())
+
+    @cached_property
+    def result_cache(self):
+        """Latest result per test, for the incremental run modes"""
+        began = time.perf_counter()
+        from result_cache import ResultCache
+        return self._created('result_cache', began, ResultCache())
+
+    @cached_property
+    def archive(self):
+        """Every finished run, for the history browser"""
+        began = time.perf_counter()
+        from run_archive import RunArchive
+        return self._created('archive', began, RunArchive())
+
+    @cached_property
+    def device_pools(self):
+        """Open bench connections, reused by every test and run"""
+        began = time.perf_counter()
+        from device_pool import DevicePools
+        return self._created('device_pools', began, DevicePools())
+
+    @cached_property
+    def discovery(self):
+        """Cached pytest collection, so suites list without running pytest"""
+        began = time.perf_counter()
+        from discovery import DiscoveryIndex
+        return self._created('discovery', began, DiscoveryIndex())
+
+    @cached_property
+    def run_queue(self):
+        """Runs waiting for the bench, persisted across restarts"""
+        began = time.perf_counter()
+        from run_queue import RunQueue
+        return self._created('run_queue', began, RunQueue())
+
+    @cached_property
+    def config_manager(self):
+        """Saved configs and their catalog"""
+        began = time.perf_counter()
+        from config_manager import ConfigManager
+        return self._created('config_manager', began, ConfigManager())
@@ -0,0 +1,126 @@
+"""
+Event Sinks - Consumers of run events other than the dashboard window
+Each sink is subscribed to the EventBus with its own queue and policy and
+handles events on its own delivery thread:
+
+    StreamSink   log lines and status changes to a text stream (stdout, a file)
+    JUnitSink    streams a JUnit XML report per run
+    MetricsSink  per-run counters in the Prometheus text exposition format
+    LogStoreSink every log line to the dashboard's session LogStore and LogIndex
+"""
+
+import os
+import time
+from datetime import datetime
+from event_bus import RunStarted, LogLine, TestResult, StatusChanged, RunFinished
+from junit_writer import JUnitWriter
+
+
+class StreamSink:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def handle(self, event):
+        if isinstance(event, LogLine):
+            self.stream.write(event.message + '\n')
+        elif isinstance(event, StatusChanged):
+            self.stream.write(f'[STATUS] {event.text}\n')
+        elif isinstance(event, RunFinished):
+            self.stream.flush()
+
+
+class JUnitSink:
+    # Log lines play no part in the report, so they are not even queued
+    EVENTS = (RunStarted, TestResult, RunFinished)
+
+    def __init__(self, report_dir="reports", path=None):
+        """Reports go to report_dir/junit_<stamp>.xml, or always to path if given"""
+        self.report_dir = report_dir
+        self.path = path
+        self.writer = None
+        # Set once a run's report is complete on disk
+        self.last_report_path = None
+
+    def handle(self, event):
+        if isinstance(event, TestResult):
+            if self.writer is not None:
+                self.writer.add(event.name, event.status, event.duration, event.message)
+        elif isinstance(event, RunStarted):
+            if self.writer is not None:
+                self.writer.close()
+            path = self.path
+            if path is None:
+                stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                path = os.path.join(self.report_dir, f"junit_{stamp}.xml")
+            self.writer = JUnitWriter(path, event.config['suite'])
+        elif isinstance(event, RunFinished):
+            if self.writer is not None:
+                self.writer.close()
+                self.last_report_path = self.writer.path
+                self.writer = None
+
+
+class MetricsSink:
+    def __init__(self, path):
+        """The file is rewritten at the end of every run (textfile collector style)"""
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.counts = {'PASSED': 0, 'FAILED': 0, 'SKIPPED': 0, 'ERROR': 0}
+        self.log_lines = 0
+        self.started = time.monotonic()
+
+    def handle(self, event):
+        if isinstance(event, TestResult):
+            self.counts[event.status] = self.counts.get(event.status, 0) + 1
+        elif isinstance(event, LogLine):
+            self.log_lines += 1
+        elif isinstance(event, RunStarted):
+            self.reset()
+        elif isinstance(event, RunFinished):
+            self.write(event.config)
+
+    def write(self, config):
+        suite = str(config.get('suite', '')).replace('\\', '\\\\').replace('"', '\\"')
+        lines = ['# TYPE hil_tests_total counter']
+        for status, count in self.counts.items():
+            lines.append(f'hil_tests_total{{suite="{suite}",status="{status.lower()}"}} {count}')
+        lines.append('# TYPE hil_log_lines_total counter')
+        lines.append(f'hil_log_lines_total{{suite="{suite}"}} {self.log_lines}')
+        lines.append('# TYPE hil_run_duration_seconds gauge')
+        lines.append(f'hil_run_duration_seconds{{suite="{suite}"}} {time.monotonic() - self.started:.3f}')
+        lines.append('# TYPE hil_run_finished_timestamp_seconds gauge')
+        lines.append(f'hil_run_finished_timestamp_seconds{{suite="{suite}"}} {time.time():.0f}')
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename so a scraper never reads a half-written file
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)
+
+
+class LogStoreSink:
+    # Subscribe with these events and BLOCK: the session log must be complete
+    EVENTS = (LogLine,)
+
+    def __init__(self, store, index):
+        """Spills log lines to store (a LogStore) and index (its LogIndex)"""
+        self.store = store
+        self.index = index
+
+    def handle(self, event):
+        self.handle_batch([event])
+
+    def handle_batch(self, events):
+        messages = [event.message for event in events if isinstance(event, LogLine)]
+        if not messages:
+            return
+        lines = '\n'.join(messages).split('\n')
+        # One lock hold, so readers never see the store ahead of the index
+        with self.store.lock:
+            self.store.append(lines)
+            self.index.add(lines)
@@ -0,0 +1,81 @@
+"""
+Synthetic Runner - Seeded, high-rate stand-in for a test suite
+Reports `synthetic_tests` results as fast as the log rate allows, with log
+lines shaped like the real runners' ([INFO] steps, [PASS]/[FAIL]/[ERROR]
+outcomes). Outcomes, durations and log text come from a seeded RNG, so two
+runs with the same config publish the same events. Used by benchmark.py to
+load the ingestion path; a config with synthetic_tests set runs it from the
+dashboard or headless mode too.
+
+Config fields:
+    synthetic_tests  number of tests (default 100000)
+    log_rate         log lines per second, 0 = as fast as possible (default 10000)
+    lines_per_test   log lines per test, outcome line included (default 2)
+    fail_rate        fraction of failing tests (default 0.02)
+    seed             RNG seed (default 0)
+"""
+
+import random
+import time
+from run_handle import RunHandle
+from scheduler import BaseRunner, config_int
+
+
+DEFAULT_TESTS = 100000
+DEFAULT_LOG_RATE = 10000
+DEFAULT_LINES_PER_TEST = 2
+DEFAULT_FAIL_RATE = 0.02
+# Pacing sleeps are batched; shorter waits are carried over to the next test
+MIN_SLEEP = 0.002
+
+
+def synthetic_tests(count):
+    return [{'name': f'test_synthetic_{number:06d}'} for number in range(count)]
+
+
+class SyntheticRunner(BaseRunner):
+    def execute(self, config, hints):
+        """Run every synthetic test on the configured device (worker thread)"""
+        self.bus.log(f'\n[INFO] Starting synthetic suite: {config_int(config, "synthetic_tests", DEFAULT_TESTS)} tests')
+        self.run_shard(config, (config.get('device_ip'), config.get('port')), self.list_tests(config),
+                       self.bus.log, self.report, handle=self.handle)
+
+    def list_tests(self, config):
+        return synthetic_tests(config_int(config, 'synthetic_tests', DEFAULT_TESTS))
+
+    def run_shard(self, config, target, tests, log, report, retry=None, handle=None):
+        """Emit the tests' log lines and results, paced to log_rate (thread-safe)"""
+        handle = handle or RunHandle()
+        # Seeded per bench, so sharded runs are reproducible too
+        rng = random.Random(f"{config.get('seed', 0)}:{target}")
+        rate = config_int(config, 'log_rate', DEFAULT_LOG_RATE)
+        lines_per_test = max(config_int(config, 'lines_per_test', DEFAULT_LINES_PER_TEST), 1)
+        fail_rate = float(config.get('fail_rate', DEFAULT_FAIL_RATE))
+
+        start = time.perf_counter()
+        emitted = 0
+        for test in tests:
+            if handle.cancelled:
+                break
+            name = test['name']
+            for step in range(lines_per_test - 1):
+                log(f'[INFO] {name}: step {step} value={rng.randint(0, 65535)}')
+
+            duration = rng.lognormvariate(-3.0, 1.0)
+            roll = rng.random()
+            if roll < fail_rate:
+                status, message = 'FAILED', f'expected {rng.randint(0, 255)}, got {rng.randint(0, 255)}'
+                log(f'[FAIL] {name} ({duration:.3f}s) - {message}')
+            elif roll < fail_rate * 1.25:
+                status, message = 'ERROR', 'bench did not respond'
+                log(f'[ERROR] {name} ({duration:.3f}s) - {message}')
+            else:
+                status, message = 'PASSED', ''
+                log(f'[PASS] {name} ({duration:.3f}s)')
+            report(name, status, duration, message)
+
+            emitted += lines_per_test
+            if rate:
+                ahead = emitted / rate - (time.perf_counter() - start)
+                if ahead > MIN_SLEEP:
+                    handle.wait(ahead)